@@ -0,0 +1,190 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models import Max, Sum
+from django.utils import timezone
+
+from shop.models import Order, OrderItem, Product
+from .models import SalesRollup
+
+# Shu statusdagi buyurtmalar "yetkazilgan" (fulfilled_*) ustunlariga kiradi
+FULFILLED_STATUSES = frozenset({'delivered'})
+# product_id=0 — bucket bo‘yicha jami qator
+TOTAL_PRODUCT_ID = 0
+
+MEASURES = ('orders', 'units', 'revenue', 'fulfilled_orders', 'fulfilled_units', 'fulfilled_revenue')
+
+
+def bucket_start(dt, granularity):
+    """Lokal vaqt bo‘yicha soat/kun boshi."""
+    local = timezone.localtime(dt).replace(minute=0, second=0, microsecond=0)
+    if granularity == SalesRollup.DAY:
+        local = local.replace(hour=0)
+    return local
+
+
+# ===== Buyurtma qatorlari =====
+def load_order_lines(orders):
+    """
+    ``{order.id: [(product_id, name, quantity, price), ...]}`` — buyurtma paytidagi narxlar
+    (``OrderItem``), bitta so‘rov bilan. O‘chirilgan product qatorlarida ``product_id`` None.
+    """
+    lines = defaultdict(list)
+    rows = (
+        OrderItem.objects.filter(order_id__in=[order.id for order in orders])
+        .order_by('order_id', 'id')
+        .values_list('order_id', 'product_id', 'name', 'quantity', 'price')
+    )
+    for order_id, product_id, name, quantity, price in rows:
+        lines[order_id].append((product_id, name, quantity, price))
+    return lines
+
+
+def _rollup_rows(orders, lines, sign=1, placed=True, fulfilled=None):
+    """
+    Buyurtmalardan ``{(granularity, bucket, product_id): row}`` deltalarini yig‘adi.
+    ``placed`` — orders/units/revenue ga qo‘shish; ``fulfilled`` — None bo‘lsa statusdan aniqlanadi.
+    """
+    product_ids = {pid for order_lines in lines.values() for pid, *_ in order_lines}
+    categories = dict(Product.objects.filter(id__in=product_ids).values_list('id', 'category_id'))
+
+    rows = {}
+
+    def add(key, category_id, name, orders_n, units, revenue, is_fulfilled):
+        row = rows.setdefault(key, {
+            'category_id': category_id, 'product_name': name,
+            **{measure: 0 for measure in MEASURES},
+        })
+        if placed:
+            row['orders'] += sign * orders_n
+            row['units'] += sign * units
+            row['revenue'] += sign * revenue
+        if is_fulfilled:
+            row['fulfilled_orders'] += sign * orders_n
+            row['fulfilled_units'] += sign * units
+            row['fulfilled_revenue'] += sign * revenue
+
+    for order in orders:
+        order_lines = lines.get(order.id)
+        if not order_lines:
+            continue
+        is_fulfilled = order.status in FULFILLED_STATUSES if fulfilled is None else fulfilled
+        for granularity in (SalesRollup.HOUR, SalesRollup.DAY):
+            bucket = bucket_start(order.created_at, granularity)
+            total_units = 0
+            total_revenue = Decimal('0')
+            for product_id, name, qty, price in order_lines:
+                revenue = price * qty
+                total_units += qty
+                total_revenue += revenue
+                if product_id is None:
+                    continue  # product o‘chirilgan — faqat jami qatorga kiradi
+                add((granularity, bucket, product_id), categories.get(product_id), name, 1, qty, revenue, is_fulfilled)
+            add((granularity, bucket, TOTAL_PRODUCT_ID), None, '', 1, total_units, total_revenue, is_fulfilled)
+    return rows
+
+
+def _apply(rows):
+    """Deltalarni bitta ``INSERT ... ON CONFLICT DO UPDATE SET col = col + EXCLUDED.col`` bilan qo‘shadi."""
+    if not rows:
+        return
+    table = SalesRollup._meta.db_table
+    columns = ('granularity', 'bucket', 'product_id', 'category_id', 'product_name') + MEASURES
+    placeholders = '(' + ', '.join(['%s'] * len(columns)) + ')'
+    params = []
+    for (granularity, bucket, product_id), row in rows.items():
+        params.extend([granularity, bucket, product_id, row['category_id'], row['product_name']])
+        params.extend(row[measure] for measure in MEASURES)
+
+    updates = ', '.join(f'{m} = t.{m} + EXCLUDED.{m}' for m in MEASURES)
+    sql = (
+        f"INSERT INTO {table} AS t ({', '.join(columns)}) VALUES {', '.join([placeholders] * len(rows))} "
+        f"ON CONFLICT (granularity, bucket, product_id) DO UPDATE SET {updates}, "
+        f"category_id = COALESCE(EXCLUDED.category_id, t.category_id), "
+        f"product_name = CASE WHEN EXCLUDED.product_name = '' THEN t.product_name ELSE EXCLUDED.product_name END"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+# ===== Inkremental yangilash (fon vazifalari) =====
+# ``order`` (status, created_at) va ``lines`` — signal/commit paytida olingan qiymatlar, bazadan qayta
+# o‘qilmaydi: worker kechiksa, qayta ursa yoki vazifalarni parallel bajarsa ham har biri o‘z deltasini
+# qo‘shadi va natija bajarilish tartibiga bog‘liq emas.
+def fulfilment_changed(old_status, new_status):
+    return (old_status in FULFILLED_STATUSES) != (new_status in FULFILLED_STATUSES)
+
+
+def record_order_placed(order, lines):
+    _apply(_rollup_rows([order], lines))
+
+
+def record_order_status_change(order, lines, old_status, new_status):
+    if fulfilment_changed(old_status, new_status):
+        sign = 1 if new_status in FULFILLED_STATUSES else -1
+        _apply(_rollup_rows([order], lines, sign=sign, placed=False, fulfilled=True))
+
+
+def record_order_removed(order, lines):
+    """Order o‘chirilganda (pre_delete da olingan qatorlar bilan) hissasini ayiradi."""
+    _apply(_rollup_rows([order], lines, sign=-1))
+
+
+# ===== To‘liq qayta hisoblash =====
+def rebuild_rollups(since=None, chunk_size=2000):
+    """
+    Rollup larni buyurtmalardan qayta quradi (``since`` — aware datetime, shu paytdan boshlab).
+    Buyurtmalar id bo‘yicha bo‘laklab o‘qiladi, har bo‘lak bitta upsert bilan yoziladi.
+    """
+    orders = Order.objects.only('id', 'status', 'created_at').order_by('id')
+    stale = SalesRollup.objects.all()
+    if since is not None:
+        orders = orders.filter(created_at__gte=bucket_start(since, SalesRollup.DAY))
+        stale = stale.filter(bucket__gte=bucket_start(since, SalesRollup.DAY))
+
+    processed = 0
+    with transaction.atomic():
+        stale.delete()
+        last_id = 0
+        while True:
+            chunk = list(orders.filter(id__gt=last_id)[:chunk_size])
+            if not chunk:
+                break
+            _apply(_rollup_rows(chunk, load_order_lines(chunk)))
+            processed += len(chunk)
+            last_id = chunk[-1].id
+    return processed
+
+
+# ===== Hisobotlar (faqat rollup jadvalidan) =====
+def sales_report(start, end, granularity=SalesRollup.DAY, category_ids=None, limit=20):
+    """
+    ``[start, end)`` oralig‘i uchun: vaqt qatori (jami), top productlar va kategoriyalar.
+    ``category_ids`` berilsa faqat shu kategoriyalar productlari (vaqt qatori ham ular bo‘yicha;
+    bunda ``orders`` — product qatorlari soni, bir buyurtmadagi ikki product ikki marta sanaladi).
+    """
+    rollups = SalesRollup.objects.filter(granularity=granularity, bucket__gte=start, bucket__lt=end)
+    sums = {measure: Sum(measure) for measure in MEASURES}
+
+    products = rollups.exclude(product_id=TOTAL_PRODUCT_ID)
+    if category_ids is not None:
+        products = products.filter(category_id__in=category_ids)
+        series_source = products
+    else:
+        series_source = rollups.filter(product_id=TOTAL_PRODUCT_ID)
+
+    series = list(series_source.values('bucket').annotate(**sums).order_by('bucket'))
+    totals = series_source.aggregate(**sums)
+    top_products = list(
+        products.values('product_id').annotate(product_name=Max('product_name'), **sums).order_by('-revenue')[:limit]
+    )
+    by_category = list(products.values('category_id').annotate(**sums).order_by('-revenue'))
+
+    return {
+        'series': series,
+        'totals': {measure: totals[measure] or 0 for measure in MEASURES},
+        'top_products': top_products,
+        'by_category': by_category,
+    }
+
@@ -0,0 +1,146 @@
+import csv
+import json
+import re
+from itertools import islice
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from shop.category_tree import get_category_tree
+from .analytics import load_order_lines
+
+# Server-side cursor dan bir marta olinadigan qatorlar soni (xotira shu bilan cheklanadi)
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_FORMATS = ('csv', 'jsonl')
+# Shu belgilardan boshlangan katak Excel/LibreOffice da formula bo‘lib ishlaydi (CSV injection)
+CSV_FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+# Telefon (+998 90 123-45-67) va manfiy sonlar formula emas — "'" qo‘shilsa buziladi
+CSV_PLAIN_NUMBER = re.compile(r'\+?[\d\s()-]+')
+
+
+class Echo:
+    """csv.writer uchun "fayl": yozilgan qatorni qaytaradi (buferlamaydi)."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_stream(header, rows):
+    writer = csv.writer(Echo())
+    yield '\ufeff'  # Excel UTF-8 ni to‘g‘ri ochishi uchun BOM
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def _jsonl_stream(objects):
+    for obj in objects:
+        yield json.dumps(obj, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def export_response(name, fmt, header, records):
+    """
+    ``records`` — dict lar generatori. CSV da ``header`` kalitlari tartibida ustunlar,
+    JSONL da har bir dict bitta qator. Javob oqim bilan yuboriladi (butun fayl xotirada yig‘ilmaydi).
+    """
+    if fmt == 'jsonl':
+        content, content_type = _jsonl_stream(records), 'application/x-ndjson; charset=utf-8'
+    else:
+        fmt = 'csv'
+        rows = ([_csv_value(record.get(key)) for key in header] for record in records)
+        content, content_type = _csv_stream(header, rows), 'text/csv; charset=utf-8'
+
+    filename = f"{name}_{timezone.localtime():%Y%m%d_%H%M%S}.{fmt}"
+    response = StreamingHttpResponse(content, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def _csv_value(value):
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    if value is None:
+        return ''
+    if isinstance(value, str) and value.startswith(CSV_FORMULA_PREFIXES) and not CSV_PLAIN_NUMBER.fullmatch(value):
+        # Sharh, ism, manzil — xaridordan keladi; "'" bilan matn sifatida ochiladi
+        return "'" + value
+    return value
+
+
+# ===== Orders =====
+ORDER_HEADER = [
+    'order_id', 'created_at', 'status', 'username', 'full_name', 'phone', 'address', 'total_price',
+    'product_id', 'product_name', 'quantity', 'price',
+]
+
+
+def order_records(orders, fmt):
+    """
+    CSV: har bir buyurtma qatori (``OrderItem``) uchun bitta qator. JSONL: buyurtma + ``lines`` ro‘yxati.
+    Qatorlar har ``EXPORT_CHUNK_SIZE`` ta buyurtma uchun bitta so‘rov bilan olinadi.
+    """
+    orders = orders.select_related('user').only(
+        'id', 'created_at', 'status', 'full_name', 'phone', 'address', 'total_price', 'user__username',
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+    for chunk in _chunks(orders, EXPORT_CHUNK_SIZE):
+        lines = load_order_lines(chunk)
+        for order in chunk:
+            base = {
+                'order_id': order.id,
+                'created_at': timezone.localtime(order.created_at).isoformat(),
+                'status': order.status,
+                'username': order.user.username,
+                'full_name': order.full_name,
+                'phone': order.phone,
+                'address': order.address,
+                'total_price': order.total_price,
+            }
+            order_lines = [
+                {'product_id': pid, 'product_name': name, 'quantity': qty, 'price': price}
+                for pid, name, qty, price in lines.get(order.id, ())
+            ]
+            if fmt == 'jsonl':
+                yield {**base, 'lines': order_lines}
+            else:
+                for line in order_lines or [{}]:
+                    yield {**base, **line}
+
+
+# ===== Products =====
+PRODUCT_HEADER = [
+    'id', 'name', 'slug', 'category_id', 'category', 'price', 'discount_price', 'stock', 'is_active',
+    'average_rating', 'review_count', 'created_at', 'description', 'extra_data',
+]
+
+
+def product_records(products):
+    tree = get_category_tree()
+    fields = [f for f in PRODUCT_HEADER if f != 'category']
+    for row in products.order_by('id').values(*fields).iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        node = tree.get(row['category_id'])
+        # Kategoriya to‘liq yo‘li ("Elektronika / Telefonlar") — JOIN siz, cache dagi daraxtdan
+        row['category'] = ' / '.join(n.name for n in tree.ancestors(node.id)) if node else ''
+        row['created_at'] = timezone.localtime(row['created_at']).isoformat()
+        yield row
+
+
+# ===== Reviews =====
+REVIEW_HEADER = ['id', 'created_at', 'product_id', 'product_name', 'user_id', 'username', 'stars_given', 'comment']
+
+
+def review_records(reviews):
+    rows = reviews.order_by('-created_at', '-id').values_list(
+        'id', 'created_at', 'product_id', 'product__name', 'user_id', 'user__username', 'stars_given', 'comment',
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    for row in rows:
+        record = dict(zip(REVIEW_HEADER, row))
+        record['created_at'] = timezone.localtime(record['created_at']).isoformat()
+        yield record
@@ -0,0 +1,94 @@
+from datetime import datetime
+
+from django.db.models import Q
+from django.utils import timezone
+
+from shop.models import LOW_STOCK_THRESHOLD
+from user.models import CustomUser
+
+
+# Ro‘yxat sahifalari va eksportlar bir xil GET parametrlari bilan bir xil natija berishi uchun
+def filter_products(products, params):
+    """products_list filtrlari: category, is_active, stock (0/1/low), min/max_price (chegirmali narx), search."""
+    category = params.get('category')
+    is_active = params.get('is_active')
+    stock = params.get('stock')
+    min_price = params.get('min_price')
+    max_price = params.get('max_price')
+    search = params.get('search')
+
+    if category:
+        products = products.filter(category_id=category)
+    if is_active in ['0', '1']:
+        products = products.filter(is_active=bool(int(is_active)))
+    if stock == '0':
+        products = products.filter(stock=0)
+    elif stock == '1':
+        products = products.filter(stock__gt=0)
+    elif stock == 'low':
+        products = products.filter(is_active=True, stock__lte=LOW_STOCK_THRESHOLD)
+    if min_price:
+        products = products.filter(effective_price__gte=min_price)
+    if max_price:
+        products = products.filter(effective_price__lte=max_price)
+    if search:
+        products = products.filter(name__icontains=search)
+    return products
+
+
+def filter_orders(orders, query='', status=''):
+    """Admin buyurtmalar qidiruvi: raqam bo‘lsa ID bo‘yicha aniq, aks holda trigram indekslar bo‘yicha."""
+    if status:
+        orders = orders.filter(status=status)
+
+    query = query.strip()
+    if not query:
+        return orders
+
+    order_id = query.lstrip('#')
+    if order_id.isdigit() and len(order_id) <= 18:
+        # id__icontains PK ni text ga cast qilib indeksni o‘ldiradi — aniq tenglik ishlatamiz.
+        # Raqam telefonning bir qismi ham bo‘lishi mumkin.
+        return orders.filter(Q(id=int(order_id)) | Q(phone__icontains=order_id))
+
+    # JOIN orqali OR qilinsa planner indekslarni ishlata olmaydi — user id lar subquery dan
+    # (user_id IN (SELECT id ... ILIKE)): limit siz va alohida so‘rovsiz
+    users = CustomUser.objects.filter(username__icontains=query).values('id')
+    return orders.filter(
+        Q(user__in=users) | Q(full_name__icontains=query) | Q(phone__icontains=query)
+    )
+
+
+def filter_reviews(reviews, params):
+    """reviews_list filtrlari: product, user, stars, from, to (YYYY-MM-DD), search."""
+    product = params.get('product')
+    user = params.get('user')
+    stars = params.get('stars')
+    date_from = params.get('from')
+    date_to = params.get('to')
+    search = params.get('search')
+
+    if product and product.isdigit():
+        reviews = reviews.filter(product_id=product)
+
+    if user and user.isdigit():
+        reviews = reviews.filter(user_id=user)
+
+    if stars:
+        reviews = reviews.filter(stars_given=stars)
+
+    if date_from:
+        reviews = reviews.filter(created_at__gte=date_from)
+
+    if date_to:
+        try:
+            date_to_full = datetime.strptime(date_to, "%Y-%m-%d")
+        except ValueError:
+            date_to_full = None
+        if date_to_full is not None:
+            date_to_full = timezone.make_aware(date_to_full.replace(hour=23, minute=59))
+            reviews = reviews.filter(created_at__lte=date_to_full)
+
+    if search:
+        reviews = reviews.filter(comment__icontains=search)
+    return reviews
@@ -27,6 +27,34 @@ class ProductForm(forms.ModelForm):
 
 
 
+# ================= ProductImportForm =================
+class ProductImportForm(ProductForm):
+    """
+    Bulk import qatori: ProductForm qoidalari, lekin category (yo‘l bo‘yicha alohida topiladi)
+    va fayl yuklash maydonlarisiz. Slug unikalligi upsert da hal bo‘ladi — har qatorga SQL yo‘q.
+    """
+
+    class Meta(ProductForm.Meta):
+        fields = ["name", "slug", "description", "price", "discount_price", "stock", "is_active", "extra_data"]
+
+    def clean_extra_data(self):
+        return self.cleaned_data.get("extra_data") or {}
+
+    def validate_unique(self):
+        pass
+
+
+class ProductImportFileForm(forms.Form):
+    file = forms.FileField(help_text="CSV (header bilan) yoki JSONL, UTF-8")
+    dry_run = forms.BooleanField(required=False, label="Faqat tekshirish (saqlamasdan)")
+
+    def clean_file(self):
+        file = self.cleaned_data["file"]
+        if not file.name.lower().endswith((".csv", ".jsonl")):
+            raise forms.ValidationError("Faqat .csv yoki .jsonl fayl.")
+        return file
+
+
 
 # ================= ProductImageForm =================
 class ProductImageForm(forms.ModelForm):
@@ -0,0 +1,234 @@
+import csv
+import io
+import json
+from collections import defaultdict
+from dataclasses import dataclass, field
+from itertools import islice
+
+from django.db import transaction
+
+from shop.category_tree import get_category_tree
+from shop.facets import invalidate_facets
+from shop.models import Product
+from shop.search import update_search_vectors
+from shop.slugs import allocate_slugs
+from .forms import ProductImportForm
+from .stats import invalidate_dashboard_stats
+
+IMPORT_BATCH_SIZE = 1000
+IMPORT_FORMATS = ('csv', 'jsonl')
+# Hisobotda saqlanadigan xatolar soni (50k qatorli faylda hammasi xotirada turmasin)
+IMPORT_MAX_ERRORS = 1000
+
+# Ustun umuman berilmagan (yoki bo‘sh) bo‘lsa ishlatiladigan qiymatlar
+IMPORT_DEFAULTS = {'is_active': True, 'stock': 0}
+# Upsert da mavjud product ning shu maydonlari yangilanadi (created_at, reytinglar tegilmaydi).
+# Qatorda ustuni (JSONL da kaliti) yo‘q maydonlar yangilanmaydi — masalan, slug,price,stock li feed:
+# name, category va boshqalar validatsiya uchun bazadagi qatordan olinadi. Yangi productga
+# name, price va category majburiy.
+IMPORT_UPDATE_FIELDS = [
+    'name', 'description', 'price', 'discount_price', 'stock', 'category', 'is_active', 'extra_data',
+]
+# Mavjud productdan o‘qiladigan maydonlar (``IMPORT_UPDATE_FIELDS`` ning ustun nomlari)
+IMPORT_CURRENT_FIELDS = [name for name in IMPORT_UPDATE_FIELDS if name != 'category'] + ['category_id']
+
+
+@dataclass
+class ImportReport:
+    created: int = 0
+    updated: int = 0
+    skipped: int = 0
+    errors: list = field(default_factory=list)  # [(qator raqami, xabar), ...]
+    dry_run: bool = False
+
+    def add_error(self, line, message):
+        self.skipped += 1
+        if len(self.errors) < IMPORT_MAX_ERRORS:
+            self.errors.append((line, message))
+
+    @property
+    def total(self):
+        return self.created + self.updated + self.skipped
+
+
+# ===== O‘qish =====
+def read_rows(file, fmt):
+    """``(qator raqami, dict)`` generatori. ``file`` — binary fayl (upload yoki ``open(..., 'rb')``)."""
+    text = io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+    if fmt == 'jsonl':
+        for line_no, line in enumerate(text, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_no, ValueError(f"JSON xato: {e.msg}")
+                continue
+            yield line_no, row if isinstance(row, dict) else ValueError("Qator JSON obyekt bo‘lishi kerak")
+    else:
+        reader = csv.DictReader(text)
+        for row in reader:
+            yield reader.line_num, row
+
+
+def detect_format(filename):
+    return 'jsonl' if filename.lower().endswith('.jsonl') else 'csv'
+
+
+# ===== Kategoriya =====
+class CategoryResolver:
+    """
+    Kategoriyani cache dagi daraxtdan topadi (har qatorga SQL yo‘q):
+    to‘liq yo‘l ("Elektronika / Telefonlar"), nom (nomlar unikal) yoki ``category_id``.
+    """
+
+    def __init__(self):
+        self.tree = get_category_tree()
+        self.by_path = {}
+        self.by_name = {}
+        for node in self.tree.walk():
+            path = ' / '.join(n.name for n in self.tree.ancestors(node.id))
+            self.by_path[path.casefold()] = node.id
+            self.by_name[node.name.casefold()] = node.id
+
+    def resolve(self, row):
+        value = str(row.get('category') or '').strip()
+        if value:
+            if '/' in value:
+                path = ' / '.join(part.strip() for part in value.split('/'))
+                return self.by_path.get(path.casefold())
+            return self.by_name.get(value.casefold())
+
+        category_id = str(row.get('category_id') or '').strip()
+        if category_id.isdigit() and self.tree.get(int(category_id)):
+            return int(category_id)
+        return None
+
+
+# ===== Validatsiya =====
+def row_slug(row):
+    return str(row.get('slug') or '').strip()
+
+
+def row_update_fields(row):
+    """Qatordagi ustunlardan upsert da yangilanadigan maydonlar (tartib ``IMPORT_UPDATE_FIELDS`` dagidek)."""
+    keys = {key for key in row if key}
+    if 'category_id' in keys:
+        keys.add('category')
+    return tuple(name for name in IMPORT_UPDATE_FIELDS if name in keys) + ('updated_at',)
+
+
+def build_product(row, resolver, current=None):
+    """
+    Qatorni ProductImportForm bilan tekshiradi. ``(Product, None)`` yoki ``(None, xato matni)``.
+    ``current`` — slug i bazada bor product qiymatlari: qatorda yo‘q maydonlar shundan olinadi.
+    """
+    data = {key: value for key, value in row.items() if key}
+    if current is not None:
+        data = {**current, **data}
+    for key, default in IMPORT_DEFAULTS.items():
+        if data.get(key) in (None, ''):
+            data[key] = default
+    if isinstance(data.get('extra_data'), (dict, list)):
+        data['extra_data'] = json.dumps(data['extra_data'], ensure_ascii=False)
+
+    form = ProductImportForm(data)
+    category_id = resolver.resolve(data)
+    if not form.is_valid() or category_id is None:
+        errors = [
+            f"{name}: {' '.join(messages)}" if name != '__all__' else ' '.join(messages)
+            for name, messages in form.errors.items()
+        ]
+        if category_id is None:
+            errors.append(f"category: topilmadi ({data.get('category') or data.get('category_id') or '—'})")
+        return None, '; '.join(errors)
+
+    product = form.save(commit=False)
+    product.category_id = category_id
+    return product, None
+
+
+# ===== Import =====
+def import_products(rows, batch_size=IMPORT_BATCH_SIZE, dry_run=False):
+    """
+    ``rows`` — ``read_rows`` generatori. Har ``batch_size`` ta to‘g‘ri qator bitta
+    ``bulk_create(update_conflicts=True)`` (slug bo‘yicha upsert) bilan, o‘z tranzaksiyasida yoziladi;
+    xato qatorlar o‘tkazib yuboriladi va ``ImportReport.errors`` ga tushadi.
+    """
+    report = ImportReport(dry_run=dry_run)
+    resolver = CategoryResolver()
+    seen_slugs = {}
+    touched_categories = set()
+    rows = iter(rows)
+
+    while batch := list(islice(rows, batch_size)):
+        slugs = {row_slug(row) for _, row in batch if not isinstance(row, Exception)} - {''}
+        existing = {
+            values.pop('slug'): values
+            for values in Product.objects.filter(slug__in=slugs).values('slug', *IMPORT_CURRENT_FIELDS)
+        }
+
+        valid = []
+        for line, row in batch:
+            if isinstance(row, Exception):
+                report.add_error(line, str(row))
+                continue
+            product, error = build_product(row, resolver, existing.get(row_slug(row)))
+            if error is not None:
+                report.add_error(line, error)
+                continue
+            valid.append((line, row, product))
+
+        # Slug i berilmagan qatorlar — yangi productlar; slug lar butun batch uchun birdaniga ajratiladi
+        unnamed = [product for _, _, product in valid if not product.slug]
+        if unnamed:
+            reserved = seen_slugs.keys() | {product.slug for _, _, product in valid if product.slug}
+            slugs = allocate_slugs(Product.objects.all(), [product.name for product in unnamed], reserved)
+            for product, slug in zip(unnamed, slugs):
+                product.slug = slug
+
+        products = []
+        for line, row, product in valid:
+            if product.slug in seen_slugs:
+                report.add_error(line, f"slug: '{product.slug}' faylda takrorlangan ({seen_slugs[product.slug]}-qator)")
+                continue
+            seen_slugs[product.slug] = line
+            products.append((product, row_update_fields(row)))
+
+        if products:
+            touched_categories |= _save_batch(products, existing, report, dry_run)
+
+    if not dry_run and (report.created or report.updated):
+        invalidate_dashboard_stats()
+        # bulk_create signal yubormaydi — eski va yangi kategoriyalar facet lari
+        invalidate_facets(touched_categories)
+    return report
+
+
+def _save_batch(products, existing, report, dry_run):
+    """
+    ``products`` — ``(Product, update_fields)`` juftlari. Ustunlari bir xil qatorlar bitta upsert
+    bilan yoziladi (JSONL da kalitlari har xil qatorlar bir-birining maydonlarini bo‘sh qiymat bilan
+    ustidan yozmasin). Ta'sirlangan (eski va yangi) kategoriya id larini qaytaradi.
+    """
+    updated = [existing[product.slug] for product, _ in products if product.slug in existing]
+    report.updated += len(updated)
+    report.created += len(products) - len(updated)
+    if dry_run:
+        return set()
+
+    groups = defaultdict(list)
+    for product, update_fields in products:
+        groups[update_fields].append(product)
+
+    with transaction.atomic():
+        for update_fields, group in groups.items():
+            Product.objects.bulk_create(
+                group,
+                update_conflicts=True,
+                unique_fields=['slug'],
+                update_fields=list(update_fields),
+            )
+        # bulk_create save() ni chaqirmaydi — qidiruv vektori bitta UPDATE bilan
+        update_search_vectors(Product.objects.filter(id__in=[product.pk for product, _ in products]))
+    return {values['category_id'] for values in updated} | {product.category_id for product, _ in products}
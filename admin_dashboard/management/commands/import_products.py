@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from admin_dashboard.imports import IMPORT_BATCH_SIZE, IMPORT_FORMATS, detect_format, import_products, read_rows
+
+
+class Command(BaseCommand):
+    help = "Productlarni CSV/JSONL fayldan slug bo‘yicha upsert qiladi (bulk_create, batch lab)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=IMPORT_FORMATS, help="Default: fayl kengaytmasidan")
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help="Faqat tekshirish, bazaga yozmaslik")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or detect_format(path)
+        try:
+            file = open(path, 'rb')
+        except OSError as e:
+            raise CommandError(f"Faylni ochib bo‘lmadi: {e}")
+
+        with file:
+            report = import_products(read_rows(file, fmt), batch_size=options['batch_size'], dry_run=options['dry_run'])
+
+        for line, message in report.errors:
+            self.stderr.write(f"{line}-qator: {message}")
+        if len(report.errors) < report.skipped:
+            self.stderr.write(f"... yana {report.skipped - len(report.errors)} ta xato")
+
+        prefix = "[dry-run] " if report.dry_run else ""
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix}{report.created} ta yangi, {report.updated} ta yangilandi, {report.skipped} ta xato."
+        ))
@@ -0,0 +1,21 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from admin_dashboard.analytics import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "Sotuv rollup larini (soatlik/kunlik) buyurtmalardan qayta hisoblaydi"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help="Faqat oxirgi N kun (default: hammasi)")
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        since = None
+        if options['days']:
+            since = timezone.now() - timedelta(days=options['days'] - 1)
+        processed = rebuild_rollups(since=since, chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f"{processed} ta buyurtma rollup larga yozildi."))
@@ -0,0 +1,23 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from admin_dashboard.stats import rebuild_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Dashboard hisoblagichlari (status bo‘yicha buyurtmalar, kunlik rollup) ni qayta hisoblaydi. "
+        "Cron dan davriy ishga tushiring: bulk_create / update() signal larsiz o‘tadi."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help="Kunlik rollup faqat oxirgi N kun uchun (default: hammasi)")
+
+    def handle(self, *args, **options):
+        since = None
+        if options['days']:
+            since = timezone.localdate() - timedelta(days=options['days'] - 1)
+        days = rebuild_stats(since=since)
+        self.stdout.write(self.style.SUCCESS(f"Dashboard statistikasi yangilandi ({days} kun)."))
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.8 on 2026-10-18 15:12
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+
+def populate_stats(apps, schema_editor):
+    Order = apps.get_model('shop', 'Order')
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    OrderStatusCount = apps.get_model('admin_dashboard', 'OrderStatusCount')
+    DailyStats = apps.get_model('admin_dashboard', 'DailyStats')
+
+    OrderStatusCount.objects.bulk_create([
+        OrderStatusCount(status=row['status'], count=row['count'])
+        for row in Order.objects.order_by().values('status').annotate(count=Count('id'))
+    ])
+
+    daily = {}
+    for row in Order.objects.order_by().annotate(day=TruncDate('created_at')).values('day').annotate(
+        orders=Count('id'), revenue=Sum('total_price')
+    ):
+        daily[row['day']] = DailyStats(date=row['day'], orders=row['orders'], revenue=row['revenue'])
+    for row in User.objects.order_by().annotate(day=TruncDate('date_joined')).values('day').annotate(n=Count('id')):
+        daily.setdefault(row['day'], DailyStats(date=row['day'])).new_users = row['n']
+    DailyStats.objects.bulk_create(daily.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('shop', '0006_product_low_stock_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('orders', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('new_users', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Daily stats',
+                'ordering': ['-date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='OrderStatusCount',
+            fields=[
+                ('status', models.CharField(max_length=20, primary_key=True, serialize=False)),
+                ('count', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(populate_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.8 on 2026-10-18 15:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_dashboard', '0001_dashboard_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularity', models.CharField(choices=[('hour', 'Hour'), ('day', 'Day')], max_length=4)),
+                ('bucket', models.DateTimeField()),
+                ('product_id', models.BigIntegerField()),
+                ('category_id', models.BigIntegerField(blank=True, null=True)),
+                ('product_name', models.CharField(blank=True, max_length=255)),
+                ('orders', models.IntegerField(default=0)),
+                ('units', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('fulfilled_orders', models.IntegerField(default=0)),
+                ('fulfilled_units', models.IntegerField(default=0)),
+                ('fulfilled_revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['granularity', 'category_id', 'bucket'], name='salesrollup_category_idx')],
+                'constraints': [models.UniqueConstraint(fields=('granularity', 'bucket', 'product_id'), name='salesrollup_unique_bucket')],
+            },
+        ),
+    ]
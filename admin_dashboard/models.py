@@ -1,3 +1,68 @@
 from django.db import models
 
 # Create your models here.
+
+
+class OrderStatusCount(models.Model):
+    """Status bo‘yicha buyurtmalar soni (signal lar bilan inkremental yangilanadi)."""
+
+    status = models.CharField(max_length=20, primary_key=True)
+    count = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.status}: {self.count}"
+
+
+class DailyStats(models.Model):
+    """Kunlik rollup: buyurtmalar, tushum va yangi userlar (Asia/Tashkent sanasi bo‘yicha)."""
+
+    date = models.DateField(unique=True)
+    orders = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    new_users = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = 'Daily stats'
+        ordering = ['-date']
+
+    def __str__(self):
+        return f"{self.date}: {self.orders} orders"
+
+
+class SalesRollup(models.Model):
+    """
+    Soatlik/kunlik sotuv rollup i (product bo‘yicha). Hisobotlar faqat shu jadvaldan o‘qiydi.
+    ``product_id=0`` qatori — bucket dagi jami (bir nechta productli buyurtma bir marta sanaladi).
+    Product o‘chirilsa ham tarix qolishi uchun FK emas, nomi nusxalanadi.
+    """
+
+    HOUR = 'hour'
+    DAY = 'day'
+    GRANULARITY_CHOICES = [(HOUR, 'Hour'), (DAY, 'Day')]
+
+    granularity = models.CharField(max_length=4, choices=GRANULARITY_CHOICES)
+    bucket = models.DateTimeField()  # soat/kun boshi (Asia/Tashkent)
+    product_id = models.BigIntegerField()
+    category_id = models.BigIntegerField(null=True, blank=True)
+    product_name = models.CharField(max_length=255, blank=True)
+
+    # Joylashtirilgan buyurtmalar (checkout)
+    orders = models.IntegerField(default=0)
+    units = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    # Yetkazilganlar (status o‘zgarishi bilan ko‘chadi)
+    fulfilled_orders = models.IntegerField(default=0)
+    fulfilled_units = models.IntegerField(default=0)
+    fulfilled_revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['granularity', 'bucket', 'product_id'], name='salesrollup_unique_bucket'),
+        ]
+        indexes = [
+            models.Index(fields=['granularity', 'category_id', 'bucket'], name='salesrollup_category_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.granularity} {self.bucket:%Y-%m-%d %H:%M} #{self.product_id}"
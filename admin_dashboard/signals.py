@@ -0,0 +1,53 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from shop.models import Order
+from user.models import CustomUser
+from . import analytics, tasks
+
+
+# Hisoblagichlar va rollup lar fon vazifasida (commit dan keyin navbatga qo‘yiladi): checkout
+# tranzaksiyasi umumiy DailyStats qatorini lock qilib turmasin va javob kutib qolmasin
+@receiver(post_save, sender=Order)
+def order_saved(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_loaded_status', None)
+    instance._loaded_status = instance.status
+    if created:
+        # OrderItem lar order dan keyin yoziladi — qatorlar commit dan keyin olinib vazifaga beriladi
+        order_id, status, total_price, created_at = instance.id, instance.status, instance.total_price, instance.created_at
+        transaction.on_commit(lambda: tasks.record_order_created.delay(
+            order_id, status, total_price, created_at, analytics.load_order_lines([instance]).get(order_id, []),
+        ))
+    elif previous is not None and previous != instance.status:
+        # Bazadan o‘qilmagan obyekt uchun eski status noma'lum — refresh_dashboard_stats tuzatadi.
+        # Qatorlar faqat rollup ning fulfilled_* ustunlari o‘zgarganda kerak
+        lines = []
+        if analytics.fulfilment_changed(previous, instance.status):
+            lines = analytics.load_order_lines([instance]).get(instance.id, [])
+        tasks.record_order_status_change.delay(instance.id, previous, instance.status, instance.created_at, lines)
+
+
+@receiver(pre_delete, sender=Order)
+def order_deleting(sender, instance, **kwargs):
+    # OrderItem lar cascade bilan o‘chmasdan oldin rollup dan ayiriladigan qatorlarni olib qo‘yamiz
+    instance._deleted_lines = analytics.load_order_lines([instance]).get(instance.id, [])
+
+
+@receiver(post_delete, sender=Order)
+def order_deleted(sender, instance, **kwargs):
+    status = getattr(instance, '_loaded_status', instance.status)
+    tasks.record_order_deleted.delay(
+        instance.id, status, instance.total_price, instance.created_at, getattr(instance, '_deleted_lines', []),
+    )
+
+
+@receiver(post_save, sender=CustomUser)
+def user_saved(sender, instance, created, **kwargs):
+    if created:
+        tasks.record_user_joined.delay(instance.date_joined)
+
+
+@receiver(post_delete, sender=CustomUser)
+def user_deleted(sender, instance, **kwargs):
+    tasks.record_user_deleted.delay(instance.date_joined)
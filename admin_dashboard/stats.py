@@ -0,0 +1,163 @@
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, F, Sum, Value
+from django.db.models.functions import Greatest, TruncDate
+from django.utils import timezone
+
+from shop.category_tree import get_category_tree
+from shop.models import LOW_STOCK_THRESHOLD, Order, Product
+from user.models import CustomUser
+from .models import DailyStats, OrderStatusCount
+
+STATS_CACHE_KEY = 'admin_dashboard:stats'
+STATS_CACHE_TTL = 60
+DAILY_STATS_DAYS = 14
+
+# reltuples shundan kichik bo‘lsa (yoki jadval hali ANALYZE qilinmagan bo‘lsa) aniq COUNT(*) ishlatiladi
+APPROXIMATE_COUNT_MIN = 100_000
+
+
+def approximate_count(model):
+    """
+    Katta jadvallar uchun ``pg_class.reltuples`` (ANALYZE/autovacuum dagi taxmin, so‘rov ~0ms).
+    Kichik jadvallarda va PostgreSQL bo‘lmagan bazada oddiy ``COUNT(*)``.
+    """
+    if connection.vendor == 'postgresql' and getattr(settings, 'DASHBOARD_APPROXIMATE_COUNTS', True):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)",
+                [model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        if row and row[0] >= APPROXIMATE_COUNT_MIN:
+            return row[0]
+    return model.objects.count()
+
+
+# ===== Inkremental yangilash (signal lar) =====
+def _increment(model, lookup, **deltas):
+    """``lookup`` qatoridagi maydonlarni atomik oshiradi/kamaytiradi; qator yo‘q bo‘lsa yaratadi."""
+    changes = {
+        field: Greatest(F(field) + delta, Value(0, output_field=model._meta.get_field(field)))
+        for field, delta in deltas.items()
+    }
+    if model.objects.filter(**lookup).update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**lookup, **{field: max(delta, 0) for field, delta in deltas.items()})
+    except IntegrityError:
+        # Parallel so‘rov qatorni birinchi yaratib ulgurdi
+        model.objects.filter(**lookup).update(**changes)
+
+
+def record_order_created(status, total_price, created_at):
+    _increment(OrderStatusCount, {'status': status}, count=1)
+    _increment(DailyStats, {'date': timezone.localdate(created_at)}, orders=1, revenue=total_price)
+
+
+def record_order_deleted(status, total_price, created_at):
+    _increment(OrderStatusCount, {'status': status}, count=-1)
+    _increment(DailyStats, {'date': timezone.localdate(created_at)}, orders=-1, revenue=-total_price)
+
+
+def record_order_status_change(old_status, new_status):
+    _increment(OrderStatusCount, {'status': old_status}, count=-1)
+    _increment(OrderStatusCount, {'status': new_status}, count=1)
+
+
+def record_user_joined(date_joined):
+    _increment(DailyStats, {'date': timezone.localdate(date_joined)}, new_users=1)
+
+
+def record_user_deleted(date_joined):
+    _increment(DailyStats, {'date': timezone.localdate(date_joined)}, new_users=-1)
+
+
+# ===== To‘liq qayta hisoblash (periodik job) =====
+def rebuild_stats(since=None):
+    """
+    Hisoblagichlarni Order/CustomUser jadvallaridan qayta quradi. ``bulk_create`` / ``update()``
+    signal larsiz o‘tgani uchun cron dan davriy ishga tushiriladi (``refresh_dashboard_stats``).
+    ``since`` (date) berilsa kunlik rollup faqat shu sanadan boshlab qayta hisoblanadi.
+    """
+    orders = Order.objects.order_by()
+    users = CustomUser.objects.order_by()
+    if since is not None:
+        # __date lookup indeksni ishlatmaydi — lokal kun boshidan oraliq bilan filtrlaymiz
+        start = timezone.make_aware(datetime.combine(since, time.min))
+        orders = orders.filter(created_at__gte=start)
+        users = users.filter(date_joined__gte=start)
+
+    daily = {}
+    for row in orders.annotate(day=TruncDate('created_at')).values('day').annotate(
+        orders=Count('id'), revenue=Sum('total_price')
+    ):
+        daily[row['day']] = DailyStats(date=row['day'], orders=row['orders'], revenue=row['revenue'])
+    for row in users.annotate(day=TruncDate('date_joined')).values('day').annotate(new_users=Count('id')):
+        daily.setdefault(row['day'], DailyStats(date=row['day'])).new_users = row['new_users']
+
+    status_counts = Order.objects.order_by().values('status').annotate(count=Count('id'))
+
+    with transaction.atomic():
+        OrderStatusCount.objects.all().delete()
+        OrderStatusCount.objects.bulk_create([
+            OrderStatusCount(status=row['status'], count=row['count']) for row in status_counts
+        ])
+
+        stale = DailyStats.objects.all()
+        if since is not None:
+            stale = stale.filter(date__gte=since)
+        stale.delete()
+        DailyStats.objects.bulk_create(daily.values(), batch_size=1000)
+
+    invalidate_dashboard_stats()
+    return len(daily)
+
+
+# ===== O‘qish (cache) =====
+def _compute_stats():
+    status_counts = dict(OrderStatusCount.objects.values_list('status', 'count'))
+
+    today = timezone.localdate()
+    first_day = today - timedelta(days=DAILY_STATS_DAYS - 1)
+    rows = {row.date: row for row in DailyStats.objects.filter(date__gte=first_day)}
+    daily = []
+    for offset in range(DAILY_STATS_DAYS):
+        day = first_day + timedelta(days=offset)
+        row = rows.get(day) or DailyStats(date=day)
+        daily.append({'date': day, 'orders': row.orders, 'revenue': row.revenue, 'new_users': row.new_users})
+
+    return {
+        'product_count': approximate_count(Product),
+        'user_count': approximate_count(CustomUser),
+        'category_count': len(get_category_tree().nodes),
+        'order_count': sum(status_counts.values()),
+        'orders_by_status': [
+            {'status': value, 'label': label, 'count': status_counts.get(value, 0)}
+            for value, label in Order.STATUS_CHOICES
+        ],
+        'low_stock_count': Product.objects.filter(is_active=True, stock__lte=LOW_STOCK_THRESHOLD).count(),
+        'low_stock_threshold': LOW_STOCK_THRESHOLD,
+        'daily': daily,
+        'today': daily[-1],
+        'period_orders': sum(day['orders'] for day in daily),
+        'period_revenue': sum(day['revenue'] for day in daily),
+        'generated_at': timezone.now(),
+    }
+
+
+def get_dashboard_stats():
+    """Dashboard statistikasi; ``STATS_CACHE_TTL`` sekund cache lanadi."""
+    stats = cache.get(STATS_CACHE_KEY)
+    if stats is None:
+        stats = _compute_stats()
+        cache.set(STATS_CACHE_KEY, stats, STATS_CACHE_TTL)
+    return stats
+
+
+def invalidate_dashboard_stats():
+    cache.delete(STATS_CACHE_KEY)
@@ -0,0 +1,54 @@
+from decimal import Decimal
+
+from django.utils.dateparse import parse_datetime
+
+from shop.models import Order
+from tasks.queue import task
+from . import analytics, stats
+
+# Signal lardan (admin_dashboard.signals) commit dan keyin navbatga qo‘yiladi; hisoblagichlar va
+# rollup lar bitta vazifada — bitta tranzaksiyada yangilanadi. Buyurtma holati (status, created_at,
+# qatorlar) argumentlarda keladi — bazadan qayta o‘qilmaydi.
+# Argumentlar JSON dan keladi: Decimal/datetime string ko‘rinishida.
+
+
+def _order(order_id, status, created_at):
+    return Order(id=order_id, status=status, created_at=parse_datetime(created_at))
+
+
+def _lines(order_id, lines):
+    return {order_id: [(pid, name, qty, Decimal(price)) for pid, name, qty, price in lines]}
+
+
+@task()
+def record_order_created(order_id, status, total_price, created_at, lines):
+    """``lines`` — commit dan keyin olingan qatorlar (order o‘chirilgan bo‘lsa ham ayirish bilan mos)."""
+    order = _order(order_id, status, created_at)
+    stats.record_order_created(status, Decimal(total_price), order.created_at)
+    analytics.record_order_placed(order, _lines(order_id, lines))
+
+
+@task()
+def record_order_status_change(order_id, old_status, new_status, created_at, lines):
+    stats.record_order_status_change(old_status, new_status)
+    analytics.record_order_status_change(
+        _order(order_id, new_status, created_at), _lines(order_id, lines), old_status, new_status,
+    )
+
+
+@task()
+def record_order_deleted(order_id, status, total_price, created_at, lines):
+    """``lines`` — ``pre_delete`` da olingan qatorlar (o‘chirilgandan keyin OrderItem lar yo‘q)."""
+    order = _order(order_id, status, created_at)
+    stats.record_order_deleted(status, Decimal(total_price), order.created_at)
+    analytics.record_order_removed(order, _lines(order_id, lines))
+
+
+@task()
+def record_user_joined(date_joined):
+    stats.record_user_joined(parse_datetime(date_joined))
+
+
+@task()
+def record_user_deleted(date_joined):
+    stats.record_user_deleted(parse_datetime(date_joined))
@@ -1,3 +1,457 @@
-from django.test import TestCase
+import csv
+import io
+import json
+from datetime import timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from django.db.models import F, Sum
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from shop.models import Order, OrderItem, Product, ProductReview
+from shop.checkout import place_order
+from shop.testing import QueryBudgetMixin, ShopDataMixin
+from tasks.queue import claim_tasks, run_task
+from user.models import CustomUser
+from .analytics import TOTAL_PRODUCT_ID, bucket_start, rebuild_rollups, sales_report
+from .filters import filter_orders
+from .imports import import_products, read_rows
+from .models import DailyStats, SalesRollup
+from .stats import rebuild_stats
+from .views import ORDERS_PER_PAGE
+
+
+# ===== Query budget lar =====
+class DashboardQueryBudgetTests(ShopDataMixin, QueryBudgetMixin, TestCase):
+    """Admin sahifalari ``settings.QUERY_BUDGETS`` ichida — qatorlar soniga bog‘liq emas."""
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.staff)
+
+    # Test jadvallari kichik — reltuples taxmini baribir COUNT(*) ga tushadi (ikki so‘rov)
+    @override_settings(DASHBOARD_APPROXIMATE_COUNTS=False)
+    def test_dashboard_home(self):
+        response = self.client.get(reverse('admin_dashboard:dashboard_home'))
+        self.assertEqual(response.status_code, 200)
+        self.assertWithinQueryBudget(response)
+
+    def test_products_list(self):
+        response = self.client.get(reverse('admin_dashboard:products_list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['products']), len(self.products))
+        self.assertWithinQueryBudget(response)
+
+    def test_products_list_filtered(self):
+        response = self.client.get(reverse('admin_dashboard:products_list'), {
+            'category': self.category.id, 'stock': '1', 'min_price': '95', 'search': 'telefon',
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertWithinQueryBudget(response)
+
+    def test_orders_list(self):
+        response = self.client.get(reverse('admin_dashboard:orders_list'))
+        self.assertEqual(response.status_code, 200)
+        orders = response.context['orders']
+        self.assertEqual(len(orders), min(ORDERS_PER_PAGE, Order.objects.count()))
+        self.assertTrue(all(len(order.resolved_items) == self.LINES_PER_ORDER for order in orders))
+        self.assertWithinQueryBudget(response)
+
+    def test_orders_list_search(self):
+        response = self.client.get(reverse('admin_dashboard:orders_list'), {'q': 'xaridor1', 'status': 'pending'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['orders']), self.ORDERS_PER_USER)
+        self.assertWithinQueryBudget(response)
+
+    def test_users_list(self):
+        response = self.client.get(reverse('admin_dashboard:users_list'))
+        self.assertEqual(response.status_code, 200)
+        counts = {user.username: user.order_count for user in response.context['users']}
+        self.assertEqual(counts['xaridor0'], self.ORDERS_PER_USER)
+        self.assertEqual(counts['staff'], 0)
+        self.assertWithinQueryBudget(response)
+
+    def test_reviews_list(self):
+        response = self.client.get(reverse('admin_dashboard:reviews_list'), {
+            'product': self.product.id, 'user': self.customer.id,
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['selected_product'], self.product)
+        self.assertWithinQueryBudget(response)
+
+    def test_reviews_list_unfiltered(self):
+        response = self.client.get(reverse('admin_dashboard:reviews_list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['reviews']), 5)
+        self.assertWithinQueryBudget(response)
+
+
+# ===== Ro‘yxatlar =====
+class OrdersListPaginationTests(ShopDataMixin, TestCase):
+    ORDERS_PER_USER = 12  # 36 ta buyurtma — ikki sahifa
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.staff)
+
+    def test_keyset_pages_cover_all_orders(self):
+        url = reverse('admin_dashboard:orders_list')
+        first = self.client.get(url).context['page']
+        self.assertTrue(first.has_next)
+
+        second = self.client.get(url, {'after': first.next_cursor}).context['page']
+        self.assertFalse(second.has_next)
+        ids = [o.id for o in first] + [o.id for o in second]
+        self.assertEqual(ids, list(Order.objects.order_by('-created_at', '-id').values_list('id', flat=True)))
+
+        back = self.client.get(url, {'before': second.previous_cursor}).context['page']
+        self.assertEqual([o.id for o in back], [o.id for o in first])
+
+
+class OrderSearchTests(ShopDataMixin, TestCase):
+
+    def search(self, query):
+        return set(filter_orders(Order.objects.all(), query).values_list('id', flat=True))
+
+    def test_username_match_uses_subquery(self):
+        expected = set(Order.objects.filter(user__username__in=['xaridor0', 'xaridor1', 'xaridor2']).values_list('id', flat=True))
+        with self.assertNumQueries(1):
+            self.assertEqual(self.search('XARIDOR'), expected)
+
+    def test_full_name_phone_and_id(self):
+        self.assertEqual(self.search('Xaridor 1'), set(Order.objects.filter(user=self.customers[1]).values_list('id', flat=True)))
+        self.assertEqual(self.search(f'#{self.order.id}') & {self.order.id}, {self.order.id})
+        self.assertEqual(self.search('nomalum'), set())
+
+
+class UsersListSearchTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = CustomUser.objects.create_user('staff', 'staff@example.com', 'x', is_staff=True)
+        cls.ali = CustomUser.objects.create_user('ali2024', 'ali@example.com', 'x')
+        cls.vali = CustomUser.objects.create_user('vali', 'vali@example.com', 'x', phone_number='+998901234567')
+
+    def setUp(self):
+        self.client.force_login(self.staff)
+
+    def search(self, query):
+        response = self.client.get(reverse('admin_dashboard:users_list'), {'search': query})
+        return {user.username for user in response.context['users']}
+
+    def test_digits_match_username(self):
+        self.assertEqual(self.search('2024'), {'ali2024'})
+
+    def test_phone_formats(self):
+        for query in ('+998 90 123', '998901', '90-123', '(90) 123'):
+            with self.subTest(query=query):
+                self.assertEqual(self.search(query), {'vali'})
+
+    def test_text_query(self):
+        self.assertEqual(self.search('VAL'), {'vali'})
+
+
+class AutocompleteTests(ShopDataMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.staff)
+
+    def test_products_prefix_case_insensitive(self):
+        response = self.client.get(reverse('admin_dashboard:autocomplete_products'), {'q': 'tELEFON 1'})
+        self.assertEqual([r['text'] for r in response.json()['results']], ['Telefon 1'])
+
+    def test_users_prefix_ordered(self):
+        response = self.client.get(reverse('admin_dashboard:autocomplete_users'), {'q': 'xar'})
+        self.assertEqual([r['text'] for r in response.json()['results']], ['xaridor0', 'xaridor1', 'xaridor2'])
+
+    def test_empty_query(self):
+        response = self.client.get(reverse('admin_dashboard:autocomplete_users'), {'q': ' '})
+        self.assertEqual(response.json(), {'results': []})
+
+    def test_requires_staff(self):
+        self.client.force_login(self.customer)
+        response = self.client.get(reverse('admin_dashboard:autocomplete_products'), {'q': 'tel'})
+        self.assertEqual(response.status_code, 302)
+
+
+# ===== Eksport =====
+class ExportTests(ShopDataMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.staff)
+
+    def export(self, name, **params):
+        response = self.client.get(reverse(f'admin_dashboard:export_{name}'), params)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode('utf-8-sig')
+
+    def test_orders_csv_has_row_per_line(self):
+        rows = list(csv.DictReader(self.export('orders').splitlines()))
+        self.assertEqual(len(rows), OrderItem.objects.count())
+        self.assertEqual({row['order_id'] for row in rows}, {str(pk) for pk in Order.objects.values_list('id', flat=True)})
+
+    def test_orders_jsonl_nests_lines(self):
+        records = [json.loads(line) for line in self.export('orders', format='jsonl').splitlines()]
+        self.assertEqual(len(records), Order.objects.count())
+        self.assertTrue(all(len(record['lines']) == self.LINES_PER_ORDER for record in records))
+
+    def test_csv_escapes_formulas(self):
+        review = ProductReview.objects.create(
+            user=self.customer, product=self.product, comment='=HYPERLINK("http://x")', stars_given=1,
+        )
+        Order.objects.filter(pk=self.order.pk).update(full_name='@SUM(A1)', address='-2+3')
+
+        reviews = {row['id']: row for row in csv.DictReader(self.export('reviews').splitlines())}
+        self.assertEqual(reviews[str(review.id)]['comment'], '\'=HYPERLINK("http://x")')
+        self.assertEqual(reviews[str(review.id)]['stars_given'], '1')
+
+        orders = [row for row in csv.DictReader(self.export('orders').splitlines()) if row['order_id'] == str(self.order.id)]
+        self.assertEqual({(row['full_name'], row['address']) for row in orders}, {("'@SUM(A1)", "'-2+3")})
+        # Telefon raqami formula emas — o‘zgarishsiz
+        self.assertEqual({row['phone'] for row in orders}, {'+998901234567'})
+
+        # JSONL — asl qiymat
+        records = [json.loads(line) for line in self.export('reviews', format='jsonl').splitlines()]
+        self.assertIn('=HYPERLINK("http://x")', [record['comment'] for record in records])
+
+    def test_csv_keeps_phone_shaped_values(self):
+        Order.objects.filter(pk=self.order.pk).update(phone='+998 (90) 123-45-67', address='+1 =2')
+
+        orders = [row for row in csv.DictReader(self.export('orders').splitlines()) if row['order_id'] == str(self.order.id)]
+        self.assertEqual({(row['phone'], row['address']) for row in orders}, {('+998 (90) 123-45-67', "'+1 =2")})
+
+    def test_products_csv(self):
+        rows = list(csv.DictReader(self.export('products').splitlines()))
+        self.assertEqual(len(rows), len(self.products))
+        row = next(r for r in rows if r['id'] == str(self.products[1].id))
+        self.assertEqual(row['category'], 'Elektronika / Telefonlar')
+        self.assertEqual(json.loads(row['extra_data']), {'rang': 'qora'})
+
+
+# ===== Import =====
+class ProductImportTests(ShopDataMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        Product.objects.update(description='Asl tavsif')
+
+    def run_import(self, content, fmt='csv', **kwargs):
+        return import_products(read_rows(io.BytesIO(content.encode()), fmt), **kwargs)
+
+    def jsonl(self, *rows):
+        return ''.join(json.dumps(row) + '\n' for row in rows)
+
+    def test_partial_csv_feed_updates_only_given_columns(self):
+        a, b = self.products[0], self.products[1]
+        report = self.run_import(f'slug,price,stock\n{a.slug},55.00,7\n{b.slug},66.00,8\n')
+        self.assertEqual((report.updated, report.created, report.errors), (2, 0, []))
+
+        a.refresh_from_db()
+        self.assertEqual((a.price, a.stock), (Decimal('55.00'), 7))
+        self.assertEqual((a.name, a.category_id, a.description, a.discount_price), ('Telefon 0', self.products[0].category_id, 'Asl tavsif', Decimal('90.00')))
+        self.assertEqual(a.extra_data, {'rang': 'oq'})
+
+    def test_partial_feed_new_slug_requires_name_price_category(self):
+        report = self.run_import('slug,price\nyangi-slug,10\n')
+        self.assertEqual((report.created, report.skipped), (0, 1))
+        line, message = report.errors[0]
+        self.assertEqual(line, 2)
+        self.assertIn('name', message)
+        self.assertIn('category', message)
+        self.assertFalse(Product.objects.filter(slug='yangi-slug').exists())
+
+    def test_jsonl_rows_with_different_keys(self):
+        a, b = self.products[0], self.products[3]
+        report = self.run_import(self.jsonl(
+            {'slug': a.slug, 'description': 'Yangi tavsif', 'discount_price': None},
+            {'slug': b.slug, 'stock': 3},
+        ), fmt='jsonl')
+        self.assertEqual((report.updated, report.errors), (2, []))
+
+        a.refresh_from_db()
+        b.refresh_from_db()
+        self.assertEqual((a.description, a.discount_price, a.stock), ('Yangi tavsif', None, 50))
+        self.assertEqual((b.description, b.discount_price, b.stock), ('Asl tavsif', Decimal('90.00'), 3))
+
+    def test_new_products_with_category_path(self):
+        report = self.run_import(
+            'name,price,category,extra_data\n'
+            'Telefon 0,12.50,Elektronika / Telefonlar,"{""rang"": ""yashil""}"\n'
+            'Noutbuk,900,Yo‘q kategoriya,\n'
+        )
+        self.assertEqual((report.created, report.skipped), (1, 1))
+        self.assertIn('category: topilmadi', report.errors[0][1])
+
+        product = Product.objects.get(slug='telefon-0-2')
+        self.assertEqual((product.category_id, product.stock, product.is_active), (self.category.id, 0, True))
+        self.assertEqual(product.extra_data, {'rang': 'yashil'})
+
+    def test_duplicate_slug_in_file(self):
+        report = self.run_import(f'slug,price\n{self.product.slug},1\n{self.product.slug},2\n')
+        self.assertEqual((report.updated, report.skipped), (1, 1))
+        self.assertIn('takrorlangan', report.errors[0][1])
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.price, Decimal('1'))
+
+    def test_dry_run_writes_nothing(self):
+        report = self.run_import(f'slug,stock\n{self.product.slug},1\n', dry_run=True)
+        self.assertEqual(report.updated, 1)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 50)
+
+
+# ===== Dashboard hisoblagichlari =====
+@override_settings(TASKS_EAGER=True)
+class DashboardCounterTests(TestCase):
+
+    def new_users_today(self):
+        row = DailyStats.objects.filter(date=timezone.localdate()).first()
+        return row.new_users if row else 0
+
+    def test_user_create_and_delete(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            users = [CustomUser.objects.create_user(f'yangi{i}', f'yangi{i}@example.com', 'x') for i in range(3)]
+        self.assertEqual(self.new_users_today(), 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            users[0].delete()
+            CustomUser.objects.filter(pk=users[1].pk).delete()
+        self.assertEqual(self.new_users_today(), 1)
+
+        rebuild_stats()
+        self.assertEqual(self.new_users_today(), 1)
+
+
+# ===== Sotuv rollup lari =====
+def rollup_state():
+    return {
+        (r.granularity, r.bucket, r.product_id): (r.orders, r.units, r.revenue, r.fulfilled_orders, r.fulfilled_units, r.fulfilled_revenue)
+        for r in SalesRollup.objects.all()
+    }
+
+
+class SalesRollupTests(ShopDataMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.delivered = list(Order.objects.filter(user=self.customer).order_by('id')[:2])
+        Order.objects.filter(pk__in=[o.pk for o in self.delivered]).update(status='delivered')
+        rebuild_rollups()
+        self.day = bucket_start(timezone.now(), SalesRollup.DAY)
+        self.lines = OrderItem.objects.annotate(line_total=F('price') * F('quantity'))
+
+    def test_total_row(self):
+        total = SalesRollup.objects.get(granularity=SalesRollup.DAY, bucket=self.day, product_id=TOTAL_PRODUCT_ID)
+        sums = self.lines.aggregate(units=Sum('quantity'), revenue=Sum('line_total'))
+        fulfilled = self.lines.filter(order__in=self.delivered).aggregate(units=Sum('quantity'), revenue=Sum('line_total'))
+        self.assertEqual((total.orders, total.units, total.revenue), (Order.objects.count(), sums['units'], sums['revenue']))
+        self.assertEqual(
+            (total.fulfilled_orders, total.fulfilled_units, total.fulfilled_revenue),
+            (2, fulfilled['units'], fulfilled['revenue']),
+        )
+
+    def test_product_rows_add_up_to_total(self):
+        for granularity in (SalesRollup.HOUR, SalesRollup.DAY):
+            rows = SalesRollup.objects.filter(granularity=granularity)
+            products = rows.exclude(product_id=TOTAL_PRODUCT_ID).aggregate(units=Sum('units'), revenue=Sum('revenue'))
+            totals = rows.filter(product_id=TOTAL_PRODUCT_ID).aggregate(units=Sum('units'), revenue=Sum('revenue'))
+            self.assertEqual(products, totals)
+
+        row = SalesRollup.objects.get(granularity=SalesRollup.DAY, bucket=self.day, product_id=self.product.id)
+        self.assertEqual((row.product_name, row.category_id), (self.product.name, self.product.category_id))
+        self.assertEqual(row.units, OrderItem.objects.filter(product=self.product).aggregate(n=Sum('quantity'))['n'])
+
+    def test_rebuild_since_keeps_older_buckets(self):
+        old = self.delivered[0]
+        Order.objects.filter(pk=old.pk).update(created_at=timezone.now() - timedelta(days=10))
+        rebuild_rollups()
+        before = rollup_state()
+        rebuild_rollups(since=timezone.now() - timedelta(days=1))
+        self.assertEqual(rollup_state(), before)
+
+    def test_report_category_filter(self):
+        start, end = self.day, self.day + timedelta(days=1)
+        report = sales_report(start, end)
+        self.assertEqual(report['totals']['orders'], Order.objects.count())
+        self.assertEqual(len(report['series']), 1)
+
+        category_ids = [self.category.id]
+        filtered = sales_report(start, end, category_ids=category_ids)
+        expected = self.lines.filter(product__category_id__in=category_ids).aggregate(revenue=Sum('line_total'))
+        self.assertEqual(filtered['totals']['revenue'], expected['revenue'])
+        self.assertEqual({r['category_id'] for r in filtered['by_category']}, {self.category.id})
+
+    def test_csv_export(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse('admin_dashboard:sales_analytics'), {'format': 'csv', 'report': 'products'})
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        rows = list(csv.reader(response.content.decode().splitlines()))
+        self.assertEqual(rows[0][:2], ['product_id', 'product_name'])
+        self.assertEqual(len(rows) - 1, len(self.products))
+
+    def test_csv_export_escapes_names(self):
+        SalesRollup.objects.filter(product_id=self.product.pk).update(product_name='=HYPERLINK("http://x")')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.name = '@SUM(A1)'
+            self.category.save()
+        self.client.force_login(self.staff)
+        url = reverse('admin_dashboard:sales_analytics')
+
+        rows = list(csv.reader(self.client.get(url, {'format': 'csv', 'report': 'products'}).content.decode().splitlines()))
+        self.assertIn('\'=HYPERLINK("http://x")', [row[1] for row in rows])
+        rows = list(csv.reader(self.client.get(url, {'format': 'csv', 'report': 'categories'}).content.decode().splitlines()))
+        self.assertIn("'@SUM(A1)", [row[1] for row in rows])
+
+
+@override_settings(TASKS_EAGER=False)
+class OrderRollupTaskTests(ShopDataMixin, TestCase):
+    """Signal vazifalari qaysi tartibda bajarilmasin, rollup ``rebuild_rollups`` bilan bir xil."""
+
+    def setUp(self):
+        super().setUp()
+        rebuild_rollups()
+
+    def place_and_deliver(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            order = place_order(self.customer, {str(self.products[0].id): 2, str(self.products[1].id): 1}, {
+                'full_name': 'Xaridor', 'phone': '+998901234567', 'address': 'Toshkent', 'note': '',
+            })
+        with self.captureOnCommitCallbacks(execute=True):
+            order = Order.objects.get(pk=order.pk)
+            order.status = 'delivered'
+            order.save()
+        return order
+
+    def run_tasks(self, *names):
+        """Navbatdagi ``record_order_*`` vazifalarini berilgan tartibda bajaradi."""
+        claimed = {t.name.rsplit('.', 1)[-1]: t for t in claim_tasks(100, 'test-worker') if 'record_order' in t.name}
+        self.assertEqual(set(claimed), set(names))
+        for name in names:
+            self.assertTrue(run_task(claimed[name]))
+
+    def assertMatchesRebuild(self):
+        incremental = rollup_state()
+        rebuild_rollups()
+        self.assertEqual(incremental, rollup_state())
+
+    def test_created_then_status_change(self):
+        self.place_and_deliver()
+        self.run_tasks('record_order_created', 'record_order_status_change')
+        self.assertMatchesRebuild()
+
+    def test_status_change_before_created(self):
+        self.place_and_deliver()
+        self.run_tasks('record_order_status_change', 'record_order_created')
+        self.assertMatchesRebuild()
+
+    def test_deleted_before_created(self):
+        order = self.place_and_deliver()
+        with self.captureOnCommitCallbacks(execute=True):
+            Order.objects.get(pk=order.pk).delete()
+        self.run_tasks('record_order_deleted', 'record_order_status_change', 'record_order_created')
+        self.assertMatchesRebuild()
+        self.assertFalse(SalesRollup.objects.filter(revenue__lt=0).exists())
+        self.assertFalse(SalesRollup.objects.filter(fulfilled_revenue__lt=0).exists())
@@ -8,12 +8,15 @@ urlpatterns = [
 
     # Products
     path('products/', views.admin_products_list, name='products_list'),
+    path('products/export/', views.export_products, name='export_products'),
+    path('products/import/', views.admin_product_import, name='product_import'),
     path('products/create/', views.admin_product_create, name='product_create'),
     path('products/<int:product_id>/edit/', views.admin_product_edit, name='product_edit'),
     path('products/<int:product_id>/delete/', views.admin_product_delete, name='product_delete'),
 
     # Orders
     path("orders/", views.admin_orders_list, name="orders_list"),
+    path("orders/export/", views.export_orders, name="export_orders"),
     path("orders/<int:order_id>/", views.admin_order_detail, name="order_detail"),
     path("orders/<int:order_id>/update-status/", views.admin_update_order_status, name="update_order_status"),
 
@@ -31,11 +34,22 @@ urlpatterns = [
 
     # Reviews
     path("reviews/", views.reviews_list, name="reviews_list"),
+    path("reviews/export/", views.export_reviews, name="export_reviews"),
     path("reviews/delete/<int:review_id>/", views.delete_review, name="delete_review"),
 
+    # Autocomplete (JSON)
+    path("autocomplete/products/", views.autocomplete_products, name="autocomplete_products"),
+    path("autocomplete/users/", views.autocomplete_users, name="autocomplete_users"),
+
     # manate store
     path("settings/", views.store_settings, name="store_settings"),
 
+    # Analytics
+    path("analytics/", views.sales_analytics, name="sales_analytics"),
+
+    # performance
+    path("perf/", views.perf_stats, name="perf_stats"),
+
 
     # path("orders", views.orders_list, name="orders_list"),
     # path("orders/<int:order_id>/", views.order_detail, name="order_detail"),
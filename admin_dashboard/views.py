@@ -1,16 +1,34 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
-from shop.models import Product, Category, Order, OrderItemSnapshot, ProductImage, ProductReview, StoreSettings
+from shop.category_tree import get_category_tree
+from shop.models import Product, Category, Order, ProductImage, ProductReview, StoreSettings
 from user.models import CustomUser
-from .forms import ProductForm, ProductImageForm, CategoryForm, CustomUserForm
+from .forms import ProductForm, ProductImageForm, CategoryForm, CustomUserForm, ProductImportFileForm
 from django.contrib.admin.views.decorators import staff_member_required
-from django.db.models import Q
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce, Collate, Upper
 from django.views.decorators.http import require_POST
-from django.utils.text import slugify
 from django.core.paginator import Paginator
-from datetime import datetime
+from django.conf import settings as django_settings
+from django.http import HttpResponse, JsonResponse
+from django.utils import timezone
+from shop.instrumentation import view_stats
+from shop.orders import resolve_order_items
+from shop.pagination import keyset_paginate
+from .analytics import MEASURES, sales_report
+from .exports import (
+    ORDER_HEADER, PRODUCT_HEADER, REVIEW_HEADER, _csv_value, export_response, order_records, product_records,
+    review_records,
+)
+from .filters import filter_orders, filter_products, filter_reviews
+from .imports import detect_format, import_products, read_rows
+from .models import SalesRollup
+from .stats import get_dashboard_stats
+from datetime import datetime, timedelta
+import csv
 import json
+import re
 
 
 # Create your views here.
@@ -22,11 +40,14 @@ def staff_required(user):
 @login_required
 @user_passes_test(staff_required)
 def dashboard_home(request):
+    # Hisoblagichlar signal/cron bilan yuritiladi va cache dan o‘qiladi (har safar COUNT(*) siz)
+    stats = get_dashboard_stats()
     context = {
-        'product_count': Product.objects.count(),
-        'order_count': Order.objects.count(),
-        'category_count': Category.objects.count(),
-        'user_count': CustomUser.objects.count(),
+        'product_count': stats['product_count'],
+        'order_count': stats['order_count'],
+        'category_count': stats['category_count'],
+        'user_count': stats['user_count'],
+        'stats': stats,
     }
     return render(request, 'admin_dashboard/dashboard_home.html', context)
 
@@ -40,31 +61,11 @@ def dashboard_home(request):
 
 
 def admin_products_list(request):
-    products = Product.objects.all().order_by('-created_at')
+    # Kategoriya ustuni JOIN bilan (har bir qatorga alohida so‘rov emas)
+    products = Product.objects.select_related('category').order_by('-created_at')
     categories = Category.objects.all()
 
-    # Filters
-    category = request.GET.get('category')
-    is_active = request.GET.get('is_active')
-    stock = request.GET.get('stock')
-    min_price = request.GET.get('min_price')
-    max_price = request.GET.get('max_price')
-    search = request.GET.get('search')
-
-    if category:
-        products = products.filter(category_id=category)
-    if is_active in ['0', '1']:
-        products = products.filter(is_active=bool(int(is_active)))
-    if stock == '0':
-        products = products.filter(stock=0)
-    elif stock == '1':
-        products = products.filter(stock__gt=0)
-    if min_price:
-        products = products.filter(price__gte=min_price)
-    if max_price:
-        products = products.filter(price__lte=max_price)
-    if search:
-        products = products.filter(name__icontains=search)
+    products = filter_products(products, request.GET)
 
     # Pagination
     paginator = Paginator(products, 15)  # 10 ta product per page
@@ -84,9 +85,7 @@ def admin_product_create(request):
     if request.method == "POST":
         form = ProductForm(request.POST, request.FILES)
         if form.is_valid():
-            product = form.save(commit=False)
-            if not product.slug:
-                product.slug = slugify(product.name)
+            product = form.save(commit=False)  # slug bo‘sh bo‘lsa Product.save() ajratadi
 
             # ✅ Extra Data JSON parse
             extra_raw = request.POST.get("extra_data") or "{}"
@@ -118,9 +117,7 @@ def admin_product_edit(request, product_id):
     if request.method == "POST":
         form = ProductForm(request.POST, request.FILES, instance=product)
         if form.is_valid():
-            product = form.save(commit=False)
-            if not product.slug:
-                product.slug = slugify(product.name)
+            product = form.save(commit=False)  # slug bo‘sh bo‘lsa Product.save() ajratadi
 
             # ✅ Extra Data JSON parse
             extra_raw = request.POST.get("extra_data") or "{}"
@@ -150,6 +147,26 @@ def admin_product_edit(request, product_id):
     return render(request, "admin_dashboard/product_form.html", {"form": form, "product": product})
 
 
+# ================= Product bulk import =================
+@staff_member_required
+def admin_product_import(request):
+    report = None
+    if request.method == "POST":
+        form = ProductImportFileForm(request.POST, request.FILES)
+        if form.is_valid():
+            upload = form.cleaned_data["file"]
+            rows = read_rows(upload.file, detect_format(upload.name))
+            report = import_products(rows, dry_run=form.cleaned_data["dry_run"])
+            if not report.dry_run:
+                messages.success(
+                    request, f"Import: {report.created} ta yangi, {report.updated} ta yangilandi, {report.skipped} ta xato."
+                )
+    else:
+        form = ProductImportFileForm()
+
+    return render(request, "admin_dashboard/product_import.html", {"form": form, "report": report})
+
+
 # ================= Product delete =================
 @login_required
 @user_passes_test(staff_required)
@@ -183,24 +200,34 @@ def admin_product_delete(request, product_id):
 #   ADMIN OREDERS MANAGE
 #===============================
 # ================= admin_orders_list =================
+ORDER_LIST_ORDERING = ('-created_at', '-id')
+ORDERS_PER_PAGE = 25
+
+
 @staff_member_required
 def admin_orders_list(request):
     """Admin dashboard: orders list with search & status filter"""
     query = request.GET.get('q', '')
     status_filter = request.GET.get('status', '')
 
-    orders = Order.objects.all().order_by('-created_at')
+    orders = filter_orders(Order.objects.select_related('user'), query, status_filter)
+    page = keyset_paginate(
+        orders,
+        ORDER_LIST_ORDERING,
+        ORDERS_PER_PAGE,
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+    )
 
-    if query:
-        orders = orders.filter(
-            Q(user__username__icontains=query) |
-            Q(id__icontains=query)
-        )
-    if status_filter:
-        orders = orders.filter(status=status_filter)
+    # Mahsulotlar ustuni: butun sahifa uchun 1-2 ta so‘rov (har bir buyurtmaga alohida emas)
+    order_lines = resolve_order_items(page)
+    for order in page:
+        order.resolved_items = order_lines[order.id]
 
     context = {
-        "orders": orders,
+        "orders": page.object_list,
+        "page": page,
+        "status_choices": Order.STATUS_CHOICES,
         "query": query,
         "status_filter": status_filter
     }
@@ -223,13 +250,13 @@ def admin_update_order_status(request, order_id):
 
 @staff_member_required
 def admin_order_detail(request, order_id):
-    """Order detail page for admin with snapshots"""
+    """Order detail page for admin with order lines (buyurtma paytidagi nom/narx)"""
     order = get_object_or_404(Order, id=order_id)
-    snapshots = order.snapshots.all()
+    lines = order.lines.order_by('id')
 
     return render(request, "admin_dashboard/order_detail.html", {
         "order": order,
-        "snapshots": snapshots
+        "lines": lines
     })
 
 
@@ -239,7 +266,7 @@ def admin_order_detail(request, order_id):
 #===============================
 @staff_member_required
 def categories_list(request):
-    categories = Category.objects.filter(parent__isnull=True)
+    categories = get_category_tree().roots
     return render(request, "admin_dashboard/category_list.html", {"categories": categories})
 
 
@@ -310,19 +337,53 @@ from django.shortcuts import render
 from django.db.models import Q
 from user.models import CustomUser
 
+USER_LIST_ORDERING = ('-date_joined', '-id')
+USERS_PER_PAGE = 25
+# O‘zbekiston kodi: "90 123 45 67" kabi mahalliy raqamlar E.164 ga shu kod bilan to‘ldiriladi
+PHONE_COUNTRY_CODE = '998'
+PHONE_QUERY_RE = re.compile(r'^\+?[\d\s\-()]+$')
+
+
+def phone_search_prefix(query):
+    """
+    Telefonga o‘xshash qidiruvni E.164 prefiksiga aylantiradi (aks holda None):
+    "+998 90 123" / "998901" / "90-123" / "(90) 123" -> "+99890123".
+    """
+    if not PHONE_QUERY_RE.match(query):
+        return None
+    digits = re.sub(r'\D', '', query)
+    if len(digits) < 3:
+        return None
+    if query.startswith('+') or digits.startswith(PHONE_COUNTRY_CODE):
+        return f'+{digits}'
+    return f'+{PHONE_COUNTRY_CODE}{digits.lstrip("0")}'
+
+
+@staff_member_required
 def users_list(request):
-    users = CustomUser.objects.all().order_by('-date_joined')
+    # Buyurtmalar soni va oxirgi buyurtma — korrelyatsiyalangan subquery: faqat sahifadagi
+    # 25 ta user uchun (user, -created_at) indeksi bo‘yicha hisoblanadi, butun jadval GROUP BY qilinmaydi
+    user_orders = Order.objects.filter(user=OuterRef('pk')).order_by()
+    users = CustomUser.objects.annotate(
+        order_count=Coalesce(Subquery(user_orders.values('user').annotate(c=Count('id')).values('c')), 0),
+        last_order_at=Subquery(user_orders.order_by('-created_at').values('created_at')[:1]),
+    )
 
     # SEARCH
-    query = request.GET.get('search', '')
+    query = request.GET.get('search', '').strip()
     if query:
-        users = users.filter(
+        search = (
             Q(username__icontains=query) |
             Q(email__icontains=query) |
             Q(first_name__icontains=query) |
-            Q(last_name__icontains=query) |
-            Q(phone_number__icontains=query)
+            Q(last_name__icontains=query)
         )
+        # "2024" username ("ali2024") ham, telefon prefiksi ham bo‘lishi mumkin — ikkalasi OR
+        # bilan (har biri o‘z indeksidan BitmapOr)
+        phone_prefix = phone_search_prefix(query)
+        if phone_prefix:
+            search |= Q(phone_number__startswith=phone_prefix)
+        users = users.filter(search)
 
     # ROLE FILTER
     role = request.GET.get('role', '')
@@ -338,8 +399,17 @@ def users_list(request):
     elif status == 'inactive':
         users = users.filter(is_active=False)
 
+    page = keyset_paginate(
+        users,
+        USER_LIST_ORDERING,
+        USERS_PER_PAGE,
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+    )
+
     context = {
-        'users': users,
+        'users': page.object_list,
+        'page': page,
         'request': request,  # needed to keep form values
     }
     return render(request, "admin_dashboard/users_list.html", context)
@@ -386,35 +456,24 @@ def view_user(request, user_id):
 
 
 
+@staff_member_required
 def reviews_list(request):
-    reviews = ProductReview.objects.all().order_by('-created_at')
-
-    product = request.GET.get('product')
-    user = request.GET.get('user')
-    stars = request.GET.get('stars')
-    date_from = request.GET.get('from')
-    date_to = request.GET.get('to')
-    search = request.GET.get('search')
-
-    if product:
-        reviews = reviews.filter(product_id=product)
-
-    if user:
-        reviews = reviews.filter(user_id=user)
-
-    if stars:
-        reviews = reviews.filter(stars_given=stars)
-
-    if date_from:
-        reviews = reviews.filter(created_at__gte=date_from)
-
-    if date_to:
-        date_to_full = datetime.strptime(date_to, "%Y-%m-%d")
-        date_to_full = date_to_full.replace(hour=23, minute=59)
-        reviews = reviews.filter(created_at__lte=date_to_full)
-
-    if search:
-        reviews = reviews.filter(comment__icontains=search)
+    # product/user ustunlari JOIN bilan (har bir qatorga alohida so‘rov emas)
+    reviews = ProductReview.objects.select_related('user', 'product').only(
+        'id', 'comment', 'stars_given', 'created_at',
+        'product__id', 'product__name', 'user__id', 'user__username',
+    ).order_by('-created_at', '-id')
+
+    reviews = filter_reviews(reviews, request.GET)
+
+    # Tanlangan filtr nomlari (autocomplete input uchun) — butun jadval o‘rniga faqat bitta qator
+    product = request.GET.get('product', '')
+    user = request.GET.get('user', '')
+    selected_product = selected_user = None
+    if product.isdigit():
+        selected_product = Product.objects.filter(pk=product).only('id', 'name').first()
+    if user.isdigit():
+        selected_user = CustomUser.objects.filter(pk=user).only('id', 'username').first()
 
     paginator = Paginator(reviews, 5)  # 5 review per page
     page_number = request.GET.get('page')
@@ -422,14 +481,53 @@ def reviews_list(request):
 
     context = {
         "reviews": page_obj,
-        "products": Product.objects.all(),
-        "users": CustomUser.objects.all(),
+        "selected_product": selected_product,
+        "selected_user": selected_user,
         "request_get": request.GET.copy(),  # pagination linklar uchun
     }
 
     return render(request, 'admin_dashboard/reviews_list.html', context)
 
 
+# ================= Autocomplete (filtrlar uchun) =================
+AUTOCOMPLETE_LIMIT = 10
+
+
+def _prefix_search(queryset, field, query):
+    """
+    ``UPPER(field) COLLATE "C" LIKE 'Q%' ORDER BY shu ifoda, id LIMIT n`` — ifoda ``*_prefix_idx``
+    indeksi bilan bir xil, shuning uchun qisqa prefiksda ham hamma mosliklar o‘qib saralanmaydi.
+    """
+    return (
+        queryset.annotate(prefix_key=Collate(Upper(field), 'C'))
+        .filter(prefix_key__startswith=query.upper())
+        .order_by('prefix_key', 'id')
+        .values_list('id', field)[:AUTOCOMPLETE_LIMIT]
+    )
+
+
+@staff_member_required
+def autocomplete_products(request):
+    """``?q=`` bilan boshlanadigan product nomlari (product_name_prefix_idx)."""
+    query = request.GET.get('q', '').strip()
+    results = []
+    if query:
+        results = [{'id': pk, 'text': name} for pk, name in _prefix_search(Product.objects.all(), 'name', query)]
+    return JsonResponse({'results': results})
+
+
+@staff_member_required
+def autocomplete_users(request):
+    """``?q=`` bilan boshlanadigan username lar (user_username_prefix_idx)."""
+    query = request.GET.get('q', '').strip()
+    results = []
+    if query:
+        results = [
+            {'id': pk, 'text': username}
+            for pk, username in _prefix_search(CustomUser.objects.all(), 'username', query)
+        ]
+    return JsonResponse({'results': results})
+
 
 
 
@@ -450,6 +548,7 @@ def delete_review(request, review_id):
 #   ADMIN CATEGORIES MANAGE
 #===============================
 def store_settings(request):
+    # Tahrirlash uchun bazadan yangi nusxa (cache dagi umumiy obyekt emas); save() cache ni yangilaydi
     settings, created = StoreSettings.objects.get_or_create(id=1)
 
     if request.method == "POST":
@@ -477,3 +576,128 @@ def store_settings(request):
     return render(request, "admin_dashboard/settings.html", {
         "settings": settings
     })
+
+
+
+
+#===============================
+#   PERFORMANCE STATS
+#===============================
+@staff_member_required
+def perf_stats(request):
+    """View lar bo‘yicha SQL soni va latency (joriy process, oxirgi so‘rovlar)"""
+    if request.GET.get('reset') == '1':
+        view_stats.reset()
+    return JsonResponse({
+        'budgets': django_settings.QUERY_BUDGETS,
+        'views': view_stats.snapshot(),
+    })
+
+
+#===============================
+#   SALES ANALYTICS
+#===============================
+ANALYTICS_DEFAULT_DAYS = 30
+ANALYTICS_CSV_REPORTS = ('series', 'products', 'categories')
+
+
+def _analytics_params(request):
+    """GET dan hisobot oralig‘i: ``from``/``to`` (sana, ikkalasi ham kiradi), granularity, kategoriya."""
+    today = timezone.localdate()
+    try:
+        date_to = datetime.strptime(request.GET.get('to', ''), "%Y-%m-%d").date()
+    except ValueError:
+        date_to = today
+    try:
+        date_from = datetime.strptime(request.GET.get('from', ''), "%Y-%m-%d").date()
+    except ValueError:
+        date_from = date_to - timedelta(days=ANALYTICS_DEFAULT_DAYS - 1)
+
+    granularity = request.GET.get('granularity')
+    if granularity not in dict(SalesRollup.GRANULARITY_CHOICES):
+        granularity = SalesRollup.DAY
+
+    category_ids = None
+    category = request.GET.get('category', '')
+    if category.isdigit():
+        category_ids = get_category_tree().descendant_ids(int(category))
+
+    start = timezone.make_aware(datetime.combine(date_from, datetime.min.time()))
+    end = timezone.make_aware(datetime.combine(date_to + timedelta(days=1), datetime.min.time()))
+    return {
+        'date_from': date_from, 'date_to': date_to, 'granularity': granularity,
+        'category': category, 'category_ids': category_ids, 'start': start, 'end': end,
+    }
+
+
+@staff_member_required
+def sales_analytics(request):
+    """Sotuv hisobotlari — faqat SalesRollup jadvalidan (buyurtmalar jadvali o‘qilmaydi)."""
+    params = _analytics_params(request)
+    report = sales_report(params['start'], params['end'], params['granularity'], params['category_ids'])
+
+    tree = get_category_tree()
+    for row in report['by_category']:
+        node = tree.get(row['category_id']) if row['category_id'] else None
+        row['category_name'] = node.name if node else "—"
+
+    if request.GET.get('format') == 'csv':
+        return _analytics_csv(request.GET.get('report', 'series'), report, params)
+
+    return render(request, 'admin_dashboard/sales_analytics.html', {
+        'report': report,
+        'params': params,
+        'category_options': [(node.id, '— ' * node.depth + node.name) for node in tree.walk()],
+        'granularity_choices': SalesRollup.GRANULARITY_CHOICES,
+    })
+
+
+def _analytics_csv(kind, report, params):
+    if kind not in ANALYTICS_CSV_REPORTS:
+        kind = 'series'
+    measures = list(MEASURES)
+    if kind == 'series':
+        header, rows = ['bucket'] + measures, (
+            [timezone.localtime(r['bucket']).isoformat()] + [r[m] for m in measures] for r in report['series']
+        )
+    elif kind == 'products':
+        header, rows = ['product_id', 'product_name'] + measures, (
+            [r['product_id'], _csv_value(r['product_name'])] + [r[m] for m in measures] for r in report['top_products']
+        )
+    else:
+        header, rows = ['category_id', 'category_name'] + measures, (
+            [r['category_id'], _csv_value(r['category_name'])] + [r[m] for m in measures] for r in report['by_category']
+        )
+
+    filename = f"sales_{kind}_{params['granularity']}_{params['date_from']:%Y%m%d}_{params['date_to']:%Y%m%d}.csv"
+    response = HttpResponse(content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    writer = csv.writer(response)
+    writer.writerow(header)
+    writer.writerows(rows)
+    return response
+
+
+#===============================
+#   EXPORTS (streaming CSV / JSONL)
+#===============================
+# Filtrlar ro‘yxat sahifalaridagi bilan bir xil GET parametrlarini oladi
+@staff_member_required
+def export_orders(request):
+    fmt = request.GET.get('format', 'csv')
+    orders = filter_orders(
+        Order.objects.order_by('-created_at', '-id'), request.GET.get('q', ''), request.GET.get('status', '')
+    )
+    return export_response('orders', fmt, ORDER_HEADER, order_records(orders, fmt))
+
+
+@staff_member_required
+def export_products(request):
+    products = filter_products(Product.objects.all(), request.GET)
+    return export_response('products', request.GET.get('format', 'csv'), PRODUCT_HEADER, product_records(products))
+
+
+@staff_member_required
+def export_reviews(request):
+    reviews = filter_reviews(ProductReview.objects.all(), request.GET)
+    return export_response('reviews', request.GET.get('format', 'csv'), REVIEW_HEADER, review_records(reviews))
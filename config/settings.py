@@ -27,6 +27,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 
     # 3rd-party applar
     'crispy_forms',
@@ -40,6 +41,7 @@ INSTALLED_APPS = [
     'user',
     'shop',
     'admin_dashboard',
+    'tasks',
 ]
 
 
@@ -49,12 +51,14 @@ CRISPY_TEMPLATE_PACK = "bootstrap5"
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'shop.middleware.RequestMetricsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'shop.middleware.MaintenanceModeMiddleware',
 ]
 
 ROOT_URLCONF = 'config.urls'
@@ -70,6 +74,7 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'shop.context_processors.categories_processor',
+                'shop.context_processors.cart_processor',
             ],
         },
     },
@@ -89,10 +94,62 @@ DATABASES = {
         'PASSWORD': config('PASSWORD'),
         'HOST': config('HOST'),
         'PORT': config('PORT'),
+        'OPTIONS': {
+            # Qidiruvdagi typo fallback (shop.search) uchun; pg_trgm default 0.6 juda qattiq
+            'options': '-c pg_trgm.word_similarity_threshold=0.4',
+        },
+    }
+}
 
+
+# Cache: default — process ichidagi LocMem; production da umumiy cache (masalan, Redis) bering.
+# Bir nechta worker LocMem bilan ishlasa `check --deploy` ogohlantiradi (shop.W001).
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default=''),
     }
 }
 
+# Umumiy cache bo‘lmasa kategoriya daraxti / StoreSettings boshqa worker dagi o‘zgarishni
+# ko‘rishi uchun shuncha sekunddan keyin bazadan qayta yuklanadi (shop.caching)
+LOCAL_CACHE_MAX_AGE = config('LOCAL_CACHE_MAX_AGE', default=30, cast=int)
+
+
+# So‘rov metrikalari (SQL soni, DB/template vaqti -> Server-Timing header, admin perf sahifasi)
+REQUEST_METRICS_ENABLED = config('REQUEST_METRICS_ENABLED', default=True, cast=bool)
+
+# View bo‘yicha SQL so‘rovlar limiti (sessiya va user so‘rovlari ham kiradi).
+# Oshib ketsa log ga warning yoziladi; testlarda shop.testing.QueryBudgetMixin tekshiradi.
+QUERY_BUDGETS = {
+    'home': 6,
+    'shop:product_detail': 8,
+    'shop:product_reviews': 3,
+    'shop:cart_view': 4,
+    'shop:checkout_confirm': 8,
+    'shop:checkout_success': 5,
+    'shop:my_orders': 6,
+    'admin_dashboard:dashboard_home': 7,
+    'admin_dashboard:products_list': 6,
+    'admin_dashboard:orders_list': 6,
+    'admin_dashboard:users_list': 6,
+    'admin_dashboard:reviews_list': 8,
+}
+
+
+# Dashboard: katta jadvallar (Product, CustomUser) soni pg_class.reltuples taxminidan olinadi
+DASHBOARD_APPROXIMATE_COUNTS = config('DASHBOARD_APPROXIMATE_COUNTS', default=True, cast=bool)
+
+# Rasm derivativlari (shop.images): shu kengliklarda WebP + JPEG nusxalar yuklashdan keyin fon da yaratiladi
+IMAGE_DERIVATIVE_WIDTHS = (160, 320, 640, 1280)
+
+# Fon vazifalari (tasks app): `python manage.py run_worker` bajaradi.
+# TASKS_EAGER=True — worker siz, commit dan keyin shu process da (development uchun)
+TASKS_EAGER = config('TASKS_EAGER', default=False, cast=bool)
+
+EMAIL_BACKEND = config('EMAIL_BACKEND', default='django.core.mail.backends.console.EmailBackend')
+DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='noreply@market.uz')
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
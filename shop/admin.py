@@ -1,6 +1,8 @@
 from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
 from django import forms
 from .models import Product, Category, Order, ProductImage, StoreSettings
+from .orders import resolve_order_items
 
 
 # Inline for product images
@@ -51,20 +53,35 @@ class CategoryAdmin(admin.ModelAdmin):
     search_fields = ('name',)
 
 
+class OrderChangeList(ChangeList):
+    """Sahifadagi barcha buyurtmalar qatorlarini bitta batch bilan oldindan yuklaydi."""
+
+    def get_results(self, request):
+        super().get_results(request)
+        order_lines = resolve_order_items(self.result_list)
+        for order in self.result_list:
+            order.resolved_items = order_lines[order.id]
+
+
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
     list_display = ('id', 'order_title', 'user', 'full_name', 'phone', 'total_price', 'status', 'created_at')
     list_filter = ('status', 'created_at')
+    list_select_related = ('user',)
     search_fields = ('id', 'user__username', 'full_name', 'phone', 'address')
 
+    def get_changelist(self, request, **kwargs):
+        return OrderChangeList
+
     def order_title(self, obj):
-        items = []
-        for product_id, qty in obj.items.items():
-            try:
-                product = Product.objects.get(id=product_id)
-                items.append(f"{product.name} (x{qty})")
-            except Product.DoesNotExist:
-                items.append(f"Unknown product (ID: {product_id})")
+        lines = getattr(obj, 'resolved_items', None)
+        if lines is None:
+            lines = resolve_order_items([obj])[obj.id]
+        items = [
+            f"{line.name} (x{line.quantity})" if not line.deleted
+            else f"{line.name} (x{line.quantity}, deleted)"
+            for line in lines
+        ]
         return f"Order #{obj.id} — {obj.user.username} — {', '.join(items)}"
 
     order_title.short_description = "Order"
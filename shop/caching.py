@@ -0,0 +1,85 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+# Bu backend lar process ichida yashaydi — versiya kaliti boshqa worker larga yetib bormaydi
+PROCESS_LOCAL_BACKENDS = (LocMemCache, DummyCache)
+
+
+def cache_is_shared():
+    """Default cache barcha processlar uchun umumiymi (Redis, Memcached, DatabaseCache, ...)."""
+    return not isinstance(caches['default'], PROCESS_LOCAL_BACKENDS)
+
+
+class VersionedLocalCache:
+    """
+    Process xotirasidagi qiymat + umumiy cache dagi versiya raqami.
+
+    Qiymatning o‘zi har bir process da saqlanadi (pickle/unpickle siz), umumiy cache da
+    faqat versiya turadi. ``invalidate()`` versiyani oshiradi — boshqa processlar keyingi
+    tekshiruvda qiymatni qayta yuklaydi. ``check_interval`` > 0 bo‘lsa versiya har so‘rovda
+    emas, shuncha sekundda bir marta tekshiriladi (cache ga ham murojaat qilinmaydi).
+
+    Cache process ichida bo‘lsa (LocMem — default) boshqa worker dagi ``invalidate()`` bu
+    yerga yetib kelmaydi: qiymat ``settings.LOCAL_CACHE_MAX_AGE`` sekunddan keyin bazadan
+    qayta yuklanadi va versiya ham oshadi (ETag lar eskirishi uchun).
+    """
+
+    def __init__(self, version_key, loader, check_interval=0):
+        self.version_key = version_key
+        self.loader = loader
+        self.check_interval = check_interval
+        self._lock = threading.RLock()  # loader ichidagi save() -> invalidate() uchun
+        self._version = None
+        self._value = None
+        self._checked_at = 0.0
+        self._loaded_at = 0.0
+
+    def get(self):
+        now = time.monotonic()
+        self._expire_local(now)
+        value = self._value
+        if value is not None and now - self._checked_at < self.check_interval:
+            return value
+
+        version = self._shared_version()
+        with self._lock:
+            if self._value is None or self._version != version:
+                self._value = self.loader()
+                self._version = version
+                self._loaded_at = now
+            self._checked_at = now
+            return self._value
+
+    def version(self):
+        """Umumiy versiya raqami (ETag larga qo‘shish uchun)."""
+        self._expire_local(time.monotonic())
+        return self._shared_version()
+
+    def invalidate(self):
+        try:
+            cache.incr(self.version_key)
+        except ValueError:
+            cache.add(self.version_key, time.time_ns(), None)
+        with self._lock:
+            self._value = None
+
+    def _expire_local(self, now):
+        if (
+            self._value is not None
+            and now - self._loaded_at >= settings.LOCAL_CACHE_MAX_AGE
+            and not cache_is_shared()
+        ):
+            self.invalidate()
+
+    def _shared_version(self):
+        version = cache.get(self.version_key)
+        if version is None:
+            # Kalit yo‘qolgan bo‘lsa (eviction/restart) eski versiya bilan to‘qnashmasligi uchun
+            cache.add(self.version_key, time.time_ns(), None)
+            version = cache.get(self.version_key)
+        return version
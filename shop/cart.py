@@ -0,0 +1,139 @@
+import time
+from dataclasses import dataclass
+from decimal import Decimal
+
+from .models import Product
+from .store_settings import get_store_settings
+
+CART_SESSION_KEY = 'cart'
+SUMMARY_SESSION_KEY = 'cart_summary'
+
+# Narx/zaxira o‘zgargan bo‘lsa ham summary shu vaqtdan keyin qayta hisoblanadi (sekund)
+SUMMARY_TTL = 300
+
+
+@dataclass(frozen=True, slots=True)
+class CartLine:
+    product_id: int
+    name: str
+    slug: str
+    image_url: str
+    unit_price: Decimal
+    quantity: int
+    stock: int
+
+    @property
+    def line_total(self):
+        return self.unit_price * self.quantity
+
+
+class CartSummary:
+    """Sessiyada saqlangan summary ning Decimal ko‘rinishi."""
+
+    def __init__(self, data):
+        self.lines = [
+            CartLine(**{**line, 'unit_price': Decimal(line['unit_price'])})
+            for line in data['lines']
+        ]
+        self.subtotal = Decimal(data['subtotal'])
+        self.item_count = sum(line.quantity for line in self.lines)
+        self.free_delivery_min = Decimal(data['free_delivery_min'])
+
+    @property
+    def free_delivery(self):
+        return self.subtotal >= self.free_delivery_min
+
+    @property
+    def amount_to_free_delivery(self):
+        return max(self.free_delivery_min - self.subtotal, Decimal('0'))
+
+
+class Cart:
+    """
+    ``request.session['cart']`` (``{"product_id": qty}``) ustidagi servis.
+
+    Summary (qator narxlari, subtotal, bepul yetkazish) sessiyada cache lanadi va faqat
+    savat o‘zgarganda yoki ``SUMMARY_TTL`` o‘tganda qayta hisoblanadi (1 ta so‘rov).
+    """
+
+    def __init__(self, request):
+        self.session = request.session
+        self.quantities = self.session.get(CART_SESSION_KEY, {})
+
+    def __bool__(self):
+        return bool(self.quantities)
+
+    def __len__(self):
+        return len(self.quantities)
+
+    @property
+    def count(self):
+        """Savatdagi jami dona (header badge uchun, so‘rovsiz)."""
+        return sum(int(qty) for qty in self.quantities.values())
+
+    def quantity(self, product_id):
+        return self.quantities.get(str(product_id), 0)
+
+    def add(self, product_id, quantity=1):
+        key = str(product_id)
+        self.quantities[key] = self.quantities.get(key, 0) + quantity
+        self._save()
+
+    def remove(self, product_id):
+        if self.quantities.pop(str(product_id), None) is not None:
+            self._save()
+
+    def clear(self):
+        self.quantities = {}
+        self.session[CART_SESSION_KEY] = {}
+        self.session.pop(SUMMARY_SESSION_KEY, None)
+
+    @property
+    def summary(self):
+        data = self.session.get(SUMMARY_SESSION_KEY)
+        if (
+            data is None
+            or data.get('items') != self.quantities
+            or time.time() - data.get('computed_at', 0) > SUMMARY_TTL
+        ):
+            data = self._compute_summary()
+            self.session[SUMMARY_SESSION_KEY] = data
+        return CartSummary(data)
+
+    def _save(self):
+        self.session[CART_SESSION_KEY] = self.quantities
+        self.session[SUMMARY_SESSION_KEY] = self._compute_summary()
+
+    def _compute_summary(self):
+        products = Product.objects.only(
+            'id', 'name', 'slug', 'image', 'price', 'discount_price', 'stock'
+        ).in_bulk([int(pid) for pid in self.quantities])
+        lines = []
+        subtotal = Decimal('0')
+        for pid, qty in self.quantities.items():
+            p = products.get(int(pid))
+            if p is None:
+                continue
+            qty = int(qty)
+            unit_price = p.get_discounted_price()
+            subtotal += unit_price * qty
+            lines.append({
+                'product_id': p.id,
+                'name': p.name,
+                'slug': p.slug,
+                'image_url': p.image.url if p.image else '',
+                'unit_price': str(unit_price),
+                'quantity': qty,
+                'stock': p.stock,
+            })
+
+        free_delivery_min = get_store_settings().free_delivery_min
+
+        # Session JSON serializer Decimal ni bilmaydi — string ko‘rinishida saqlaymiz
+        return {
+            'items': dict(self.quantities),
+            'lines': lines,
+            'subtotal': str(subtotal),
+            'free_delivery_min': str(free_delivery_min),
+            'computed_at': time.time(),
+        }
@@ -0,0 +1,98 @@
+from .caching import VersionedLocalCache
+from .models import Category
+
+
+class CategoryNode:
+    """Xotiradagi kategoriya tuguni (template uchun Category ga o‘xshash interfeys)."""
+
+    __slots__ = ('id', 'name', 'parent_id', 'depth', 'children', 'descendant_ids')
+
+    def __init__(self, id, name, parent_id):
+        self.id = id
+        self.name = name
+        self.parent_id = parent_id
+        self.depth = 0
+        self.children = []
+        self.descendant_ids = frozenset()
+
+    def __str__(self):
+        return self.name
+
+    def __repr__(self):
+        return f'<CategoryNode {self.id}: {self.name}>'
+
+
+class CategoryTree:
+    """Butun Category adjacency list idan bir marta qurilgan daraxt."""
+
+    def __init__(self, rows):
+        self.nodes = {pk: CategoryNode(pk, name, parent_id) for pk, name, parent_id in rows}
+        self.roots = []
+        for node in self.nodes.values():
+            parent = self.nodes.get(node.parent_id)
+            if parent is None:
+                self.roots.append(node)
+            else:
+                parent.children.append(node)
+
+        # Rekursiyasiz (chuqur daraxtlar uchun ham xavfsiz) depth va descendant_ids hisoblash
+        order = []
+        stack = [(root, 0) for root in reversed(self.roots)]
+        while stack:
+            node, depth = stack.pop()
+            node.depth = depth
+            order.append(node)
+            stack.extend((child, depth + 1) for child in reversed(node.children))
+        self._preorder = order
+        for node in reversed(order):
+            ids = {node.id}
+            for child in node.children:
+                ids |= child.descendant_ids
+            node.descendant_ids = frozenset(ids)
+
+    def get(self, category_id):
+        return self.nodes.get(category_id)
+
+    def descendant_ids(self, category_id):
+        """Kategoriya va uning barcha avlodlari id lari (kategoriya topilmasa — bo‘sh)."""
+        node = self.nodes.get(category_id)
+        return node.descendant_ids if node else frozenset()
+
+    def ancestors(self, category_id):
+        """Root dan boshlab kategoriyaning o‘zigacha bo‘lgan tugunlar ro‘yxati."""
+        chain = []
+        node = self.nodes.get(category_id)
+        while node is not None:
+            chain.append(node)
+            node = self.nodes.get(node.parent_id)
+        chain.reverse()
+        return chain
+
+    def walk(self):
+        """Barcha tugunlar daraxt tartibida (ota, keyin uning bolalari) — select/option lar uchun."""
+        return iter(self._preorder)
+
+    def __iter__(self):
+        return iter(self.roots)
+
+
+def build_category_tree():
+    rows = Category.objects.order_by('name').values_list('id', 'name', 'parent_id')
+    return CategoryTree(rows)
+
+
+# Umumiy cache da faqat versiya raqami saqlanadi; daraxtning o‘zi har bir process xotirasida
+_tree_cache = VersionedLocalCache('shop:category_tree:version', build_category_tree)
+
+
+def get_category_tree():
+    """Cache langan kategoriya daraxti: odatda bitta cache.get va 0 ta SQL so‘rov."""
+    return _tree_cache.get()
+
+
+def category_tree_version():
+    return _tree_cache.version()
+
+
+def invalidate_category_tree():
+    _tree_cache.invalidate()
@@ -0,0 +1,114 @@
+from django.db import transaction
+from django.db.models import Case, F, PositiveIntegerField, Value, When
+from django.db.models.functions import Now
+
+from .models import Order, OrderItem, Product
+from .tasks import send_order_confirmation
+
+
+class InsufficientStock(Exception):
+    """Savatdagi product omborda yetarli emas (yoki umuman mavjud emas)."""
+
+    def __init__(self, product_name, available):
+        self.product_name = product_name
+        self.available = available
+        super().__init__(f"{product_name} yetarli emas! Omborda: {available} ta")
+
+
+class EmptyCart(Exception):
+    """Savatda buyurtma qilinadigan (soni > 0, to‘g‘ri id li) product yo‘q."""
+
+    def __init__(self):
+        super().__init__("Savat bo‘sh")
+
+
+def cart_quantities(cart):
+    """Sessiyadagi ``{"id": qty}`` ni ``{id: qty}`` ga aylantiradi (0 va noto‘g‘ri qiymatlarsiz)."""
+    quantities = {}
+    for product_id, qty in cart.items():
+        try:
+            product_id, qty = int(product_id), int(qty)
+        except (TypeError, ValueError):
+            continue
+        if qty > 0:
+            quantities[product_id] = qty
+    return quantities
+
+
+class _StockShortage(Exception):
+    """Shartli UPDATE hamma qatorni yangilamadi — tranzaksiyani bekor qilish uchun."""
+
+
+def _quantity_case(quantities):
+    return Case(
+        *[When(id=product_id, then=Value(qty)) for product_id, qty in quantities.items()],
+        output_field=PositiveIntegerField(),
+    )
+
+
+def _find_shortage(quantities):
+    # UPDATE bekor qilingandan keyin chaqiriladi: yangilangan qatorlar zaxirasi allaqachon
+    # kamaytirilgan bo‘lsa, boshqa product aybdor chiqib, noto‘g‘ri "Omborda" soni ko‘rsatilardi
+    rows = {pk: (name, stock) for pk, name, stock in Product.objects.filter(id__in=quantities).values_list('id', 'name', 'stock')}
+    for product_id, qty in quantities.items():
+        name, available = rows.get(product_id, (f"Product #{product_id}", 0))
+        if available < qty:
+            return InsufficientStock(name, available)
+    # Parallel checkout zaxirani UPDATE va tekshiruv orasida o‘zgartirgan bo‘lishi mumkin
+    return InsufficientStock("Mahsulot", 0)
+
+
+def place_order(user, cart, address):
+    """
+    Buyurtma yaratadi va zaxirani kamaytiradi.
+
+    Zaxira bitta shartli UPDATE bilan kamaytiriladi
+    (``SET stock = stock - qty WHERE id IN (...) AND stock >= qty``): agar biror qator
+    yangilanmasa, tranzaksiya darhol bekor qilinadi va ``InsufficientStock`` ko‘tariladi
+    (qaysi product yetmasligi rollback dan keyingi haqiqiy zaxiradan aniqlanadi).
+    Buyurtma qatorlari (``OrderItem``) bitta ``bulk_create`` bilan yoziladi, shuning uchun row lock lar
+    product soniga bog‘liq bo‘lmagan 4 ta so‘rov davomida ushlab turiladi.
+    """
+    quantities = cart_quantities(cart)
+    if not quantities:
+        raise EmptyCart()
+
+    try:
+        with transaction.atomic():
+            qty_case = _quantity_case(quantities)
+            # updated_at — product sahifasi versiyasi ("Bazada yo‘q" holati o‘zgarishi mumkin)
+            updated = Product.objects.filter(id__in=quantities, stock__gte=qty_case).update(
+                stock=F('stock') - qty_case, updated_at=Now(),
+            )
+            if updated != len(quantities):
+                raise _StockShortage
+
+            products = list(Product.objects.filter(id__in=quantities).only('id', 'name', 'image', 'price', 'discount_price'))
+            total = sum(p.get_discounted_price() * quantities[p.id] for p in products)
+
+            order = Order.objects.create(
+                user=user,
+                total_price=total,
+                full_name=address['full_name'],
+                phone=address['phone'],
+                address=address['address'],
+                note=address.get('note', '')
+            )
+
+            OrderItem.objects.bulk_create([
+                OrderItem(
+                    order=order,
+                    product=p,
+                    name=p.name,
+                    image=p.image.url if p.image else "",
+                    price=p.get_discounted_price(),
+                    quantity=quantities[p.id]
+                )
+                for p in products
+            ])
+            # Commit dan keyin navbatga — email yuborish checkout javobini kutdirmaydi
+            send_order_confirmation.delay(order.id)
+    except _StockShortage:
+        raise _find_shortage(quantities) from None
+
+    return order
@@ -0,0 +1,15 @@
+from django.core.checks import Tags, Warning, register
+
+from .caching import cache_is_shared
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    if cache_is_shared():
+        return []
+    return [Warning(
+        "Default cache process ichida (LocMem/Dummy): kategoriya daraxti va StoreSettings "
+        "invalidatsiyasi boshqa worker larga faqat LOCAL_CACHE_MAX_AGE dan keyin yetib boradi.",
+        hint="CACHE_BACKEND ga umumiy backend bering (masalan, django.core.cache.backends.redis.RedisCache).",
+        id='shop.W001',
+    )]
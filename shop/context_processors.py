@@ -1,14 +1,14 @@
-from .models import Category
+from .cart import Cart
+from .category_tree import get_category_tree
 
 def categories_processor(request):
     return {
-        'categories': Category.objects.filter(parent__isnull=True)
+        'categories': get_category_tree().roots
     }
 
 
-# from .models import Category
-#
-# def categories_processor(request):
-#     return {
-#         'categories': Category.objects.all()
-#     }
+def cart_processor(request):
+    # Header badge va kartochkalardagi "Savatda: N" uchun — so‘rovsiz, faqat sessiya
+    return {
+        'shop_cart': Cart(request)
+    }
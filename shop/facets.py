@@ -0,0 +1,128 @@
+import json
+import time
+
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Q
+
+from .category_tree import category_tree_version, get_category_tree
+
+# ?attr.color=qora&attr.ram=16GB — bir kalitning bir nechta qiymati OR, turli kalitlar AND
+ATTR_PARAM_PREFIX = 'attr.'
+# Bitta kategoriya uchun ko‘rsatiladigan atributlar va har biridagi qiymatlar soni
+FACET_MAX_KEYS = 8
+FACET_MAX_VALUES = 15
+# Versiyali kalit bilan eskirgan facet hech qachon o‘qilmaydi — TTL faqat xotirani bo‘shatish uchun
+FACET_CACHE_TTL = 60 * 60 * 6
+
+
+# ===== Filtrlar =====
+def attribute_filters(params):
+    """GET parametrlaridan ``{kalit: [qiymat, ...]}`` (bo‘sh qiymatlar tashlanadi, tartib saqlanadi)."""
+    filters = {}
+    for name in params:
+        if not name.startswith(ATTR_PARAM_PREFIX) or len(name) == len(ATTR_PARAM_PREFIX):
+            continue
+        values = [value.strip() for value in params.getlist(name) if value.strip()]
+        if values:
+            filters[name[len(ATTR_PARAM_PREFIX):]] = list(dict.fromkeys(values))
+    return filters
+
+
+def _json_candidates(value):
+    """URL dagi matn JSON da string ham, son/bool ham bo‘lishi mumkin: "12" -> ["12", 12]."""
+    candidates = [value]
+    try:
+        parsed = json.loads(value)
+    except ValueError:
+        return candidates
+    if isinstance(parsed, (bool, int, float)):
+        candidates.append(parsed)
+    return candidates
+
+
+def filter_by_attributes(queryset, filters):
+    """
+    Har bir qiymat ``extra_data @> {"kalit": qiymat}`` (containment) ga aylanadi —
+    ``product_extra_data_idx`` (GIN, ``jsonb_path_ops``) shu operator uchun.
+    """
+    for key, values in filters.items():
+        condition = Q()
+        for value in values:
+            for candidate in _json_candidates(value):
+                condition |= Q(extra_data__contains={key: candidate})
+        queryset = queryset.filter(condition)
+    return queryset
+
+
+# ===== Facet lar =====
+FACET_SQL = """
+    SELECT kv.key, kv.value #>> '{}' AS value, COUNT(*) AS n
+    FROM shop_product p
+    CROSS JOIN LATERAL jsonb_each(
+        CASE WHEN jsonb_typeof(p.extra_data) = 'object' THEN p.extra_data ELSE '{}'::jsonb END
+    ) AS kv
+    WHERE p.is_active AND p.category_id = ANY(%s)
+      AND jsonb_typeof(kv.value) IN ('string', 'number', 'boolean')
+    GROUP BY 1, 2
+"""
+
+
+def compute_facets(category_ids):
+    """
+    ``[(kalit, [(qiymat, soni), ...]), ...]`` — kategoriya (avlodlari bilan) faol productlari
+    bo‘yicha bitta GROUP BY so‘rov. Ko‘p productda uchraydigan kalitlar avval.
+    """
+    if not category_ids:
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(FACET_SQL, [sorted(category_ids)])
+        rows = cursor.fetchall()
+
+    values_by_key = {}
+    for key, value, count in rows:
+        values_by_key.setdefault(key, []).append((value, count))
+
+    facets = []
+    for key, values in values_by_key.items():
+        values.sort(key=lambda item: (-item[1], item[0]))
+        facets.append((key, values[:FACET_MAX_VALUES], sum(count for _, count in values)))
+    facets.sort(key=lambda facet: (-facet[2], facet[0]))
+    return [(key, values) for key, values, _ in facets[:FACET_MAX_KEYS]]
+
+
+def _version_key(category_id):
+    return f'shop:facets:version:{category_id}'
+
+
+def _category_version(category_id):
+    version = cache.get(_version_key(category_id))
+    if version is None:
+        cache.add(_version_key(category_id), time.time_ns(), None)
+        version = cache.get(_version_key(category_id))
+    return version
+
+
+def get_category_facets(category_id):
+    """Cache langan facet lar: kalitda kategoriya daraxti versiyasi va shu kategoriya versiyasi."""
+    key = f'shop:facets:{category_id}:{category_tree_version()}:{_category_version(category_id)}'
+    facets = cache.get(key)
+    if facets is None:
+        facets = compute_facets(get_category_tree().descendant_ids(category_id))
+        cache.set(key, facets, FACET_CACHE_TTL)
+    return facets
+
+
+def invalidate_facets(category_ids):
+    """Product lari o‘zgargan kategoriyalar va ularning ota kategoriyalari facet larini eskirtiradi."""
+    tree = get_category_tree()
+    affected = set()
+    for category_id in category_ids:
+        affected.add(category_id)
+        affected.update(node.id for node in tree.ancestors(category_id))
+    for category_id in affected:
+        try:
+            cache.incr(_version_key(category_id))
+        except ValueError:
+            pass  # versiya hali yo‘q — birinchi o‘qishda yaratiladi
+
@@ -0,0 +1,154 @@
+import hashlib
+import logging
+from collections import defaultdict
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, close_old_connections, transaction
+
+from PIL import Image, ImageOps
+
+from .models import ImageDerivative
+
+try:
+    # HEIC/HEIF (iPhone) originallar uchun — o‘rnatilmagan bo‘lsa ular original holida beriladi
+    from pillow_heif import register_heif_opener
+except ImportError:
+    register_heif_opener = None
+else:
+    register_heif_opener()
+
+logger = logging.getLogger('shop.images')
+
+DERIVATIVE_DIR = 'derivatives'
+SAVE_OPTIONS = {
+    ImageDerivative.WEBP: {'format': 'WEBP', 'quality': 80, 'method': 4},
+    ImageDerivative.JPEG: {'format': 'JPEG', 'quality': 82, 'optimize': True, 'progressive': True},
+}
+# Tartib muhim: <picture> da birinchi mos <source> tanlanadi
+DERIVATIVE_FORMATS = (ImageDerivative.WEBP, ImageDerivative.JPEG)
+
+
+def derivative_widths():
+    return tuple(sorted(getattr(settings, 'IMAGE_DERIVATIVE_WIDTHS', (160, 320, 640, 1280))))
+
+
+# ===== Yaratish =====
+EXIF_ORIENTATION = 0x0112
+ROTATED = (5, 6, 7, 8)  # exif_transpose eni va bo‘yini almashtiradigan orientatsiyalar
+
+
+def _target_widths(original_width):
+    """Kattalashtirmaymiz: originaldan katta kengliklar o‘rniga original kengligining o‘zi."""
+    widths = [w for w in derivative_widths() if w < original_width]
+    if len(widths) < len(derivative_widths()):
+        widths.append(original_width)
+    return widths
+
+
+def _expected(original_width):
+    return {(width, fmt) for width in _target_widths(original_width) for fmt in DERIVATIVE_FORMATS}
+
+
+def _encode(image, fmt):
+    buffer = BytesIO()
+    if fmt == ImageDerivative.JPEG and image.mode != 'RGB':
+        image = image.convert('RGB')
+    image.save(buffer, **SAVE_OPTIONS[fmt])
+    return buffer.getvalue()
+
+
+def generate_derivatives(name, force=False):
+    """
+    ``name`` (storage dagi original) uchun derivativlarni yaratadi. Fayl nomi — kontent sha256
+    hash i: ``derivatives/ab/abcd…_320.webp``. Har bir kutilgan (kenglik, format) bor bo‘lsa
+    original decode qilinmaydi (kichik originalda faqat header o‘qiladi);
+    ``force`` — to‘plam to‘liq ko‘rinsa ham qayta tekshirish.
+    Yaratilganlar sonini qaytaradi.
+    """
+    if not name:
+        return 0
+    existing = set(ImageDerivative.objects.filter(source=name).values_list('width', 'format'))
+    if not force and _expected(max(derivative_widths()) + 1) <= existing:
+        return 0  # sozlamadagi hamma kenglik bor — original qanday bo‘lsa ham to‘plam to‘liq
+
+    try:
+        with default_storage.open(name, 'rb') as f:
+            image = Image.open(f)  # lazy: hozircha faqat header
+            width = image.height if image.getexif().get(EXIF_ORIENTATION) in ROTATED else image.width
+            if not force and _expected(width) <= existing:
+                return 0
+            image = ImageOps.exif_transpose(image)  # telefon rasmlari aylangan bo‘lmasin
+            image.load()
+    except (OSError, ValueError, Image.DecompressionBombError) as e:
+        logger.warning("Rasmni o‘qib bo‘lmadi: %s (%s)", name, e)
+        return 0
+
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'transparency' in image.info or image.mode in ('LA', 'PA') else 'RGB')
+
+    created = 0
+    for width in _target_widths(image.width):
+        todo = [fmt for fmt in DERIVATIVE_FORMATS if (width, fmt) not in existing]
+        if not todo:
+            continue
+        height = max(1, round(image.height * width / image.width))
+        resized = image if width == image.width else image.resize((width, height), Image.Resampling.LANCZOS)
+        for fmt in todo:
+            data = _encode(resized, fmt)
+            digest = hashlib.sha256(data).hexdigest()
+            path = f"{DERIVATIVE_DIR}/{digest[:2]}/{digest[:32]}_{width}.{fmt.replace('jpeg', 'jpg')}"
+            if not default_storage.exists(path):
+                path = default_storage.save(path, ContentFile(data))
+            try:
+                # Savepoint: vazifa tranzaksiyasi ichida xato butun tranzaksiyani "aborted" qilmasin
+                with transaction.atomic():
+                    ImageDerivative.objects.create(
+                        source=name, width=width, height=height, format=fmt, file=path,
+                    )
+            except IntegrityError:
+                continue  # boshqa worker allaqachon yaratgan
+            created += 1
+    return created
+
+
+def process_image(name, force=False):
+    """``generate_derivatives`` alohida thread da (backfill): o‘z DB ulanishi, xatolar log ga."""
+    close_old_connections()
+    try:
+        return generate_derivatives(name, force=force)
+    except Exception:
+        logger.exception("Derivativ yaratishda xato: %s", name)
+        return 0
+    finally:
+        close_old_connections()
+
+
+# ===== O‘qish (template lar uchun) =====
+def load_derivatives(names):
+    """``{source: {format: [(width, url), ...]}}`` — bitta so‘rov bilan, kenglik bo‘yicha tartiblangan."""
+    result = defaultdict(lambda: defaultdict(list))
+    names = {name for name in names if name}
+    if not names:
+        return {}
+    rows = (
+        ImageDerivative.objects.filter(source__in=names)
+        .order_by('width')
+        .values_list('source', 'format', 'width', 'file')
+    )
+    for source, fmt, width, file in rows:
+        result[source][fmt].append((width, default_storage.url(file)))
+    return {source: dict(variants) for source, variants in result.items()}
+
+
+def attach_derivatives(files):
+    """
+    Har bir FieldFile ga ``.derivatives`` qo‘yadi (hammasi bitta so‘rov bilan) —
+    ``{% responsive_image %}`` tegi shunda qo‘shimcha so‘rov yubormaydi.
+    """
+    files = [file for file in files if file]
+    derivatives = load_derivatives(file.name for file in files)
+    for file in files:
+        file.derivatives = derivatives.get(file.name, {})
@@ -0,0 +1,147 @@
+import contextvars
+import logging
+import threading
+import time
+from collections import deque
+
+from django.template.base import Template
+
+logger = logging.getLogger('shop.instrumentation')
+
+_current = contextvars.ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    """Bitta so‘rov davomidagi SQL soni, DB vaqti va template render vaqti (ms)."""
+
+    def __init__(self):
+        self.query_count = 0
+        self.db_ms = 0.0
+        self.template_ms = 0.0
+        self.total_ms = 0.0
+        self._template_depth = 0
+        self._template_db_ms = 0.0
+
+    @property
+    def render_ms(self):
+        # Template ichida lazy queryset lar bajargan SQL vaqti db ga kiradi, render ga emas
+        return max(self.template_ms - self._template_db_ms, 0.0)
+
+    def server_timing(self):
+        return ', '.join([
+            f'db;dur={self.db_ms:.1f};desc="{self.query_count} queries"',
+            f'tpl;dur={self.render_ms:.1f}',
+            f'total;dur={self.total_ms:.1f}',
+        ])
+
+    def as_dict(self):
+        return {
+            'queries': self.query_count,
+            'db_ms': round(self.db_ms, 2),
+            'template_ms': round(self.render_ms, 2),
+            'total_ms': round(self.total_ms, 2),
+        }
+
+
+def current_metrics():
+    return _current.get()
+
+
+# Tranzaksiya boshqaruvi: tashqi atomic() ning BEGIN/COMMIT i execute_wrapper dan o‘tmaydi, ichkisi esa
+# SAVEPOINT bo‘ladi (testlarda TestCase tranzaksiyasi ichida tashqisi ham) — soniga qo‘shilmaydi, vaqtiga qo‘shiladi
+TRANSACTION_CONTROL_PREFIXES = ('SAVEPOINT ', 'RELEASE SAVEPOINT ', 'ROLLBACK TO SAVEPOINT ')
+
+
+class QueryTimer:
+    """``connection.execute_wrapper`` uchun: har bir SQL ni sanaydi va vaqtini o‘lchaydi."""
+
+    def __init__(self, metrics):
+        self.metrics = metrics
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            if not sql.startswith(TRANSACTION_CONTROL_PREFIXES):
+                self.metrics.query_count += 1
+            self.metrics.db_ms += elapsed
+            if self.metrics._template_depth:
+                self.metrics._template_db_ms += elapsed
+
+
+_template_timer_installed = False
+
+
+def install_template_timer():
+    """Template.render ni bir marta o‘rab oladi; faqat eng tashqi render vaqti hisoblanadi."""
+    global _template_timer_installed
+    if _template_timer_installed:
+        return
+    original_render = Template.render
+
+    def timed_render(self, context):
+        metrics = _current.get()
+        if metrics is None:
+            return original_render(self, context)
+        metrics._template_depth += 1
+        start = time.perf_counter()
+        try:
+            return original_render(self, context)
+        finally:
+            metrics._template_depth -= 1
+            if not metrics._template_depth:
+                metrics.template_ms += (time.perf_counter() - start) * 1000
+
+    Template.render = timed_render
+    _template_timer_installed = True
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class ViewStats:
+    """Har bir view bo‘yicha oxirgi ``maxlen`` ta so‘rov metrikalari (process xotirasida)."""
+
+    def __init__(self, maxlen=500):
+        self.maxlen = maxlen
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, view_name, metrics):
+        sample = (metrics.query_count, metrics.db_ms, metrics.render_ms, metrics.total_ms)
+        with self._lock:
+            self._samples.setdefault(view_name, deque(maxlen=self.maxlen)).append(sample)
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+
+    def snapshot(self):
+        with self._lock:
+            samples = {name: list(values) for name, values in self._samples.items()}
+
+        result = {}
+        for name, values in sorted(samples.items()):
+            queries = sorted(v[0] for v in values)
+            db = sorted(v[1] for v in values)
+            total = sorted(v[3] for v in values)
+            result[name] = {
+                'requests': len(values),
+                'queries_p50': _percentile(queries, 50),
+                'queries_max': queries[-1],
+                'db_ms_p50': round(_percentile(db, 50), 2),
+                'db_ms_p95': round(_percentile(db, 95), 2),
+                'total_ms_p50': round(_percentile(total, 50), 2),
+                'total_ms_p95': round(_percentile(total, 95), 2),
+                'total_ms_p99': round(_percentile(total, 99), 2),
+            }
+        return result
+
+
+view_stats = ViewStats()
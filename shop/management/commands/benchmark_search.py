@@ -0,0 +1,98 @@
+import json
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from shop.models import Category, Product
+from shop.pagination import keyset_paginate
+from shop.search import legacy_search_products, search_products, update_search_vectors
+
+WORDS = [
+    'telefon', 'smartfon', 'noutbuk', 'planshet', 'televizor', 'quloqchin', 'kamera', 'soat',
+    'samsung', 'apple', 'xiaomi', 'huawei', 'lenovo', 'asus', 'sony', 'artel',
+    'qora', 'oq', 'kumush', 'ko‘k', 'pro', 'max', 'lite', 'ultra', 'mini', 'plus',
+]
+COLORS = ['qora', 'oq', 'kumush', 'qizil', 'yashil']
+DEFAULT_QUERIES = ['samsung', 'qora telefon', 'noutbuk pro', 'xiomi', 'ultra']
+
+
+class Command(BaseCommand):
+    help = "Eski icontains qidiruv va full-text qidiruvni solishtiradi (ixtiyoriy sintetik katalog bilan)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--synthetic', type=int, default=0,
+                            help="Shuncha sintetik product yaratiladi va oxirida rollback qilinadi")
+        parser.add_argument('--query', action='append', dest='queries')
+        parser.add_argument('--repeat', type=int, default=10)
+        parser.add_argument('--per-page', type=int, default=12)
+        parser.add_argument('--json', action='store_true', help="Natijani JSON ko‘rinishida chiqarish")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            if options['synthetic']:
+                self._generate(options['synthetic'])
+            results = self._run(options['queries'] or DEFAULT_QUERIES, options['repeat'], options['per_page'])
+            transaction.set_rollback(True)
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        for row in results:
+            self.stdout.write(
+                f"{row['query']!r:20} {row['engine']:8} "
+                f"median={row['median_ms']:8.2f}ms p95={row['p95_ms']:8.2f}ms hits={row['hits']}"
+            )
+
+    def _generate(self, count):
+        rng = random.Random(42)
+        category = Category.objects.create(name=f'benchmark-{time.time_ns()}')
+        batch = []
+        for i in range(count):
+            name = ' '.join(rng.sample(WORDS, 3)).title()
+            batch.append(Product(
+                name=name,
+                slug=f'bench-{category.id}-{i}',
+                category=category,
+                description=' '.join(rng.choices(WORDS, k=20)),
+                price=rng.randint(10, 5000),
+                stock=rng.randint(0, 100),
+                extra_data={'color': rng.choice(COLORS), 'ram': f'{rng.choice([4, 8, 16, 32])}GB'},
+                average_rating=rng.uniform(0, 5),
+                review_count=rng.randint(0, 500),
+            ))
+            if len(batch) == 5000:
+                Product.objects.bulk_create(batch)
+                batch = []
+        Product.objects.bulk_create(batch)
+        update_search_vectors(Product.objects.filter(category=category))
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {Product._meta.db_table}')
+
+    def _run(self, queries, repeat, per_page):
+        base = Product.objects.filter(is_active=True)
+        engines = {
+            'icontains': lambda q: (legacy_search_products(base, q), ('-average_rating', '-review_count', '-created_at', '-id')),
+            'fts': lambda q: search_products(base, q),
+        }
+        results = []
+        for query in queries:
+            for engine, search in engines.items():
+                timings = []
+                hits = 0
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    queryset, ordering = search(query)
+                    hits = len(keyset_paginate(queryset, ordering, per_page))
+                    timings.append((time.perf_counter() - start) * 1000)
+                timings.sort()
+                results.append({
+                    'query': query,
+                    'engine': engine,
+                    'median_ms': statistics.median(timings),
+                    'p95_ms': timings[min(len(timings) - 1, int(len(timings) * 0.95))],
+                    'hits': hits,
+                })
+        return results
@@ -0,0 +1,211 @@
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import DateTimeField, ExpressionWrapper, Value
+from django.db.models.functions import Now, Random
+from django.utils import timezone
+
+from shop.models import Category, Order, OrderItem, Product, ProductReview
+from user.models import CustomUser
+
+BRANDS = ['Samsung', 'Apple', 'Xiaomi', 'Huawei', 'Lenovo', 'Asus', 'Sony', 'Artel', 'Honor', 'Acer']
+NOUNS = ['telefon', 'smartfon', 'noutbuk', 'planshet', 'televizor', 'quloqchin', 'kamera', 'soat',
+         'kolonka', 'monitor', 'printer', 'sichqoncha', 'klaviatura', 'router', 'muzlatgich']
+SUFFIXES = ['Pro', 'Max', 'Lite', 'Ultra', 'Mini', 'Plus', 'Neo', 'X', 'S', 'Air']
+COLORS = ['qora', 'oq', 'kumush', 'qizil', 'yashil', 'ko‘k']
+WORDS = ['sifatli', 'tez', 'yengil', 'kuchli', 'batareya', 'ekran', 'xotira', 'kafolat',
+         'chiroyli', 'arzon', 'zamonaviy', 'qulay', 'ishonchli', 'yangi', 'model']
+COMMENTS = ['Zo‘r mahsulot', 'Narxiga arziydi', 'Yetkazib berish tez bo‘ldi', 'Sifati o‘rtacha',
+            'Tavsiya qilaman', 'Kutganimdek emas', 'Juda yoqdi', 'Qadoqlash yaxshi']
+STATUSES = [choice for choice, _ in Order.STATUS_CHOICES]
+# Haqiqiy do‘kondagidek: baholar 4-5 ga og‘gan
+STAR_WEIGHTS = [3, 4, 10, 30, 53]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark uchun sintetik katalog yaratadi: chuqur kategoriya daraxti, productlar, "
+        "userlar, reviewlar va buyurtmalar (bulk_create bilan)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=100_000)
+        parser.add_argument('--users', type=int, default=5_000)
+        parser.add_argument('--reviews', type=int, default=200_000)
+        parser.add_argument('--orders', type=int, default=100_000)
+        parser.add_argument('--category-depth', type=int, default=4)
+        parser.add_argument('--category-branching', type=int, default=4)
+        parser.add_argument('--days', type=int, default=365, help="created_at shuncha kun ichida taqsimlanadi")
+        parser.add_argument('--batch-size', type=int, default=5_000)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.days = options['days']
+        # Har bir ishga tushirish o‘z prefiksi bilan — unikal maydonlar to‘qnashmaydi
+        self.tag = f'gen{time.time_ns() // 1_000_000 % 10**9}'
+
+        started = time.perf_counter()
+        with transaction.atomic():
+            leaf_ids = self._create_categories(options['category_depth'], options['category_branching'])
+            products = self._create_products(options['products'], leaf_ids)
+            user_ids = self._create_users(options['users'])
+            self._create_reviews(options['reviews'], user_ids, [p[0] for p in products])
+            self._create_orders(options['orders'], user_ids, products)
+
+        # bulk_create save()/signal larni chetlab o‘tadi — denormalizatsiyalarni alohida hisoblaymiz
+        self.stdout.write("search_vector va rating agregatlari hisoblanmoqda...")
+        call_command('rebuild_search_index', missing_only=True, batch_size=self.batch_size, stdout=self.stdout)
+        call_command('rebuild_ratings', batch_size=self.batch_size, stdout=self.stdout)
+
+        with connection.cursor() as cursor:
+            for model in (Category, Product, CustomUser, ProductReview, Order, OrderItem):
+                cursor.execute(f'ANALYZE {model._meta.db_table}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Tayyor ({self.tag}): {time.perf_counter() - started:.1f}s"
+        ))
+
+    # ===== Helpers =====
+    def _bulk(self, model, objects):
+        created = []
+        for start in range(0, len(objects), self.batch_size):
+            created.extend(model.objects.bulk_create(objects[start:start + self.batch_size]))
+        return created
+
+    def _spread_created_at(self, model, ids):
+        # auto_now_add bulk_create da ham "hozir" ni yozadi — vaqtni oxirgi N kunga tarqatamiz
+        spread = ExpressionWrapper(
+            Now() - Random() * Value(timedelta(days=self.days)),
+            output_field=DateTimeField(),
+        )
+        for start in range(0, len(ids), self.batch_size):
+            model.objects.filter(id__in=ids[start:start + self.batch_size]).update(created_at=spread)
+
+    def _random_created_at(self, now):
+        return now - timedelta(seconds=self.rng.uniform(0, self.days * 86400))
+
+    # ===== Generators =====
+    def _create_categories(self, depth, branching):
+        # Nomlar "1", "1.2", "1.2.3" ko‘rinishidagi yo‘l (Category.name unikal)
+        level = [(None, '')]
+        for _ in range(depth):
+            children = [
+                (Category(name=f'{self.tag} {path}{i + 1}', parent=parent), f'{path}{i + 1}.')
+                for parent, path in level
+                for i in range(branching)
+            ]
+            self._bulk(Category, [category for category, _ in children])
+            level = children
+        leaf_ids = [category.id for category, _ in level]
+        self.stdout.write(f"Kategoriyalar: {len(leaf_ids)} ta barg, chuqurlik {depth}")
+        return leaf_ids
+
+    def _create_products(self, count, leaf_ids):
+        rng = self.rng
+        created = []
+        batch = []
+        for i in range(count):
+            brand, noun = rng.choice(BRANDS), rng.choice(NOUNS)
+            name = f'{brand} {noun} {rng.choice(SUFFIXES)} {rng.randint(1, 99)}'
+            price = rng.randint(50, 5_000) * 1000  # Order.total_price max_digits=10 ga sig‘sin
+            batch.append(Product(
+                name=name,
+                slug=f'{self.tag}-{i}',
+                category_id=rng.choice(leaf_ids),
+                description=' '.join(rng.choices(WORDS, k=rng.randint(10, 40))),
+                price=price,
+                discount_price=price * rng.choice([80, 90, 95]) // 100 if rng.random() < 0.2 else None,
+                stock=rng.randint(0, 200),
+                is_active=rng.random() < 0.95,
+                extra_data={
+                    'brand': brand,
+                    'color': rng.choice(COLORS),
+                    'ram': f'{rng.choice([2, 4, 8, 16, 32])}GB',
+                    'warranty_months': rng.choice([6, 12, 24]),
+                },
+            ))
+            if len(batch) == self.batch_size or i == count - 1:
+                # Faqat buyurtma snapshotlari uchun kerakli ma'lumot xotirada qoladi
+                created.extend(
+                    (p.id, p.name, p.get_discounted_price()) for p in Product.objects.bulk_create(batch)
+                )
+                batch = []
+        self._spread_created_at(Product, [p[0] for p in created])
+        self.stdout.write(f"Productlar: {len(created)}")
+        return created
+
+    def _create_users(self, count):
+        password = make_password('benchmark')  # hash bir marta hisoblanadi
+        users = self._bulk(CustomUser, [
+            CustomUser(
+                username=f'{self.tag}_user{i}',
+                email=f'{self.tag}_user{i}@example.com',
+                first_name=f'User{i}',
+                last_name=self.rng.choice(BRANDS),
+                password=password,
+                phone_number=f'+9989{self.rng.randint(10_000_000, 99_999_999)}',
+            )
+            for i in range(count)
+        ])
+        self.stdout.write(f"Userlar: {len(users)}")
+        return [u.id for u in users]
+
+    def _create_reviews(self, count, user_ids, product_ids):
+        if not user_ids or not product_ids:
+            return
+        rng = self.rng
+        now = timezone.now()
+        # Ommabop productlar ko‘proq review oladi (taqsimot "uzun dum" ga o‘xshasin)
+        popular = product_ids[:max(1, len(product_ids) // 10)]
+        created = 0
+        batch = []
+        for i in range(count):
+            batch.append(ProductReview(
+                user_id=rng.choice(user_ids),
+                product_id=rng.choice(popular) if rng.random() < 0.5 else rng.choice(product_ids),
+                comment=rng.choice(COMMENTS),
+                stars_given=rng.choices(range(1, 6), weights=STAR_WEIGHTS)[0],
+                created_at=self._random_created_at(now),
+            ))
+            if len(batch) == self.batch_size or i == count - 1:
+                created += len(ProductReview.objects.bulk_create(batch))
+                batch = []
+        self.stdout.write(f"Reviewlar: {created}")
+
+    def _create_orders(self, count, user_ids, products):
+        if not user_ids or not products:
+            return
+        rng = self.rng
+        order_ids = []
+        for start in range(0, count, self.batch_size):
+            orders = []
+            lines = []
+            for _ in range(min(self.batch_size, count - start)):
+                picked = rng.sample(products, k=min(len(products), rng.choices([1, 2, 3, 4, 5], [40, 25, 15, 12, 8])[0]))
+                quantities = [(p, rng.randint(1, 3)) for p in picked]
+                orders.append(Order(
+                    user_id=rng.choice(user_ids),
+                    total_price=sum(p[2] * qty for p, qty in quantities),
+                    full_name=f'Mijoz {rng.randint(1, 99999)}',
+                    phone=f'+9989{rng.randint(10_000_000, 99_999_999)}',
+                    address=f'Toshkent, {rng.randint(1, 300)}-uy',
+                    status=rng.choice(STATUSES),
+                ))
+                lines.append(quantities)
+
+            orders = Order.objects.bulk_create(orders)
+            OrderItem.objects.bulk_create([
+                OrderItem(order_id=order.id, product_id=p[0], name=p[1], image='', price=p[2], quantity=qty)
+                for order, quantities in zip(orders, lines) for p, qty in quantities
+            ])
+            order_ids.extend(order.id for order in orders)
+
+        self._spread_created_at(Order, order_ids)
+        self.stdout.write(f"Buyurtmalar: {len(order_ids)}")
@@ -0,0 +1,34 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from shop.images import process_image
+from shop.models import ImageDerivative, Product, ProductImage
+from user.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = "Mavjud rasmlar uchun thumbnail/WebP/JPEG derivativlarni yaratadi (yuklashdan oldingi rasmlar uchun)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--force', action='store_true', help="Derivativi bor rasmlarni ham tekshirish")
+
+    def handle(self, *args, **options):
+        sources = [
+            Product.objects.values_list('image', flat=True),
+            ProductImage.objects.values_list('image', flat=True),
+            CustomUser.objects.values_list('profile_picture', flat=True),
+        ]
+        names = set()
+        for queryset in sources:
+            names.update(queryset.distinct())
+        names.discard('')
+        names.discard(None)
+        if not options['force']:
+            names -= set(ImageDerivative.objects.values_list('source', flat=True).distinct())
+
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            created = sum(pool.map(lambda name: process_image(name, options['force']), sorted(names)))
+
+        self.stdout.write(self.style.SUCCESS(f"{len(names)} ta rasm tekshirildi, {created} ta derivativ yaratildi."))
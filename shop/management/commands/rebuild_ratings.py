@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from shop.models import Product
+from shop.ratings import rebuild_ratings
+
+
+class Command(BaseCommand):
+    help = "review_count / rating_sum / average_rating ni ProductReview dan qayta hisoblaydi"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        last_id = 0
+        updated = 0
+        while True:
+            ids = list(
+                Product.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            updated += rebuild_ratings(Product.objects.filter(id__in=ids))
+            last_id = ids[-1]
+
+        self.stdout.write(self.style.SUCCESS(f"{updated} ta product agregatlari yangilandi."))
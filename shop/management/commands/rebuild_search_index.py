@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from shop.models import Product
+from shop.search import update_search_vectors
+
+
+class Command(BaseCommand):
+    help = "Product.search_vector ni qayta hisoblaydi (bulk_create/update() dan keyin kerak bo‘ladi)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--missing-only', action='store_true', help="Faqat search_vector bo‘sh bo‘lganlar")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        products = Product.objects.all()
+        if options['missing_only']:
+            products = products.filter(search_vector__isnull=True)
+
+        # id oralig‘i bo‘yicha bo‘lib yangilaymiz — bitta ulkan UPDATE jadvalni uzoq band qilmasin
+        last_id = 0
+        updated = 0
+        while True:
+            ids = list(
+                products.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            updated += update_search_vectors(Product.objects.filter(id__in=ids))
+            last_id = ids[-1]
+
+        self.stdout.write(self.style.SUCCESS(f"{updated} ta product indekslandi."))
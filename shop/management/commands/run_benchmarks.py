@@ -0,0 +1,231 @@
+import json
+import platform
+import random
+import statistics
+import subprocess
+import time
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from shop.instrumentation import QueryTimer, RequestMetrics
+from shop.models import Category, Order, Product, ProductReview
+from user.models import CustomUser
+
+DEFAULT_SCENARIOS = [
+    'home', 'home_category', 'home_search', 'home_page2', 'product_detail', 'cart_view',
+    'checkout_confirm', 'checkout_place', 'my_orders',
+    'dashboard_home', 'products_list', 'orders_list', 'users_list', 'reviews_list',
+]
+
+
+def _percentile(sorted_values, pct):
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class Command(BaseCommand):
+    help = (
+        "Asosiy sahifalarni test Client orqali o‘lchaydi (SQL soni, p50/p90/p99 ms) va natijani "
+        "commitlarni solishtirish uchun JSON ko‘rinishida chiqaradi. Bazaga yozilgan hamma narsa rollback qilinadi."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=30)
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument('--scenario', action='append', dest='scenarios', choices=DEFAULT_SCENARIOS)
+        parser.add_argument('--output', help="JSON faylga yozish (aks holda stdout ga)")
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        scenarios = options['scenarios'] or DEFAULT_SCENARIOS
+
+        try:
+            setup_test_environment()
+            owns_test_environment = True
+        except RuntimeError:
+            # Test runner ichidan chaqirilgan (smoke test) — muhit allaqachon sozlangan
+            owns_test_environment = False
+        try:
+            with transaction.atomic():
+                self._prepare()
+                results = {
+                    name: self._measure(name, options['warmup'], options['repeat'])
+                    for name in scenarios
+                }
+                transaction.set_rollback(True)
+        finally:
+            if owns_test_environment:
+                teardown_test_environment()
+
+        report = {
+            'meta': self._meta(options),
+            'dataset': self._dataset(),
+            'results': results,
+        }
+        payload = json.dumps(report, indent=2, ensure_ascii=False)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as fh:
+                fh.write(payload)
+            for name, row in results.items():
+                self.stdout.write(
+                    f"{name:18} queries={row['queries_max']:3} "
+                    f"p50={row['p50_ms']:8.2f}ms p90={row['p90_ms']:8.2f}ms p99={row['p99_ms']:8.2f}ms"
+                )
+        else:
+            self.stdout.write(payload)
+
+    # ===== Fixture =====
+    def _prepare(self):
+        products = list(
+            Product.objects.filter(is_active=True, stock__gte=50)
+            .order_by('-review_count')
+            .values_list('id', 'slug')[:50]
+        )
+        if not products:
+            raise CommandError("Katalog bo‘sh — avval `manage.py generate_catalog` ni ishga tushiring.")
+
+        # Eng ko‘p buyurtmasi bor user — my_orders eng og‘ir holatda o‘lchanadi
+        customer_id = (
+            Order.objects.values('user').order_by().annotate(n=Count('id'))
+            .order_by('-n').values_list('user', flat=True).first()
+        )
+        self.customer = CustomUser.objects.get(pk=customer_id) if customer_id else \
+            CustomUser.objects.create_user(username=f'bench_customer_{time.time_ns()}', password='x')
+        self.staff = CustomUser.objects.create_user(
+            username=f'bench_staff_{time.time_ns()}', password='x', is_staff=True, is_superuser=True
+        )
+
+        self.product_slugs = [slug for _, slug in products]
+        self.cart = {str(pk): 1 for pk, _ in self.rng.sample(products, k=min(5, len(products)))}
+        self.category_id = (
+            Category.objects.filter(parent__isnull=True).values_list('id', flat=True).first()
+        )
+
+        self.anonymous = Client()
+        self.customer_client = self._client(self.customer)
+        self.staff_client = self._client(self.staff)
+
+        # 2-sahifa cursori
+        response = self.anonymous.get('/')
+        self.page2_cursor = getattr(response.context['page'], 'next_cursor', None) if response.context else None
+
+    def _client(self, user):
+        client = Client()
+        client.force_login(user)
+        session = client.session
+        session['cart'] = dict(self.cart)
+        session['checkout_address'] = {
+            'full_name': 'Benchmark', 'phone': '+998901234567', 'address': 'Toshkent', 'note': '',
+        }
+        session.save()
+        return client
+
+    # ===== Scenarios =====
+    def _request(self, name):
+        if name == 'home':
+            return self.anonymous.get('/')
+        if name == 'home_category':
+            return self.anonymous.get('/', {'category': self.category_id or ''})
+        if name == 'home_search':
+            return self.anonymous.get('/', {'q': self.rng.choice(['samsung', 'noutbuk pro', 'qora telefon'])})
+        if name == 'home_page2':
+            return self.anonymous.get('/', {'after': self.page2_cursor or ''})
+        if name == 'product_detail':
+            slug = self.rng.choice(self.product_slugs)
+            return self.anonymous.get(reverse('shop:product_detail', args=[slug]))
+        if name == 'cart_view':
+            return self.customer_client.get(reverse('shop:cart_view'))
+        if name == 'checkout_confirm':
+            return self.customer_client.get(reverse('shop:checkout_confirm'))
+        if name == 'checkout_place':
+            # Buyurtma va zaxira o‘zgarishlari savepoint bilan bekor qilinadi — har safar bir xil holat
+            with transaction.atomic():
+                response = self.customer_client.post(reverse('shop:checkout_confirm'))
+                transaction.set_rollback(True)
+            return response
+        if name == 'my_orders':
+            return self.customer_client.get(reverse('shop:my_orders'))
+
+        urls = {
+            'dashboard_home': 'admin_dashboard:dashboard_home',
+            'products_list': 'admin_dashboard:products_list',
+            'orders_list': 'admin_dashboard:orders_list',
+            'users_list': 'admin_dashboard:users_list',
+            'reviews_list': 'admin_dashboard:reviews_list',
+        }
+        return self.staff_client.get(reverse(urls[name]))
+
+    def _measure(self, name, warmup, repeat):
+        for _ in range(warmup):
+            self._request(name)
+
+        timings = []
+        db_timings = []
+        queries = []
+        status = None
+        for _ in range(repeat):
+            # CaptureQueriesContext emas: connection.queries 9000 ta bilan cheklangan, N+1 sahifalarda noto‘g‘ri sanaydi
+            metrics = RequestMetrics()
+            with connection.execute_wrapper(QueryTimer(metrics)):
+                start = time.perf_counter()
+                response = self._request(name)
+                timings.append((time.perf_counter() - start) * 1000)
+            queries.append(metrics.query_count)
+            db_timings.append(metrics.db_ms)
+            status = response.status_code
+
+        timings.sort()
+        return {
+            'status': status,
+            'requests': repeat,
+            'queries_min': min(queries),
+            'queries_max': max(queries),
+            'db_ms_p50': round(statistics.median(db_timings), 2),
+            'mean_ms': round(statistics.fmean(timings), 2),
+            'p50_ms': round(_percentile(timings, 50), 2),
+            'p90_ms': round(_percentile(timings, 90), 2),
+            'p99_ms': round(_percentile(timings, 99), 2),
+        }
+
+    # ===== Report =====
+    def _meta(self, options):
+        try:
+            commit = subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, cwd=settings.BASE_DIR,
+            ).stdout.strip() or None
+        except OSError:
+            commit = None
+        return {
+            'commit': commit,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'repeat': options['repeat'],
+            'warmup': options['warmup'],
+            'seed': options['seed'],
+        }
+
+    def _dataset(self):
+        # pg_class.reltuples — katta jadvallarda COUNT(*) dan ancha arzon (ANALYZE dan keyingi taxmin)
+        models = {
+            'categories': Category, 'products': Product, 'reviews': ProductReview,
+            'orders': Order, 'users': CustomUser,
+        }
+        if connection.vendor != 'postgresql':
+            return {key: model.objects.count() for key, model in models.items()}
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT relname, reltuples::bigint FROM pg_class WHERE relname = ANY(%s)",
+                [[model._meta.db_table for model in models.values()]],
+            )
+            estimates = dict(cursor.fetchall())
+        return {key: estimates.get(model._meta.db_table) for key, model in models.items()}
@@ -0,0 +1,84 @@
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.shortcuts import render
+from django.urls import reverse
+
+from .instrumentation import QueryTimer, RequestMetrics, _current, install_template_timer, logger, view_stats
+from .store_settings import get_store_settings
+
+
+class MaintenanceModeMiddleware:
+    """
+    StoreSettings.maintenance_mode yoqilganda do‘konni 503 bilan yopadi.
+    Staff, admin panellar va login sahifasi ochiq qoladi. Sozlama cache dan o‘qiladi (so‘rovsiz).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self._exempt_prefixes = None
+
+    def __call__(self, request):
+        if get_store_settings().maintenance_mode and not self._is_exempt(request):
+            response = render(request, 'maintenance.html', {'store': get_store_settings()}, status=503)
+            response['Retry-After'] = '600'
+            return response
+        return self.get_response(request)
+
+    def _is_exempt(self, request):
+        if self._exempt_prefixes is None:
+            self._exempt_prefixes = (
+                reverse('admin:index'),
+                reverse('admin_dashboard:dashboard_home'),
+                reverse('user:login'),
+                settings.STATIC_URL if settings.STATIC_URL.startswith('/') else f'/{settings.STATIC_URL}',
+                settings.MEDIA_URL,
+            )
+        if request.path.startswith(self._exempt_prefixes):
+            return True
+        user = getattr(request, 'user', None)
+        return bool(user and user.is_staff)
+
+
+class RequestMetricsMiddleware:
+    """
+    Har bir so‘rov uchun SQL soni, DB vaqti va template render vaqtini o‘lchaydi:
+    ``Server-Timing`` header, ``response.request_metrics`` (testlar uchun) va
+    staff uchun ``view_stats`` statistikasi. ``QUERY_BUDGETS`` dan oshsa warning yoziladi.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_METRICS_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        install_template_timer()
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(QueryTimer(metrics)))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        metrics.total_ms = (time.perf_counter() - start) * 1000
+
+        response['Server-Timing'] = metrics.server_timing()
+        response.request_metrics = metrics
+
+        match = request.resolver_match
+        if match is not None:
+            view_name = match.view_name
+            view_stats.record(view_name, metrics)
+            budget = getattr(settings, 'QUERY_BUDGETS', {}).get(view_name)
+            if budget is not None and metrics.query_count > budget:
+                logger.warning(
+                    "%s: %s queries (budget %s) for %s", view_name, metrics.query_count, budget, request.path
+                )
+        return response
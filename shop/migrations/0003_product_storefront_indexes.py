@@ -0,0 +1,21 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-average_rating', '-review_count', '-created_at', '-id'], name='product_storefront_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['category', '-average_rating', '-review_count', '-created_at', '-id'], name='product_cat_storefront_idx'),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:49
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.contrib.postgres.search import SearchVector, SearchVectorCombinable, SearchVectorField
+from django.db import migrations
+from django.db.models import F, Func, Value
+
+# Migratsiya paytidagi ifodaning nusxasi (shop.search keyin o‘zgarsa ham bu migratsiya o‘zgarmaydi)
+SEARCH_CONFIG = 'simple'
+
+
+class ExtraDataVector(SearchVectorCombinable, Func):
+    function = 'jsonb_to_tsvector'
+    output_field = SearchVectorField()
+    config = None
+
+    def __init__(self, expression, weight):
+        super().__init__(Value(SEARCH_CONFIG), expression, Value('["string", "numeric"]'))
+        self.weight = weight
+
+    def as_sql(self, compiler, connection, **extra_context):
+        sql, params = super().as_sql(compiler, connection, **extra_context)
+        return f"setweight({sql}, %s)", (*params, self.weight)
+
+
+def populate_search_vectors(apps, schema_editor):
+    Product = apps.get_model('shop', 'Product')
+    Product.objects.update(search_vector=(
+        SearchVector('name', weight='A', config=SEARCH_CONFIG)
+        + SearchVector('description', weight='B', config=SEARCH_CONFIG)
+        + ExtraDataVector(F('extra_data'), weight='C')
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0003_product_storefront_indexes'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='product',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='product_search_vector_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='product_name_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.RunPython(populate_search_vectors, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:55
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def populate_rating_sum(apps, schema_editor):
+    Product = apps.get_model('shop', 'Product')
+    ProductReview = apps.get_model('shop', 'ProductReview')
+    reviews = ProductReview.objects.filter(product=OuterRef('pk')).order_by().values('product')
+    Product.objects.update(
+        review_count=Coalesce(Subquery(reviews.annotate(c=Count('id')).values('c')), 0),
+        rating_sum=Coalesce(Subquery(reviews.annotate(s=Sum('stars_given')).values('s')), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0004_product_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(populate_rating_sum, migrations.RunPython.noop),
+    ]
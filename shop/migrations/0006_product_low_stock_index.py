@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-18 15:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0005_product_rating_sum'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('is_active', True), ('stock__lte', 5)), fields=['stock'], name='product_low_stock_idx'),
+        ),
+    ]
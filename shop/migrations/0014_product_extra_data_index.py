@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 15:33
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0013_product_effective_price'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['extra_data'], name='product_extra_data_idx', opclasses=['jsonb_path_ops']),
+        ),
+    ]
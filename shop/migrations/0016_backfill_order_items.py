@@ -0,0 +1,84 @@
+from django.db import migrations, transaction
+
+# Har bo‘lak o‘z qisqa tranzaksiyasida: jadval uzoq lock lanmaydi, to‘xtab qolsa qayta ishga
+# tushirish mumkin (OrderItem i bor buyurtmalar o‘tkazib yuboriladi). 0017 ham shu funksiyani
+# qayta chaqiradi — shu orada eski kod yaratgan buyurtmalar uchun
+BACKFILL_CHUNK_SIZE = 1000
+
+
+def backfill_order_items(apps, schema_editor):
+    """
+    ``Order.snapshots`` (M2M) dan, snapshoti yo‘q eski buyurtmalar uchun ``Order.items`` +
+    productning joriy narxidan ``OrderItem`` qatorlarini yaratadi. Product ham, snapshot ham
+    yo‘q qatorlar (nomi va narxi noma'lum) ``product=None``, ``name='#<id>'``, ``price=0`` bilan
+    saqlanadi — buyurtmada nechta narsa bo‘lgani yo‘qolmasin.
+    """
+    Order = apps.get_model('shop', 'Order')
+    OrderItem = apps.get_model('shop', 'OrderItem')
+    Product = apps.get_model('shop', 'Product')
+    through = Order.snapshots.through
+
+    last_id = 0
+    while True:
+        with transaction.atomic():
+            orders = list(Order.objects.filter(id__gt=last_id, lines__isnull=True).order_by('id').values_list('id', 'items')[:BACKFILL_CHUNK_SIZE])
+            if not orders:
+                break
+            last_id = orders[-1][0]
+            order_ids = [order_id for order_id, _ in orders]
+            done = set(OrderItem.objects.filter(order_id__in=order_ids).values_list('order_id', flat=True).distinct())
+
+            snapshots = {}
+            rows = through.objects.filter(order_id__in=order_ids).order_by('id').values_list(
+                'order_id', 'orderitemsnapshot__product_id', 'orderitemsnapshot__name',
+                'orderitemsnapshot__image', 'orderitemsnapshot__price', 'orderitemsnapshot__quantity',
+            )
+            for order_id, *line in rows:
+                snapshots.setdefault(order_id, []).append(line)
+
+            product_ids = {int(pid) for _, items in orders for pid in items or {}}
+            product_ids.update(line[0] for lines in snapshots.values() for line in lines)
+            products = {
+                pk: (name, discount_price or price)
+                for pk, name, price, discount_price in Product.objects.filter(id__in=product_ids).values_list(
+                    'id', 'name', 'price', 'discount_price',
+                )
+            }
+
+            new_items = []
+            for order_id, items in orders:
+                if order_id in done:
+                    continue
+                if order_id in snapshots:
+                    for product_id, name, image, price, quantity in snapshots[order_id]:
+                        new_items.append(OrderItem(
+                            order_id=order_id, product_id=product_id if product_id in products else None,
+                            name=name, image=image, price=price, quantity=quantity,
+                        ))
+                    continue
+                for pid, quantity in (items or {}).items():
+                    product = products.get(int(pid))
+                    if product is None:
+                        new_items.append(OrderItem(
+                            order_id=order_id, product_id=None,
+                            name=f'#{pid}', image='', price=0, quantity=int(quantity),
+                        ))
+                    else:
+                        new_items.append(OrderItem(
+                            order_id=order_id, product_id=int(pid),
+                            name=product[0], image='', price=product[1], quantity=int(quantity),
+                        ))
+            OrderItem.objects.bulk_create(new_items, batch_size=BACKFILL_CHUNK_SIZE)
+
+
+class Migration(migrations.Migration):
+    # Bo‘laklar alohida tranzaksiyalarda commit bo‘lishi uchun
+    atomic = False
+
+    dependencies = [
+        ('shop', '0015_order_item'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_order_items, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+from importlib import import_module
+
+from django.db import migrations
+
+backfill = import_module('shop.migrations.0016_backfill_order_items')
+
+
+def backfill_remaining(apps, schema_editor):
+    """
+    0016 dan keyin (deploy paytida eski kod ishlab turganda) yaratilgan, qatorlari yo‘q buyurtmalar.
+    Jadval yozishga lock lanadi va lock shu migratsiya tranzaksiyasi oxirigacha (ustunlar o‘chguncha)
+    turadi — orada eski kod yangi buyurtma yozib, snapshoti yo‘qolib ketolmaydi.
+    """
+    Order = apps.get_model('shop', 'Order')
+    schema_editor.execute(
+        'LOCK TABLE %s IN SHARE ROW EXCLUSIVE MODE' % schema_editor.quote_name(Order._meta.db_table)
+    )
+    backfill.backfill_order_items(apps, schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0016_backfill_order_items'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_remaining, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='order',
+            name='snapshots',
+        ),
+        migrations.RemoveField(
+            model_name='order',
+            name='items',
+        ),
+        migrations.DeleteModel(
+            name='OrderItemSnapshot',
+        ),
+    ]
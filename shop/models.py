@@ -1,8 +1,14 @@
+import copy
+
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
 from django.utils import timezone
 from django.core.validators import FileExtensionValidator, MinValueValidator, MaxValueValidator
-from django.db import models
-from django.utils.text import slugify
+from django.db import models, transaction
+from django.db.models.functions import Coalesce, Collate, NullIf, Upper
 from user.models import CustomUser
+from .search import update_search_vectors
+from .slugs import unique_slug
 
 
 class StoreSettings(models.Model):
@@ -36,6 +42,10 @@ class StoreSettings(models.Model):
 
 
 
+# Shu miqdordan kam qolgan faol productlar "kam qolgan" hisoblanadi (dashboard, partial indeks)
+LOW_STOCK_THRESHOLD = 5
+
+
 class Category(models.Model):
     name = models.CharField(max_length=100, unique=True)
     parent = models.ForeignKey('self', null=True, blank=True, on_delete=models.CASCADE, related_name='subcategories')
@@ -63,23 +73,119 @@ class Product(models.Model):
     description = models.TextField(blank=True)
     price = models.DecimalField(max_digits=10, decimal_places=2)
     discount_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    # Xaridor to‘laydigan narx (get_discounted_price ning SQL dagi nusxasi) — storefront narx
+    # filtri/saralashi va admin min_price/max_price uchun; Postgres o‘zi hisoblaydi (STORED)
+    effective_price = models.GeneratedField(
+        expression=Coalesce(NullIf('discount_price', models.Value(0)), 'price'),
+        output_field=models.DecimalField(max_digits=10, decimal_places=2),
+        db_persist=True,
+    )
     stock = models.PositiveIntegerField(default=0)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Sahifa versiyasi: product, uning rasmlari yoki review lari o‘zgarganda yangilanadi
+    # (fragment cache kaliti, ETag/Last-Modified — shop.page_cache)
+    updated_at = models.DateTimeField(auto_now=True)
 
     # ✅ JSONField instead of TextField
     extra_data = models.JSONField(blank=True, default=dict)
     average_rating = models.FloatField(default=0)
     review_count = models.PositiveIntegerField(default=0)
+    # Yulduzlar yig‘indisi: average_rating = rating_sum / review_count (inkremental yangilanadi)
+    rating_sum = models.PositiveIntegerField(default=0)
+    # Yulduzlar taqsimoti (histogram): nechta review 1, 2, ... 5 yulduz — shop.ratings da birga yangilanadi
+    stars_1 = models.PositiveIntegerField(default=0)
+    stars_2 = models.PositiveIntegerField(default=0)
+    stars_3 = models.PositiveIntegerField(default=0)
+    stars_4 = models.PositiveIntegerField(default=0)
+    stars_5 = models.PositiveIntegerField(default=0)
+
+    # Full-text qidiruv: name + description + extra_data qiymatlari (save() da yangilanadi)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    # search_vector ga ta'sir qiladigan maydonlar
+    SEARCH_FIELDS = ('name', 'description', 'extra_data')
+
+    class Meta:
+        indexes = [
+            # Storefront ordering (home): keyset pagination shu indekslar bo‘yicha yuradi
+            models.Index(
+                fields=['-average_rating', '-review_count', '-created_at', '-id'],
+                name='product_storefront_idx',
+                condition=models.Q(is_active=True),
+            ),
+            models.Index(
+                fields=['category', '-average_rating', '-review_count', '-created_at', '-id'],
+                name='product_cat_storefront_idx',
+                condition=models.Q(is_active=True),
+            ),
+            # Narx bo‘yicha saralash (ikkala yo‘nalish — indeksni teskari o‘qish) va min/max filtri
+            models.Index(
+                fields=['effective_price', 'id'],
+                name='product_price_idx',
+                condition=models.Q(is_active=True),
+            ),
+            # Dashboard dagi "kam qolgan" hisoblagichi uchun kichik partial indeks
+            models.Index(
+                fields=['stock'],
+                name='product_low_stock_idx',
+                condition=models.Q(is_active=True, stock__lte=LOW_STOCK_THRESHOLD),
+            ),
+            GinIndex(fields=['search_vector'], name='product_search_vector_idx'),
+            # Atribut filtrlari: extra_data @> {"color": "qora"} (shop.facets)
+            GinIndex(fields=['extra_data'], name='product_extra_data_idx', opclasses=['jsonb_path_ops']),
+            GinIndex(fields=['name'], name='product_name_trgm_idx', opclasses=['gin_trgm_ops']),
+            # Admin autocomplete: UPPER(name) COLLATE "C" LIKE 'X%' ORDER BY shu ifoda, id — prefiks
+            # oralig‘i ham, tartib ham indeksdan (LIMIT birinchi qatorlardan keyin to‘xtaydi)
+            models.Index(Collate(Upper('name'), 'C'), 'id', name='product_name_prefix_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'category_id' in field_names:
+            # Kategoriya o‘zgarsa eski kategoriya facet lari ham eskirishi uchun (shop.signals)
+            instance._loaded_category_id = instance.category_id
+        if all(field in field_names for field in cls.SEARCH_FIELDS):
+            instance._loaded_search_values = instance._search_values()
+        return instance
+
+    def _search_values(self):
+        # extra_data joyida o‘zgartirilishi mumkin — nusxa olamiz
+        return copy.deepcopy(tuple(getattr(self, field) for field in self.SEARCH_FIELDS))
+
+    def _search_fields_changed(self, update_fields):
+        if update_fields is not None:
+            return bool(set(update_fields) & set(self.SEARCH_FIELDS))
+        # Bazadan o‘qilmagan (yoki yangi) obyekt uchun eski qiymat noma'lum
+        loaded = getattr(self, '_loaded_search_values', None)
+        return loaded is None or loaded != self._search_values()
 
     def save(self, *args, **kwargs):
         if not self.slug:
-            self.slug = slugify(self.name)
-        super().save(*args, **kwargs)
+            # Takroriy/kirill nomlar uchun ham unikal slug (telefon, telefon-2, ...)
+            self.slug = unique_slug(Product.objects.all(), self.name)
+        search_changed = self._state.adding or self._search_fields_changed(kwargs.get('update_fields'))
+
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if search_changed:
+                update_search_vectors(Product.objects.filter(pk=self.pk))
+
+        self._loaded_search_values = self._search_values()
 
     def get_discounted_price(self):
         return self.discount_price or self.price
 
+    def star_histogram(self):
+        """``[(yulduz, soni, foiz), ...]`` 5 dan 1 gacha — sahifadagi taqsimot chizig‘i uchun (so‘rovsiz)."""
+        total = self.review_count or 0
+        histogram = []
+        for stars in range(5, 0, -1):
+            count = getattr(self, f'stars_{stars}')
+            histogram.append((stars, count, round(count * 100 / total) if total else 0))
+        return histogram
+
     def __str__(self):
         return self.name
 
@@ -97,18 +203,7 @@ class ProductImage(models.Model):
         return f"Image for {self.product.name}"
 
 
-# --- Order & OrderItemSnapshot ---
-class OrderItemSnapshot(models.Model):
-    product_id = models.IntegerField()
-    name = models.CharField(max_length=255)
-    image = models.CharField(max_length=255)
-    price = models.DecimalField(max_digits=10, decimal_places=2)
-    quantity = models.PositiveIntegerField(default=1)
-
-    def __str__(self):
-        return f"{self.name} x {self.quantity}"
-
-
+# --- Order & OrderItem ---
 class Order(models.Model):
     STATUS_CHOICES = [
         ('pending', 'Kutilmoqda'),
@@ -118,7 +213,6 @@ class Order(models.Model):
     ]
 
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
-    items = models.JSONField(default=dict)
     total_price = models.DecimalField(max_digits=10, decimal_places=2)
     full_name = models.CharField(max_length=100, blank=True)
     phone = models.CharField(max_length=20, blank=True)
@@ -126,12 +220,61 @@ class Order(models.Model):
     note = models.TextField(blank=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     created_at = models.DateTimeField(auto_now_add=True)
-    snapshots = models.ManyToManyField(OrderItemSnapshot, blank=True)
+
+    class Meta:
+        indexes = [
+            # Admin buyurtmalar ro‘yxati: keyset pagination (-created_at, -id), status filtri bilan ham
+            models.Index(fields=['-created_at', '-id'], name='order_created_idx'),
+            models.Index(fields=['status', '-created_at', '-id'], name='order_status_created_idx'),
+            # User buyurtmalari (my_orders, admin users ro‘yxatidagi soni / oxirgi buyurtma)
+            models.Index(fields=['user', '-created_at'], name='order_user_created_idx'),
+            # icontains -> UPPER(col) LIKE UPPER('%q%'): trigram indeks aynan UPPER(col) ustida bo‘lishi kerak
+            GinIndex(OpClass(Upper('full_name'), name='gin_trgm_ops'), name='order_full_name_trgm_idx'),
+            GinIndex(OpClass(Upper('phone'), name='gin_trgm_ops'), name='order_phone_trgm_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'status' in field_names:
+            # Status o‘zgarganini bilish uchun (dashboard hisoblagichlari)
+            instance._loaded_status = instance.status
+        return instance
 
     def __str__(self):
         return f"Buyurtma #{self.id} - {self.user.username}"
 
 
+class OrderItem(models.Model):
+    """
+    Buyurtma qatori: buyurtma paytidagi nom/rasm/narx (snapshot) + product ga FK.
+    Product o‘chirilsa ``product`` NULL bo‘ladi, snapshot ustunlari qoladi.
+    """
+
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='lines')
+    # Indeksi — quyidagi (product, order) kompozit indeks
+    product = models.ForeignKey(
+        Product, on_delete=models.SET_NULL, null=True, blank=True, related_name='order_items', db_index=False,
+    )
+    name = models.CharField(max_length=255)
+    image = models.CharField(max_length=255, blank=True)
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    quantity = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        indexes = [
+            # Product bo‘yicha sotuvlar / "shu product li buyurtmalar" (index-only order_id bilan)
+            models.Index(fields=['product', 'order'], name='orderitem_product_order_idx'),
+        ]
+
+    @property
+    def line_total(self):
+        return self.price * self.quantity
+
+    def __str__(self):
+        return f"{self.name} x {self.quantity}"
+
+
 class ProductReview(models.Model):
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='reviews')
@@ -139,12 +282,71 @@ class ProductReview(models.Model):
     stars_given = models.IntegerField(validators=[MinValueValidator(1), MaxValueValidator(5)])
     created_at = models.DateTimeField(default=timezone.now)
 
+    class Meta:
+        indexes = [
+            # Admin moderatsiya sahifasi: default tartib va product / yulduz filtrlari
+            models.Index(fields=['-created_at', '-id'], name='review_created_idx'),
+            # Product sahifasidagi review lar (keyset pagination, '-id' — tie-breaker)
+            models.Index(fields=['product', '-created_at', '-id'], name='review_product_created_idx'),
+            models.Index(fields=['stars_given', '-created_at'], name='review_stars_created_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'product_id' in field_names and 'stars_given' in field_names:
+            # Edit/delete da eski bahoni bilish uchun (agregatni qayta sanamaslik uchun)
+            instance._loaded_rating = (instance.product_id, instance.stars_given)
+        return instance
+
     def save(self, *args, **kwargs):
-        super().save(*args, **kwargs)
-        reviews = ProductReview.objects.filter(product=self.product)
-        self.product.review_count = reviews.count()
-        self.product.average_rating = reviews.aggregate(models.Avg('stars_given'))['stars_given__avg'] or 0
-        self.product.save()
+        from .ratings import apply_rating_delta, rebuild_ratings
+
+        adding = self._state.adding
+        previous = getattr(self, '_loaded_rating', None)
+
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if adding:
+                apply_rating_delta(self.product_id, added=[self.stars_given])
+            elif previous is None:
+                # Eski qiymat noma'lum (bazadan o‘qilmagan obyekt) — shu product uchun qayta hisoblaymiz
+                rebuild_ratings(Product.objects.filter(pk=self.product_id))
+            elif previous != (self.product_id, self.stars_given):
+                old_product_id, old_stars = previous
+                if old_product_id == self.product_id:
+                    apply_rating_delta(self.product_id, added=[self.stars_given], removed=[old_stars])
+                else:
+                    apply_rating_delta(old_product_id, removed=[old_stars])
+                    apply_rating_delta(self.product_id, added=[self.stars_given])
+
+        self._loaded_rating = (self.product_id, self.stars_given)
 
     def __str__(self):
         return f'{self.stars_given} stars for {self.product.name} by {self.user.username}'
+
+
+class ImageDerivative(models.Model):
+    """
+    Yuklangan rasmning kichraytirilgan nusxasi (thumbnail/WebP/JPEG). ``source`` — original
+    fayl nomi (storage dagi), ``file`` — kontent hash li nom: o‘zgarmaydi, uzoq cache lanadi.
+    """
+
+    WEBP = 'webp'
+    JPEG = 'jpeg'
+    FORMAT_CHOICES = [(WEBP, 'WebP'), (JPEG, 'JPEG')]
+
+    source = models.CharField(max_length=255)
+    width = models.PositiveIntegerField()
+    height = models.PositiveIntegerField()
+    format = models.CharField(max_length=4, choices=FORMAT_CHOICES)
+    file = models.CharField(max_length=255)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['source', 'width', 'format'], name='imagederivative_unique_variant'),
+        ]
+
+    def __str__(self):
+        return f"{self.source} {self.width}w {self.format}"
@@ -0,0 +1,57 @@
+from dataclasses import dataclass
+from decimal import Decimal
+
+from .models import OrderItem, Product
+
+
+@dataclass(frozen=True, slots=True)
+class OrderLine:
+    """Buyurtma qatori (faqat o‘qish uchun). Product o‘chirilgan bo‘lsa ``product`` va ``product_id`` None."""
+
+    product_id: int | None
+    quantity: int
+    product: Product | None
+    name: str
+    price: Decimal | None
+    image_url: str
+
+    @property
+    def deleted(self):
+        return self.product is None
+
+    @property
+    def line_total(self):
+        return self.price * self.quantity if self.price is not None else None
+
+
+def resolve_order_items(orders):
+    """
+    Bir sahifadagi barcha buyurtmalar qatorlarini ``{order.id: [OrderLine, ...]}`` ko‘rinishida qaytaradi.
+
+    Qatorlar (product bilan) bitta so‘rov bilan olinadi. Nom va narx — buyurtma paytidagi
+    snapshot; rasm — product hali bor bo‘lsa uning joriy rasmi.
+    """
+    resolved = {order.id: [] for order in orders}
+    if not resolved:
+        return resolved
+
+    items = (
+        OrderItem.objects.filter(order_id__in=list(resolved))
+        .select_related('product')
+        .only(
+            'order_id', 'product_id', 'name', 'image', 'price', 'quantity',
+            'product__id', 'product__name', 'product__slug', 'product__image',
+        )
+        .order_by('order_id', 'id')
+    )
+    for item in items:
+        product = item.product
+        resolved[item.order_id].append(OrderLine(
+            product_id=item.product_id,
+            quantity=item.quantity,
+            product=product,
+            name=item.name,
+            price=item.price,
+            image_url=product.image.url if product is not None and product.image else item.image,
+        ))
+    return resolved
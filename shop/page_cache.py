@@ -0,0 +1,76 @@
+import hashlib
+
+from django.contrib.messages import get_messages
+from django.db.models.functions import Now
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+from .cart import CART_SESSION_KEY
+from .category_tree import category_tree_version
+from .models import Product
+from .store_settings import get_store_settings
+
+# Versiyali kalitlar bilan ({% cache ... product.updated_at %}) eskirgan fragment hech qachon
+# o‘qilmaydi — TTL faqat xotirani bo‘shatish uchun
+PRODUCT_FRAGMENT_TTL = 60 * 60 * 24
+
+
+def touch_products(product_ids):
+    """Product sahifasi versiyasini (updated_at) oshiradi: rasm/review/zaxira o‘zgarganda."""
+    return Product.objects.filter(pk__in=product_ids).update(updated_at=Now())
+
+
+def _page_state(request, product):
+    """
+    Sahifa HTML iga ta'sir qiluvchi hamma narsa: product, user, savat, sozlamalar, kategoriyalar.
+    Login qilgan user sahifasida review formasi bor — CSRF secret (cookie) almashsa (login,
+    rotate_token) keshdagi eski token bilan POST 403 bo‘lmasin.
+    """
+    cart = request.session.get(CART_SESSION_KEY) or {}
+    return '|'.join(str(part) for part in (
+        product.pk,
+        product.updated_at.timestamp(),
+        request.user.pk or 'anon',
+        sorted(cart.items()) if isinstance(cart, dict) else cart,
+        get_store_settings().updated_at.timestamp(),
+        category_tree_version(),
+        request.META.get('CSRF_COOKIE', '') if request.user.is_authenticated else '',
+    ))
+
+
+def conditional_product_response(request, product):
+    """
+    Brauzer/proxy dagi nusxa hali yangi bo‘lsa 304 qaytaradi, aks holda None
+    (sahifani render qilish kerak). Ko‘rsatilmagan flash xabarlar bo‘lsa 304 berilmaydi.
+    """
+    if request.method not in ('GET', 'HEAD') or len(get_messages(request)):
+        return None
+    return get_conditional_response(
+        request,
+        etag=product_etag(request, product),
+        last_modified=product_last_modified(request, product),
+    )
+
+
+def product_etag(request, product):
+    return '"%s"' % hashlib.md5(_page_state(request, product).encode(), usedforsecurity=False).hexdigest()
+
+
+def product_last_modified(request, product):
+    # Faqat anonim sahifa uchun: login qilgan user uchun sana yetarli emas (ETag user ni ham hisobga oladi)
+    if request.user.is_authenticated:
+        return None
+    return int(max(product.updated_at, get_store_settings().updated_at).timestamp())
+
+
+def set_conditional_headers(request, response, product):
+    response['ETag'] = product_etag(request, product)
+    last_modified = product_last_modified(request, product)
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    # Har safar qayta tekshirilsin (304 arzon); login qilgan user sahifasi umumiy proxy da saqlanmasin
+    patch_cache_control(response, max_age=0, must_revalidate=True)
+    if request.user.is_authenticated:
+        patch_cache_control(response, private=True)
+    patch_vary_headers(response, ('Cookie',))
+    return response
@@ -0,0 +1,123 @@
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Q
+
+
+def _encode_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def encode_cursor(values):
+    raw = json.dumps([_encode_value(v) for v in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(model, ordering, cursor):
+    """Cursor stringini ordering maydonlari qiymatlariga qaytaradi (noto‘g‘ri bo‘lsa ValueError)."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except Exception as exc:
+        raise ValueError("Invalid cursor") from exc
+
+    if not isinstance(values, list) or len(values) != len(ordering):
+        raise ValueError("Invalid cursor")
+
+    try:
+        return [_to_python(model, name.lstrip('-'), value) for name, value in zip(ordering, values)]
+    except Exception as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+def _to_python(model, name, value):
+    try:
+        field = model._meta.get_field(name)
+    except FieldDoesNotExist:
+        # annotate() qilingan maydon (masalan, search rank) — JSON qiymati o‘zicha ishlatiladi
+        return value
+    return field.to_python(value)
+
+
+def _seek_filter(ordering, values, forward):
+    """
+    (a, b, c) > (x, y, z) ni har bir maydon yo‘nalishini hisobga olgan holda Q ga yoyadi:
+    a > x OR (a = x AND b > y) OR (a = x AND b = y AND c > z)
+    """
+    condition = Q()
+    equal_prefix = Q()
+    for name, value in zip(ordering, values):
+        field = name.lstrip('-')
+        descending = name.startswith('-')
+        lookup = 'lt' if descending == forward else 'gt'
+        condition |= equal_prefix & Q(**{f'{field}__{lookup}': value})
+        equal_prefix &= Q(**{field: value})
+    return condition
+
+
+def _reverse_ordering(ordering):
+    return [name[1:] if name.startswith('-') else f'-{name}' for name in ordering]
+
+
+class KeysetPage:
+    """Seek pagination natijasi: sahifa obyektlari va qo‘shni sahifalar cursorlari."""
+
+    def __init__(self, object_list, ordering, has_next, has_previous):
+        self.object_list = object_list
+        self.has_next = has_next
+        self.has_previous = has_previous
+        self.next_cursor = self._cursor_for(object_list[-1], ordering) if has_next and object_list else None
+        self.previous_cursor = self._cursor_for(object_list[0], ordering) if has_previous and object_list else None
+
+    @staticmethod
+    def _cursor_for(obj, ordering):
+        return encode_cursor([getattr(obj, name.lstrip('-')) for name in ordering])
+
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def keyset_paginate(queryset, ordering, per_page, after=None, before=None):
+    """
+    OFFSET o‘rniga keyset (seek) pagination.
+
+    ``ordering`` oxirgi elementi unikal maydon (odatda ``-id``) bo‘lishi va maydonlar
+    NULL bo‘lmasligi kerak. ``after``/``before`` — oldingi sahifadan olingan cursorlar;
+    noto‘g‘ri cursor birinchi sahifa sifatida qabul qilinadi.
+    """
+    ordering = list(ordering)
+    cursor, forward = (before, False) if before else (after, True)
+
+    values = None
+    if cursor:
+        try:
+            values = decode_cursor(queryset.model, ordering, cursor)
+        except ValueError:
+            values, forward = None, True
+
+    qs = queryset
+    if values is not None:
+        qs = qs.filter(_seek_filter(ordering, values, forward))
+    qs = qs.order_by(*(ordering if forward else _reverse_ordering(ordering)))
+
+    rows = list(qs[:per_page + 1])
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+
+    if forward:
+        return KeysetPage(rows, ordering, has_next=has_more, has_previous=values is not None)
+    rows.reverse()
+    return KeysetPage(rows, ordering, has_next=True, has_previous=has_more)
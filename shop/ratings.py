@@ -0,0 +1,58 @@
+from collections import Counter
+
+from django.db.models import Avg, Case, Count, F, FloatField, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Cast, Coalesce, Greatest, Now
+
+from .models import Product, ProductReview
+
+STAR_VALUES = range(1, 6)
+
+
+def apply_rating_delta(product_id, added=(), removed=()):
+    """
+    ``added`` / ``removed`` — qo‘shilgan va olib tashlangan baholar (yulduzlar). review_count,
+    rating_sum, average_rating va stars_N histogrammasi bitta atomik UPDATE bilan o‘zgaradi.
+    UPDATE ichida F() eski qiymatlarni ko‘radi, shuning uchun parallel yozuvlar bir-birini yo‘qotmaydi.
+    """
+    count_delta = len(added) - len(removed)
+    stars_delta = sum(added) - sum(removed)
+    star_deltas = Counter(added)
+    star_deltas.subtract(removed)
+
+    new_count = Greatest(F('review_count') + count_delta, Value(0))
+    new_sum = Greatest(F('rating_sum') + stars_delta, Value(0))
+    histogram = {
+        f'stars_{stars}': Greatest(F(f'stars_{stars}') + delta, Value(0))
+        for stars, delta in star_deltas.items() if delta
+    }
+    return Product.objects.filter(pk=product_id).update(
+        review_count=new_count,
+        rating_sum=new_sum,
+        average_rating=Case(
+            When(review_count__gt=-count_delta, then=Cast(new_sum, FloatField()) / Cast(new_count, FloatField())),
+            default=Value(0.0),
+            output_field=FloatField(),
+        ),
+        **histogram,
+    )
+
+
+def rebuild_ratings(products):
+    """Berilgan productlar agregatlarini (histogramma bilan) ProductReview jadvalidan to‘liq qayta hisoblaydi."""
+    reviews = ProductReview.objects.filter(product=OuterRef('pk')).order_by().values('product')
+    histogram = {
+        f'stars_{stars}': Coalesce(
+            Subquery(reviews.annotate(c=Count('id', filter=Q(stars_given=stars))).values('c')), 0,
+        )
+        for stars in STAR_VALUES
+    }
+    return products.update(
+        review_count=Coalesce(Subquery(reviews.annotate(c=Count('id')).values('c')), 0),
+        rating_sum=Coalesce(Subquery(reviews.annotate(s=Sum('stars_given')).values('s')), 0),
+        average_rating=Coalesce(
+            Subquery(reviews.annotate(a=Cast(Avg('stars_given'), FloatField())).values('a')),
+            Value(0.0),
+        ),
+        updated_at=Now(),
+        **histogram,
+    )
@@ -0,0 +1,80 @@
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+    SearchVectorCombinable,
+    SearchVectorField,
+    TrigramWordSimilarity,
+)
+from django.db.models import F, FloatField, Func, Q, Value
+from django.db.models.functions import Cast
+
+# Mahsulot nomlari o‘zbek/rus/ingliz aralash — stemmingsiz 'simple' konfiguratsiya
+SEARCH_CONFIG = 'simple'
+
+
+class ExtraDataVector(SearchVectorCombinable, Func):
+    """
+    ``extra_data`` JSON ichidagi string va son qiymatlarini (kalitlarsiz) tsvector ga aylantiradi:
+    setweight(jsonb_to_tsvector(config, extra_data, '["string", "numeric"]'), weight)
+    """
+    function = 'jsonb_to_tsvector'
+    output_field = SearchVectorField()
+    config = None
+
+    def __init__(self, expression, weight, config=SEARCH_CONFIG):
+        super().__init__(Value(config), expression, Value('["string", "numeric"]'))
+        self.weight = weight
+
+    def as_sql(self, compiler, connection, **extra_context):
+        sql, params = super().as_sql(compiler, connection, **extra_context)
+        return f"setweight({sql}, %s)", (*params, self.weight)
+
+
+def product_search_vector():
+    """Product.search_vector ustuni uchun SQL ifoda (name > description > extra_data)."""
+    return (
+        SearchVector('name', weight='A', config=SEARCH_CONFIG)
+        + SearchVector('description', weight='B', config=SEARCH_CONFIG)
+        + ExtraDataVector(F('extra_data'), weight='C')
+    )
+
+
+def update_search_vectors(queryset):
+    """Berilgan productlar uchun search_vector ni bitta UPDATE bilan qayta hisoblaydi."""
+    return queryset.update(search_vector=product_search_vector())
+
+
+def search_products(queryset, query):
+    """
+    Ranked full-text qidiruv. Natija topilmasa (masalan, typo bo‘lsa) nom bo‘yicha
+    trigram o‘xshashlikka o‘tadi (``%>`` operatori indeksdan foydalanadi; chegara
+    settings.DATABASES dagi ``pg_trgm.word_similarity_threshold``).
+
+    Returns ``(queryset, ordering)`` — ordering keyset pagination uchun tayyor.
+    """
+    search_query = SearchQuery(query, search_type='websearch', config=SEARCH_CONFIG)
+    matches = (
+        queryset
+        .filter(search_vector=search_query)
+        # float4 -> float8: cursor dagi qiymat keyingi so‘rovda aynan teng chiqishi uchun
+        .annotate(rank=Cast(SearchRank(F('search_vector'), search_query), FloatField()))
+    )
+    if matches.exists():
+        return matches, ('-rank', '-id')
+
+    similar = (
+        queryset
+        .filter(name__trigram_word_similar=query)
+        .annotate(similarity=Cast(TrigramWordSimilarity(query, 'name'), FloatField()))
+    )
+    return similar, ('-similarity', '-id')
+
+
+def legacy_search_products(queryset, query):
+    """Eski icontains qidiruv — faqat benchmark bilan solishtirish uchun saqlangan."""
+    return queryset.filter(
+        Q(name__icontains=query) |
+        Q(description__icontains=query) |
+        Q(extra_data__icontains=query)
+    ).order_by('-average_rating', '-review_count', '-created_at', '-id')
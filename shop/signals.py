@@ -0,0 +1,123 @@
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from user.models import CustomUser
+from .category_tree import invalidate_category_tree
+from .facets import invalidate_facets
+from .models import Category, Product, ProductImage, ProductReview, StoreSettings
+from .page_cache import touch_products
+from .ratings import apply_rating_delta
+from .store_settings import invalidate_store_settings
+from .tasks import generate_image_derivatives
+
+
+@receiver([post_save, post_delete], sender=Category)
+def category_changed(sender, **kwargs):
+    # Commit dan oldin boshqa process eski ma'lumot bilan daraxtni qayta qurib qo‘ymasin
+    transaction.on_commit(invalidate_category_tree)
+
+
+@receiver([post_save, post_delete], sender=StoreSettings)
+def store_settings_changed(sender, **kwargs):
+    transaction.on_commit(invalidate_store_settings)
+
+
+@receiver([post_save, post_delete], sender=Product)
+def product_facets_changed(sender, instance, **kwargs):
+    categories = {instance.category_id, getattr(instance, '_loaded_category_id', instance.category_id)}
+    instance._loaded_category_id = instance.category_id
+    transaction.on_commit(lambda: invalidate_facets(categories))
+
+
+# ===== Cascade o‘chirishlar =====
+# Bitta delete() ichida hamma pre_delete lar post_delete lardan oldin keladi. Holat delete ning
+# ``origin`` iga (o‘chirish boshlangan instance yoki QuerySet) yoziladi — global holat qolmaydi.
+def _deletion_state(origin, name):
+    state = getattr(origin, name, None)
+    if state is None:
+        state = set()
+        setattr(origin, name, state)
+    return state
+
+
+def _handled_by_parent(instance, origin):
+    """Review/rasm product bilan birga o‘chyapti yoki user o‘chirilishida agregat allaqachon tuzatilgan."""
+    return (
+        instance.product_id in getattr(origin, '_deleting_product_ids', ())
+        or getattr(instance, 'user_id', None) in getattr(origin, '_rated_user_ids', ())
+    )
+
+
+@receiver(pre_delete, sender=Product)
+def product_deleting(sender, instance, origin=None, **kwargs):
+    # Product o‘chayotgan bo‘lsa uning review/rasmlari uchun reyting va updated_at UPDATE lari keraksiz
+    if origin is not None:
+        _deletion_state(origin, '_deleting_product_ids').add(instance.pk)
+
+
+@receiver(pre_delete, sender=CustomUser)
+def user_reviews_deleting(sender, instance, origin=None, **kwargs):
+    """
+    User (yoki admin dagi userlar QuerySet i) o‘chirilganda review lari har biri uchun alohida
+    UPDATE o‘rniga: hamma o‘chayotgan userlar review lari product bo‘yicha guruhlanib, har product
+    uchun bitta ``apply_rating_delta`` va hammasiga bitta ``touch_products``.
+    """
+    handled = _deletion_state(origin, '_rated_user_ids') if origin is not None else None
+    if handled is None or instance.pk in handled:
+        return
+    if isinstance(origin, QuerySet) and origin.model is CustomUser:
+        user_ids = set(origin.values_list('pk', flat=True))
+    else:
+        user_ids = {instance.pk}
+    user_ids.add(instance.pk)
+
+    removed = {}
+    reviews = ProductReview.objects.filter(user_id__in=user_ids).values_list('product_id', 'stars_given')
+    for product_id, stars in reviews.iterator():
+        removed.setdefault(product_id, []).append(stars)
+    for product_id, stars in removed.items():
+        apply_rating_delta(product_id, removed=stars)
+    if removed:
+        touch_products(list(removed))
+    handled.update(user_ids)
+
+
+@receiver(post_delete, sender=ProductReview)
+def review_deleted(sender, instance, origin=None, **kwargs):
+    # delete_review view lari, admin va cascade o‘chirishlar shu yerdan o‘tadi
+    if _handled_by_parent(instance, origin):
+        return
+    product_id, stars = getattr(instance, '_loaded_rating', (instance.product_id, instance.stars_given))
+    apply_rating_delta(product_id, removed=[stars])
+
+
+@receiver([post_save, post_delete], sender=ProductReview)
+@receiver([post_save, post_delete], sender=ProductImage)
+def product_page_changed(sender, instance, origin=None, **kwargs):
+    # Product sahifasi versiyasi (fragment cache, ETag)
+    if _handled_by_parent(instance, origin):
+        return
+    touch_products([instance.product_id])
+
+
+# Derivativ (thumbnail/WebP) yaratiladigan rasm maydonlari
+IMAGE_FIELDS = {Product: 'image', ProductImage: 'image', CustomUser: 'profile_picture'}
+
+
+def _image_pre_save(sender, instance, **kwargs):
+    # Yangi yuklangan fayl hali storage ga yozilmagan (_committed=False) — save dan keyin navbatga qo‘yamiz
+    file = getattr(instance, IMAGE_FIELDS[sender])
+    instance._image_uploaded = bool(file) and not file._committed
+
+
+def _image_post_save(sender, instance, **kwargs):
+    if getattr(instance, '_image_uploaded', False):
+        instance._image_uploaded = False
+        generate_image_derivatives.delay(getattr(instance, IMAGE_FIELDS[sender]).name)
+
+
+for _model in IMAGE_FIELDS:
+    pre_save.connect(_image_pre_save, sender=_model, dispatch_uid=f'image_pre_save_{_model.__name__}')
+    post_save.connect(_image_post_save, sender=_model, dispatch_uid=f'image_post_save_{_model.__name__}')
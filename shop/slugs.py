@@ -0,0 +1,70 @@
+import re
+from itertools import islice
+
+from django.db.models import Q
+from django.utils.text import slugify
+
+# Product.slug (SlugField) uzunligi; "-123" qo‘shimchasi uchun joy qoldiriladi
+SLUG_MAX_LENGTH = 50
+SLUG_SUFFIX_RESERVE = 6
+# Bir so‘rovdagi prefix shartlari soni (batch rejimida)
+SLUG_QUERY_CHUNK = 200
+
+# O‘zbek (kirill) va rus harflari -> lotin (o‘zbek lotin alifbosiga yaqin)
+CYRILLIC_TO_LATIN = {
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'е': 'e', 'ё': 'yo', 'ж': 'j', 'з': 'z',
+    'и': 'i', 'й': 'y', 'к': 'k', 'л': 'l', 'м': 'm', 'н': 'n', 'о': 'o', 'п': 'p', 'р': 'r',
+    'с': 's', 'т': 't', 'у': 'u', 'ф': 'f', 'х': 'x', 'ц': 'ts', 'ч': 'ch', 'ш': 'sh', 'щ': 'sh',
+    'ъ': '', 'ы': 'i', 'ь': '', 'э': 'e', 'ю': 'yu', 'я': 'ya',
+    'ў': 'o', 'қ': 'q', 'ғ': 'g', 'ҳ': 'h',
+}
+_TRANSLIT_TABLE = str.maketrans(
+    {**CYRILLIC_TO_LATIN, **{k.upper(): v.capitalize() for k, v in CYRILLIC_TO_LATIN.items()}}
+)
+
+def transliterate(text):
+    return (text or '').translate(_TRANSLIT_TABLE)
+
+
+def slug_base(text, max_length=SLUG_MAX_LENGTH, fallback='product'):
+    """Transliteratsiya + slugify; qo‘shimcha uchun joy qoldirib qisqartiriladi. Bo‘sh bo‘lsa ``fallback``."""
+    slug = slugify(transliterate(text))[:max_length - SLUG_SUFFIX_RESERVE].strip('-')
+    return slug or fallback
+
+
+def allocate_slugs(queryset, texts, reserved=(), field='slug'):
+    """
+    ``texts`` uchun unikal slug lar ro‘yxati (tartib saqlanadi). Band slug lar har
+    ``SLUG_QUERY_CHUNK`` ta base uchun bitta so‘rov bilan olinadi: ``^base(-N)?$`` regex i
+    literal prefix li — Postgres uni ``varchar_pattern_ops`` (``_like``) indeks oralig‘iga aylantiradi.
+    Birinchi bo‘sh raqam qo‘shiladi: ``telefon``, ``telefon-2``, ``telefon-3``... (qidiruv xotirada).
+
+    ``reserved`` — bazada hali yo‘q, lekin band deb hisoblanadigan slug lar (masalan, shu import
+    fayldagilar). Parallel yozuvlar uchun oxirgi kafolat — baribir unique indeks.
+    """
+    bases = [slug_base(text) for text in texts]
+    distinct = list(dict.fromkeys(bases))
+    taken = set(reserved)
+
+    chunks = iter(distinct)
+    while chunk := list(islice(chunks, SLUG_QUERY_CHUNK)):
+        condition = Q()
+        for base in chunk:
+            condition |= Q(**{f'{field}__regex': rf'^{re.escape(base)}(-[0-9]+)?$'})
+        taken.update(queryset.filter(condition).values_list(field, flat=True))
+
+    slugs = []
+    next_suffix = {}
+    for base in bases:
+        slug, n = base, next_suffix.get(base, 2)
+        while slug in taken:
+            slug, n = f'{base}-{n}', n + 1
+        next_suffix[base] = n
+        taken.add(slug)
+        slugs.append(slug)
+    return slugs
+
+
+def unique_slug(queryset, text, field='slug'):
+    """Bitta obyekt uchun unikal slug (bitta indeksli so‘rov)."""
+    return allocate_slugs(queryset, [text], field=field)[0]
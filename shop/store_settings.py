@@ -0,0 +1,23 @@
+from .caching import VersionedLocalCache
+from .models import StoreSettings
+
+
+def load_store_settings():
+    settings, _ = StoreSettings.objects.get_or_create(id=1)
+    return settings
+
+
+# Deyarli har so‘rovda o‘qiladi — versiya ham har 5 sekundda bir marta tekshiriladi
+_settings_cache = VersionedLocalCache('shop:store_settings:version', load_store_settings, check_interval=5)
+
+
+def get_store_settings():
+    """
+    Cache langan StoreSettings (id=1). Qaytgan obyekt processlar bo‘ylab umumiy —
+    faqat o‘qish uchun; o‘zgartirish uchun bazadan yangi nusxa oling.
+    """
+    return _settings_cache.get()
+
+
+def invalidate_store_settings():
+    _settings_cache.invalidate()
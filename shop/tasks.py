@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.core.mail import send_mail
+from django.template.loader import render_to_string
+
+from tasks.queue import task
+from .images import generate_derivatives
+from .models import Order, Product, ProductImage
+from .page_cache import touch_products
+
+
+@task(max_attempts=3, retry_delay=60)
+def generate_image_derivatives(name):
+    """Yuklangan rasm uchun thumbnail/WebP/JPEG nusxalar (shop.images)."""
+    if generate_derivatives(name):
+        # Cache dagi sahifa fragmentlari original <img> bilan qolmasin
+        product_ids = set(Product.objects.filter(image=name).values_list('id', flat=True))
+        product_ids.update(ProductImage.objects.filter(image=name).values_list('product_id', flat=True))
+        touch_products(product_ids)
+
+
+@task(max_attempts=5, retry_delay=60)
+def send_order_confirmation(order_id):
+    """Buyurtma tasdig‘i email i (snapshot narxlari bilan). Email i yo‘q user larga yuborilmaydi."""
+    order = Order.objects.select_related('user').filter(pk=order_id).first()
+    if order is None or not order.user.email:
+        return
+    context = {'order': order, 'lines': order.lines.order_by('id')}
+    send_mail(
+        subject=f"Buyurtma #{order.id} qabul qilindi",
+        message=render_to_string('shop/emails/order_confirmation.txt', context),
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        recipient_list=[order.user.email],
+    )
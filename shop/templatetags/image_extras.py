@@ -0,0 +1,45 @@
+from django import template
+from django.utils.html import format_html, format_html_join
+
+from shop.images import load_derivatives
+from shop.models import ImageDerivative
+
+register = template.Library()
+
+
+def _srcset(variants):
+    return ', '.join(f'{url} {width}w' for width, url in variants)
+
+
+@register.simple_tag
+def responsive_image(file, alt='', sizes='100vw', css_class='', width=None, **attrs):
+    """
+    ``<picture>``: WebP va JPEG derivativlar ``srcset`` bilan, brauzer ``sizes`` ga qarab tanlaydi.
+    Derivativlar hali tayyor bo‘lmasa (yoki rasm o‘qilmasa) — oddiy ``<img>`` original bilan.
+    Ro‘yxatlarda view da ``shop.images.attach_derivatives`` ni chaqiring (aks holda har rasmga bitta so‘rov).
+
+        {% responsive_image product.image alt=product.name sizes="(min-width: 992px) 25vw, 50vw" css_class="img-fluid" %}
+    """
+    if not file:
+        return ''
+    derivatives = getattr(file, 'derivatives', None)
+    if derivatives is None:
+        derivatives = load_derivatives([file.name]).get(file.name, {})
+
+    extra = format_html_join('', ' {}="{}"', attrs.items())
+    jpeg = derivatives.get(ImageDerivative.JPEG)
+    if not jpeg:
+        return format_html(
+            '<img src="{}" alt="{}" class="{}" loading="lazy"{}>', file.url, alt, css_class, extra,
+        )
+
+    # src — srcset ni tushunmaydigan brauzerlar uchun: ``width`` dan kichik bo‘lmagan eng kichik nusxa
+    fallback = next((url for w, url in jpeg if width is None or w >= int(width)), jpeg[-1][1])
+    sources = format_html_join(
+        '', '<source type="image/{}" srcset="{}" sizes="{}">',
+        ((fmt, _srcset(variants), sizes) for fmt, variants in derivatives.items() if fmt != ImageDerivative.JPEG),
+    )
+    return format_html(
+        '<picture>{}<img src="{}" srcset="{}" sizes="{}" alt="{}" class="{}" loading="lazy"{}></picture>',
+        sources, fallback, _srcset(jpeg), sizes, alt, css_class, extra,
+    )
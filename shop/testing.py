@@ -0,0 +1,114 @@
+from contextlib import contextmanager
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from user.models import CustomUser
+from .category_tree import get_category_tree, invalidate_category_tree
+from .models import Category, Order, OrderItem, Product, ProductReview
+from .store_settings import get_store_settings, invalidate_store_settings
+
+
+class QueryBudgetMixin:
+    """
+    TestCase uchun mixin: view SQL so‘rovlar soni ``settings.QUERY_BUDGETS`` dan
+    (yoki berilgan limitdan) oshmasligini tekshiradi. N+1 regressiyalar shu yerda yiqiladi.
+
+        class MyOrdersTests(QueryBudgetMixin, TestCase):
+            def test_budget(self):
+                response = self.client.get(reverse('shop:my_orders'))
+                self.assertWithinQueryBudget(response)
+    """
+
+    def assertWithinQueryBudget(self, response, budget=None):
+        metrics = getattr(response, 'request_metrics', None)
+        if metrics is None:
+            self.fail("response.request_metrics yo‘q — RequestMetricsMiddleware yoqilganmi?")
+        view_name = response.resolver_match.view_name
+        if budget is None:
+            budget = settings.QUERY_BUDGETS.get(view_name)
+        if budget is None:
+            self.fail(f"{view_name} uchun QUERY_BUDGETS da limit yo‘q")
+        self.assertLessEqual(
+            metrics.query_count, budget,
+            f"{view_name}: {metrics.query_count} ta SQL so‘rov (limit {budget})",
+        )
+
+    @contextmanager
+    def assertMaxQueries(self, budget, using=connection):
+        with CaptureQueriesContext(using) as captured:
+            yield captured
+        executed = len(captured.captured_queries)
+        if executed > budget:
+            queries = '\n'.join(f"{i}. {q['sql']}" for i, q in enumerate(captured.captured_queries, start=1))
+            self.fail(f"{executed} ta SQL so‘rov bajarildi (limit {budget}):\n{queries}")
+
+
+class ShopDataMixin:
+    """
+    TestCase uchun umumiy ma'lumot: N+1 ko‘rinishi uchun har narsadan bir nechta —
+    ``PRODUCTS`` ta product (2 kategoriyada), har bir xaridorda ``ORDERS_PER_USER`` ta buyurtma
+    (har birida ``LINES_PER_ORDER`` ta qator) va har bir productga har xaridordan review.
+    """
+
+    PASSWORD = 'test-pass-123'
+    PRODUCTS = 8
+    CUSTOMERS = 3
+    ORDERS_PER_USER = 6
+    LINES_PER_ORDER = 3
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.staff = CustomUser.objects.create_user('staff', 'staff@example.com', cls.PASSWORD, is_staff=True)
+        cls.customers = [
+            CustomUser.objects.create_user(f'xaridor{i}', f'xaridor{i}@example.com', cls.PASSWORD)
+            for i in range(cls.CUSTOMERS)
+        ]
+        cls.customer = cls.customers[0]
+
+        parent = Category.objects.create(name='Elektronika')
+        cls.category = Category.objects.create(name='Telefonlar', parent=parent)
+        cls.products = [
+            Product.objects.create(
+                name=f'Telefon {i}',
+                category=cls.category if i % 2 else parent,
+                price=Decimal('100.00') + i,
+                discount_price=Decimal('90.00') if i % 3 == 0 else None,
+                stock=50,
+                extra_data={'rang': 'qora' if i % 2 else 'oq'},
+            )
+            for i in range(cls.PRODUCTS)
+        ]
+        cls.product = cls.products[0]
+
+        for n, user in enumerate(cls.customers):
+            for product in cls.products:
+                ProductReview.objects.create(
+                    user=user, product=product, comment=f'Sharh {n}', stars_given=(product.id + n) % 5 + 1,
+                )
+            for i in range(cls.ORDERS_PER_USER):
+                lines = [cls.products[(i + k) % cls.PRODUCTS] for k in range(cls.LINES_PER_ORDER)]
+                order = Order.objects.create(
+                    user=user, total_price=sum(p.get_discounted_price() for p in lines),
+                    full_name=f'Xaridor {n}', phone='+998901234567', address='Toshkent',
+                )
+                OrderItem.objects.bulk_create(
+                    OrderItem(order=order, product=p, name=p.name, price=p.get_discounted_price(), quantity=1)
+                    for p in lines
+                )
+        cls.order = Order.objects.filter(user=cls.customer).latest('id')
+
+    def setUp(self):
+        super().setUp()
+        # TestCase rollback i cache ni tozalamaydi; on_commit invalidatsiyalari esa test ichida ishlamaydi
+        cache.clear()
+        invalidate_category_tree()
+        invalidate_store_settings()
+        # Process darajasidagi keshlar (sozlamalar qatori, kategoriya daraxti) — production dagi
+        # kabi issiq: budget lar bir martalik yuklashni emas, har so‘rov narxini o‘lchaydi
+        get_store_settings()
+        get_category_tree()
@@ -1,3 +1,902 @@
-from django.test import TestCase
+import json
+import re
+import shutil
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
 
-# Create your tests here.
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.http import QueryDict
+from django.template import Context, Template
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from PIL import Image
+
+from admin_dashboard.filters import filter_products
+from user.models import CustomUser
+from .cart import SUMMARY_SESSION_KEY, Cart
+from .category_tree import category_tree_version, get_category_tree
+from .checkout import EmptyCart, InsufficientStock, place_order
+from .facets import compute_facets, get_category_facets
+from .images import generate_derivatives
+from .management.commands.run_benchmarks import DEFAULT_SCENARIOS
+from .models import Category, ImageDerivative, Order, OrderItem, Product, ProductReview, StoreSettings
+from .orders import resolve_order_items
+from .pagination import keyset_paginate
+from .ratings import rebuild_ratings
+from .search import search_products
+from .slugs import allocate_slugs, slug_base
+from .store_settings import get_store_settings, invalidate_store_settings
+from .testing import QueryBudgetMixin, ShopDataMixin
+from .views import REVIEW_ORDERING, REVIEWS_PER_PAGE, STOREFRONT_ORDERING
+
+RATING_FIELDS = ('review_count', 'rating_sum', 'average_rating', 'stars_1', 'stars_2', 'stars_3', 'stars_4', 'stars_5')
+ADDRESS = {'full_name': 'Xaridor', 'phone': '+998901234567', 'address': 'Toshkent', 'note': ''}
+
+
+def rating_state(products):
+    return {row[0]: row[1:] for row in products.order_by('id').values_list('id', *RATING_FIELDS)}
+
+
+# ===== Query budget lar =====
+class StorefrontQueryBudgetTests(ShopDataMixin, QueryBudgetMixin, TestCase):
+    """Har bir view ``settings.QUERY_BUDGETS`` ichida — sahifadagi obyektlar soniga bog‘liq emas."""
+
+    def login(self):
+        self.client.force_login(self.customer)
+
+    def fill_cart(self):
+        session = self.client.session
+        session['cart'] = {str(p.id): 2 for p in self.products}
+        session['checkout_address'] = ADDRESS
+        session.save()
+
+    def test_home(self):
+        response = self.client.get(reverse('home'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['products']), len(self.products))
+        self.assertWithinQueryBudget(response)
+
+    def test_home_logged_in_with_filters(self):
+        self.login()
+        self.fill_cart()
+        response = self.client.get(reverse('home'), {
+            'category': self.category.id, 'sort': 'price_asc', 'min_price': '50', 'attr.rang': 'qora',
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['products'])
+        self.assertWithinQueryBudget(response)
+
+    def test_home_search(self):
+        response = self.client.get(reverse('home'), {'q': 'telefon'})
+        self.assertEqual(response.status_code, 200)
+        self.assertWithinQueryBudget(response)
+
+    def test_product_detail(self):
+        self.login()
+        response = self.client.get(reverse('shop:product_detail', args=[self.product.slug]))
+        self.assertEqual(response.status_code, 200)
+        self.assertWithinQueryBudget(response)
+
+    def test_product_detail_anonymous(self):
+        response = self.client.get(reverse('shop:product_detail', args=[self.product.slug]))
+        self.assertEqual(response.status_code, 200)
+        self.assertWithinQueryBudget(response)
+
+    def test_product_reviews(self):
+        ProductReview.objects.bulk_create(
+            ProductReview(user=self.customer, product=self.product, comment=f'Yana {i}', stars_given=4)
+            for i in range(25)
+        )
+        first = self.client.get(reverse('shop:product_reviews', args=[self.product.slug]))
+        self.assertEqual(first.status_code, 200)
+        self.assertWithinQueryBudget(first)
+        self.assertTrue(first.json()['next'])
+
+        self.login()
+        second = self.client.get(first.json()['next'])
+        self.assertEqual(second.status_code, 200)
+        self.assertWithinQueryBudget(second)
+
+    def test_cart_view(self):
+        self.fill_cart()
+        response = self.client.get(reverse('shop:cart_view'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['lines']), len(self.products))
+        self.assertWithinQueryBudget(response)
+
+    def test_cart_view_logged_in(self):
+        self.login()
+        self.fill_cart()
+        response = self.client.get(reverse('shop:cart_view'))
+        self.assertEqual(response.status_code, 200)
+        self.assertWithinQueryBudget(response)
+
+    def test_checkout_confirm(self):
+        self.login()
+        self.fill_cart()
+        response = self.client.get(reverse('shop:checkout_confirm'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.context['error'])
+        self.assertWithinQueryBudget(response)
+
+    def test_checkout_confirm_post(self):
+        self.login()
+        self.fill_cart()
+        response = self.client.post(reverse('shop:checkout_confirm'))
+        order = Order.objects.filter(user=self.customer).latest('id')
+        self.assertRedirects(response, reverse('shop:checkout_success', args=[order.id]))
+        self.assertEqual(order.lines.count(), len(self.products))
+        self.assertWithinQueryBudget(response)
+
+    def test_checkout_success(self):
+        self.login()
+        response = self.client.get(reverse('shop:checkout_success', args=[self.order.id]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['items']), self.LINES_PER_ORDER)
+        self.assertWithinQueryBudget(response)
+
+    def test_my_orders(self):
+        self.login()
+        response = self.client.get(reverse('shop:my_orders'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['orders_data']), 5)
+        self.assertWithinQueryBudget(response)
+
+
+# ===== Qidiruv (search_vector) =====
+class SearchTests(ShopDataMixin, TestCase):
+
+    def test_rank_orders_name_matches_before_description(self):
+        in_description = Product.objects.create(
+            name='Quloqchin', description='Simsiz smartfon uchun', category=self.category, price=Decimal('10.00'),
+        )
+        in_name = Product.objects.create(name='Smartfon Pro', category=self.category, price=Decimal('20.00'))
+
+        results, ordering = search_products(Product.objects.all(), 'smartfon')
+        self.assertEqual(ordering, ('-rank', '-id'))
+        self.assertEqual(list(results.order_by(*ordering)), [in_name, in_description])
+
+    def test_typo_falls_back_to_trigram_similarity(self):
+        results, ordering = search_products(Product.objects.all(), 'Telefn')
+        self.assertEqual(ordering, ('-similarity', '-id'))
+        self.assertEqual(set(results), set(self.products))
+
+    def test_save_without_search_changes_skips_vector_update(self):
+        product = Product.objects.get(pk=self.product.pk)
+        product.stock = 7
+        with CaptureQueriesContext(connection) as captured:
+            product.save()
+        updates = [q['sql'] for q in captured.captured_queries if q['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 1, updates)
+
+    def test_save_with_changed_extra_data_updates_vector(self):
+        product = Product.objects.get(pk=self.product.pk)
+        product.extra_data['brend'] = 'Xiaomi'
+        product.save()
+
+        results, _ = search_products(Product.objects.all(), 'xiaomi')
+        self.assertEqual(list(results), [self.product])
+
+
+# ===== Kategoriya daraxti cache i =====
+class CategoryTreeCacheTests(ShopDataMixin, TestCase):
+
+    def test_category_save_and_delete_invalidate_tree(self):
+        version = category_tree_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            category = Category.objects.create(name='Planshetlar', parent=self.category)
+        tree = get_category_tree()
+        self.assertIn(category.id, tree.descendant_ids(self.category.parent_id))
+        self.assertNotEqual(category_tree_version(), version)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            category.name = 'Planshet'
+            category.save()
+        self.assertEqual(get_category_tree().get(category.id).name, 'Planshet')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            category.delete()
+        self.assertIsNone(get_category_tree().get(category.id))
+        self.assertEqual(get_category_tree().descendant_ids(self.category.id), {self.category.id})
+
+    def test_tree_is_served_from_process_memory(self):
+        get_category_tree()
+        with self.assertNumQueries(0):
+            get_category_tree()
+
+    def test_process_local_cache_reloads_after_max_age(self):
+        # Boshqa worker dagi o‘zgarish: bu process ga invalidate() yetib kelmaydi
+        Category.objects.filter(pk=self.category.pk).update(name='Smartfonlar')
+        version = category_tree_version()
+        self.assertEqual(get_category_tree().get(self.category.pk).name, 'Telefonlar')
+
+        with override_settings(LOCAL_CACHE_MAX_AGE=0):
+            self.assertEqual(get_category_tree().get(self.category.pk).name, 'Smartfonlar')
+            self.assertNotEqual(category_tree_version(), version)
+
+
+# ===== Keyset pagination =====
+class KeysetPaginationTests(ShopDataMixin, TestCase):
+    ORDERING = ('-created_at', '-id')
+
+    def setUp(self):
+        super().setUp()
+        # Bir xil created_at — tartibni faqat tie-breaker (-id) ushlab turadi
+        ProductReview.objects.update(created_at=timezone.now() - timedelta(days=1))
+        self.reviews = ProductReview.objects.all()
+        self.expected = list(self.reviews.order_by(*self.ORDERING).values_list('id', flat=True))
+
+    def walk_forward(self, per_page):
+        ids, cursor, pages = [], None, []
+        while True:
+            page = keyset_paginate(self.reviews, self.ORDERING, per_page, after=cursor)
+            ids.extend(r.id for r in page)
+            pages.append(page)
+            if not page.has_next:
+                return ids, pages
+            cursor = page.next_cursor
+
+    def test_forward_walk_visits_every_row_once(self):
+        ids, pages = self.walk_forward(per_page=5)
+        self.assertEqual(ids, self.expected)
+        self.assertFalse(pages[0].has_previous)
+        self.assertTrue(all(page.has_previous for page in pages[1:]))
+
+    def test_previous_cursor_returns_previous_page(self):
+        _, pages = self.walk_forward(per_page=5)
+        back = keyset_paginate(self.reviews, self.ORDERING, 5, before=pages[2].previous_cursor)
+        self.assertEqual([r.id for r in back], [r.id for r in pages[1]])
+        self.assertTrue(back.has_next)
+
+    def test_invalid_cursor_falls_back_to_first_page(self):
+        page = keyset_paginate(self.reviews, self.ORDERING, 5, after='bu-cursor-emas')
+        self.assertEqual([r.id for r in page], self.expected[:5])
+        self.assertFalse(page.has_previous)
+
+    def test_cursor_from_other_ordering_is_rejected(self):
+        other = keyset_paginate(Product.objects.all(), ('price', 'id'), 2)
+        page = keyset_paginate(self.reviews, self.ORDERING, 5, after=other.next_cursor)
+        self.assertEqual([r.id for r in page], self.expected[:5])
+
+    def test_home_pages_cover_active_products(self):
+        StoreSettings.objects.update_or_create(id=1, defaults={'items_per_page': 3})
+        invalidate_store_settings()
+        Product.objects.filter(pk=self.products[-1].pk).update(is_active=False)
+        expected = list(Product.objects.filter(is_active=True).order_by(*STOREFRONT_ORDERING).values_list('id', flat=True))
+
+        ids, params = [], {}
+        while True:
+            page = self.client.get(reverse('home'), params).context['page']
+            ids.extend(p.id for p in page)
+            if not page.has_next:
+                break
+            params = {'after': page.next_cursor}
+        self.assertEqual(ids, expected)
+
+
+# ===== Buyurtma qatorlari (resolve_order_items) =====
+class OrderItemResolverTests(ShopDataMixin, TestCase):
+
+    def test_deleted_product_falls_back_to_snapshot(self):
+        # self.order: products[5], products[6], products[7]
+        deleted = self.products[6]
+        OrderItem.objects.filter(product=deleted).update(image='/media/products/eski.jpg')
+        deleted.delete()
+
+        lines = resolve_order_items([self.order])[self.order.id]
+        self.assertEqual([line.name for line in lines], ['Telefon 5', 'Telefon 6', 'Telefon 7'])
+        line = lines[1]
+        self.assertTrue(line.deleted)
+        self.assertIsNone(line.product_id)
+        self.assertEqual(line.price, Decimal('90.00'))  # buyurtma paytidagi chegirmali narx
+        self.assertEqual(line.line_total, Decimal('90.00'))
+        self.assertEqual(line.image_url, '/media/products/eski.jpg')
+        self.assertFalse(lines[0].deleted)
+        self.assertEqual(lines[0].product, self.products[5])
+
+    def test_my_orders_and_admin_show_deleted_line(self):
+        self.products[6].delete()
+
+        self.client.force_login(self.customer)
+        response = self.client.get(reverse('shop:my_orders'))
+        self.assertContains(response, 'Bu mahsulot Bazada vaqtincha mavjud emas!', count=2)
+
+        self.client.force_login(CustomUser.objects.create_superuser('root', 'root@example.com', self.PASSWORD))
+        response = self.client.get(reverse('admin:shop_order_changelist'))
+        self.assertContains(response, 'Telefon 6 (x1, deleted)')
+
+    def test_orders_without_lines(self):
+        order = Order.objects.create(user=self.customer, total_price=0, full_name='X', phone='+998', address='-')
+        self.assertEqual(resolve_order_items([order]), {order.id: []})
+        self.assertEqual(resolve_order_items([]), {})
+
+
+# ===== Savat (Cart summary) =====
+class CartTests(ShopDataMixin, TestCase):
+
+    def make_cart(self):
+        request = RequestFactory().get('/')
+        request.session = SessionStore()
+        return Cart(request)
+
+    def test_subtotal_is_exact_decimal(self):
+        Product.objects.filter(pk=self.products[1].pk).update(price=Decimal('0.10'))
+        cart = self.make_cart()
+        cart.add(self.products[1].id, 3)
+        cart.add(self.products[0].id)
+
+        summary = cart.summary
+        # float bilan 0.1 * 3 = 0.30000000000000004 bo‘lardi
+        self.assertEqual(summary.lines[0].line_total, Decimal('0.30'))
+        self.assertEqual(summary.subtotal, Decimal('90.30'))
+        self.assertEqual(summary.item_count, 4)
+        self.assertEqual(cart.count, 4)
+
+    def test_summary_is_cached_until_cart_changes(self):
+        cart = self.make_cart()
+        cart.add(self.products[1].id, 2)
+        with self.assertNumQueries(0):
+            self.assertEqual(cart.summary.subtotal, Decimal('202.00'))
+
+        cart.remove(self.products[1].id)
+        with self.assertNumQueries(0):
+            self.assertEqual(cart.summary.subtotal, Decimal('0'))
+            self.assertEqual(cart.summary.lines, [])
+
+    def test_free_delivery_threshold(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            store = StoreSettings.objects.get(pk=1)
+            store.free_delivery_min = Decimal('300.00')
+            store.save()
+        cart = self.make_cart()
+        cart.add(self.products[1].id, 2)
+        summary = cart.summary
+        self.assertFalse(summary.free_delivery)
+        self.assertEqual(summary.amount_to_free_delivery, Decimal('98.00'))
+
+        cart.add(self.products[1].id)
+        summary = cart.summary
+        self.assertTrue(summary.free_delivery)
+        self.assertEqual(summary.amount_to_free_delivery, Decimal('0'))
+
+    def test_add_and_remove_views_update_session_summary(self):
+        self.client.post(reverse('shop:add_to_cart', args=[self.products[1].id]))
+        self.client.post(reverse('shop:add_to_cart', args=[self.products[1].id]))
+        summary = self.client.session[SUMMARY_SESSION_KEY]
+        self.assertEqual(summary['items'], {str(self.products[1].id): 2})
+        self.assertEqual(summary['subtotal'], '202.00')
+
+        self.client.post(reverse('shop:remove_from_cart', args=[self.products[1].id]))
+        self.assertEqual(self.client.session[SUMMARY_SESSION_KEY]['lines'], [])
+
+
+# ===== Do‘kon sozlamalari va maintenance rejimi =====
+class StoreSettingsTests(ShopDataMixin, TestCase):
+
+    def set_maintenance(self, enabled):
+        with self.captureOnCommitCallbacks(execute=True):
+            store = StoreSettings.objects.get(pk=1)
+            store.maintenance_mode = enabled
+            store.save()
+
+    def test_settings_are_served_from_process_memory(self):
+        with self.assertNumQueries(0):
+            self.assertFalse(get_store_settings().maintenance_mode)
+
+    def test_save_invalidates_settings(self):
+        self.set_maintenance(True)
+        self.assertTrue(get_store_settings().maintenance_mode)
+
+    def test_process_local_cache_reloads_after_max_age(self):
+        # Boshqa worker saqlagan sozlama: invalidate() bu process ga yetib kelmaydi
+        StoreSettings.objects.filter(pk=1).update(maintenance_mode=True)
+        self.assertFalse(get_store_settings().maintenance_mode)
+        with override_settings(LOCAL_CACHE_MAX_AGE=0):
+            self.assertTrue(get_store_settings().maintenance_mode)
+
+    def test_maintenance_closes_storefront(self):
+        self.set_maintenance(True)
+        response = self.client.get(reverse('home'))
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '600')
+        self.assertTemplateUsed(response, 'maintenance.html')
+
+        self.client.force_login(self.customer)
+        self.assertEqual(self.client.get(reverse('shop:cart_view')).status_code, 503)
+
+    def test_maintenance_exemptions(self):
+        self.set_maintenance(True)
+        for url in (reverse('user:login'), reverse('admin:index'), reverse('admin_dashboard:dashboard_home')):
+            with self.subTest(url=url):
+                self.assertNotEqual(self.client.get(url).status_code, 503)
+
+        self.client.force_login(self.staff)
+        self.assertEqual(self.client.get(reverse('home')).status_code, 200)
+
+    def test_storefront_open_when_maintenance_off(self):
+        self.assertEqual(self.client.get(reverse('home')).status_code, 200)
+
+
+# ===== Benchmark buyruqlari (smoke) =====
+class BenchmarkCommandTests(TestCase):
+
+    def test_generate_catalog_and_run_benchmarks(self):
+        call_command(
+            'generate_catalog', products=40, users=4, reviews=60, orders=12,
+            category_depth=2, category_branching=2, batch_size=16, stdout=StringIO(),
+        )
+        self.assertEqual(Product.objects.count(), 40)
+        self.assertEqual(Category.objects.count(), 6)
+        self.assertEqual(Order.objects.count(), 12)
+        self.assertFalse(Product.objects.filter(search_vector__isnull=True).exists())
+
+        output = StringIO()
+        call_command('run_benchmarks', repeat=2, warmup=0, stdout=output)
+        report = json.loads(output.getvalue())
+        self.assertEqual(report['meta']['repeat'], 2)
+        self.assertEqual(set(report['results']), set(DEFAULT_SCENARIOS))
+        for name, row in report['results'].items():
+            with self.subTest(scenario=name):
+                self.assertIn(row['status'], (200, 302))
+                self.assertLessEqual(row['p50_ms'], row['p99_ms'])
+        # Benchmark yozgan hamma narsa (staff user, buyurtmalar) rollback qilinadi
+        self.assertEqual(Order.objects.count(), 12)
+
+
+# ===== Reyting agregatlari =====
+class RatingAggregateTests(ShopDataMixin, TestCase):
+    """Inkremental yangilanishlar ``rebuild_ratings`` (to‘liq qayta hisob) bilan bir xil natija beradi."""
+
+    def assertMatchesRebuild(self, products=None):
+        products = products or Product.objects.all()
+        incremental = rating_state(products)
+        rebuild_ratings(products)
+        self.assertEqual(rating_state(products), incremental)
+
+    def test_create_edit_delete(self):
+        review = ProductReview.objects.create(user=self.staff, product=self.product, comment='a', stars_given=5)
+        self.assertMatchesRebuild()
+
+        review = ProductReview.objects.get(pk=review.pk)
+        review.stars_given = 1
+        review.save()
+        self.assertMatchesRebuild()
+
+        review.product = self.products[1]
+        review.save()
+        self.assertMatchesRebuild()
+
+        review.delete()
+        self.assertMatchesRebuild()
+
+    def test_user_delete_applies_grouped_deltas(self):
+        CustomUser.objects.filter(pk__in=[u.pk for u in self.customers[:2]]).delete()
+        self.assertMatchesRebuild()
+        self.customers[2].delete()
+        self.assertMatchesRebuild()
+        self.assertFalse(Product.objects.filter(review_count__gt=0).exists())
+
+    def test_product_delete_skips_per_review_updates(self):
+        # Review lar product bilan birga o‘chadi — har biri uchun reyting/updated_at UPDATE i kerak emas
+        with CaptureQueriesContext(connection) as captured:
+            self.product.delete()
+        product_updates = [q['sql'] for q in captured.captured_queries if q['sql'].startswith('UPDATE "shop_product"')]
+        self.assertEqual(product_updates, [])
+
+
+# ===== Product review lari =====
+class ProductReviewPageTests(ShopDataMixin, TestCase):
+
+    def test_histogram(self):
+        Product.objects.filter(pk=self.product.pk).update(**{field: 0 for field in RATING_FIELDS})
+        ProductReview.objects.filter(product=self.product).delete()
+        for stars in (5, 5, 4, 1):
+            ProductReview.objects.create(user=self.staff, product=self.product, comment='x', stars_given=stars)
+
+        product = Product.objects.get(pk=self.product.pk)
+        self.assertEqual((product.review_count, product.rating_sum, product.average_rating), (4, 15, 3.75))
+        self.assertEqual(product.star_histogram(), [(5, 2, 50), (4, 1, 25), (3, 0, 0), (2, 0, 0), (1, 1, 25)])
+
+    def test_review_pages_cover_all_reviews(self):
+        ProductReview.objects.bulk_create(
+            ProductReview(user=self.customer, product=self.product, comment=f'Yana {i}', stars_given=4)
+            for i in range(REVIEWS_PER_PAGE * 2)
+        )
+        expected = list(self.product.reviews.order_by(*REVIEW_ORDERING).values_list('id', flat=True))
+
+        response = self.client.get(reverse('shop:product_detail', args=[self.product.slug]))
+        page = response.context['review_page']()
+        ids = [r.id for r in page]
+        url = page.more_url
+        while url:
+            data = self.client.get(url).json()
+            ids.extend(int(pk) for pk in re.findall(r'/shop/review/edit/(\d+)/', data['html']))
+            url = data['next']
+        self.assertEqual(ids, expected)
+
+
+# ===== Narx filtri va saralash =====
+class PriceFilterTests(ShopDataMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        StoreSettings.objects.update_or_create(id=1, defaults={'items_per_page': 3})
+        invalidate_store_settings()
+        # discount_price=0 — chegirma yo‘q (get_discounted_price kabi)
+        Product.objects.filter(pk=self.products[1].pk).update(discount_price=0)
+        self.prices = {p.id: p.get_discounted_price() for p in Product.objects.all()}
+
+    def listing(self, **params):
+        ids = []
+        while True:
+            page = self.client.get(reverse('home'), params).context['page']
+            ids.extend(p.id for p in page)
+            if not page.has_next:
+                return ids
+            params['after'] = page.next_cursor
+
+    def test_effective_price_matches_discounted_price(self):
+        self.assertEqual(dict(Product.objects.values_list('id', 'effective_price')), self.prices)
+
+    def test_sort_walks_all_pages(self):
+        ascending = sorted(self.prices, key=lambda pk: (self.prices[pk], pk))
+        self.assertEqual(self.listing(sort='price_asc'), ascending)
+        self.assertEqual(self.listing(sort='price_desc'), ascending[::-1])
+
+    def test_min_max_filter(self):
+        ids = self.listing(min_price='95', max_price='105', sort='price_asc')
+        self.assertEqual(set(ids), {pk for pk, price in self.prices.items() if 95 <= price <= 105})
+        self.assertEqual(
+            set(filter_products(Product.objects.all(), {'min_price': '95', 'max_price': '105'}).values_list('id', flat=True)),
+            set(ids),
+        )
+
+    def test_invalid_bounds_are_ignored(self):
+        for value in ('abc', '-5', 'NaN', 'Infinity'):
+            with self.subTest(value=value):
+                self.assertEqual(len(self.listing(min_price=value)), len(self.products))
+
+
+# ===== Atribut facet lari =====
+class FacetTests(ShopDataMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        # ram — son (JSON number), ikkinchi product — obyekt emas, oxirgisi — nofaol
+        for product in self.products:
+            product.extra_data = {**product.extra_data, 'ram': 8 if product.id % 2 else 16}
+        self.products[2].extra_data = ['ro‘yxat']
+        self.products[-1].is_active = False
+        Product.objects.bulk_update(self.products, ['extra_data', 'is_active'])
+        self.parent = self.category.parent
+
+    def expected_counts(self, key, products):
+        counts = {}
+        for p in products:
+            if p.is_active and isinstance(p.extra_data, dict) and key in p.extra_data:
+                value = str(p.extra_data[key])
+                counts[value] = counts.get(value, 0) + 1
+        return counts
+
+    def listing(self, params):
+        return {p.id for p in self.client.get(reverse('home'), params).context['products']}
+
+    def test_compute_facets_covers_descendants(self):
+        facets = dict(compute_facets(get_category_tree().descendant_ids(self.parent.id)))
+        self.assertEqual(set(facets), {'rang', 'ram'})
+        self.assertEqual(dict(facets['rang']), self.expected_counts('rang', self.products))
+        self.assertEqual(dict(facets['ram']), self.expected_counts('ram', self.products))
+
+        child = dict(compute_facets({self.category.id}))
+        children = [p for p in self.products if p.category_id == self.category.id]
+        self.assertEqual(dict(child['rang']), self.expected_counts('rang', children))
+
+    def test_filters_or_within_key_and_across_keys(self):
+        active = [p for p in self.products if p.is_active and isinstance(p.extra_data, dict)]
+        params = QueryDict(mutable=True)
+        params.setlist('attr.rang', ['qora', 'oq'])
+        self.assertEqual(self.listing(params), {p.id for p in active})
+
+        params['attr.ram'] = '16'  # URL da string — JSON dagi son bilan ham mos kelishi kerak
+        self.assertEqual(self.listing(params), {p.id for p in active if p.extra_data['ram'] == 16})
+
+        params['attr.rang'] = 'qora'
+        self.assertEqual(
+            self.listing(params), {p.id for p in active if p.extra_data['ram'] == 16 and p.extra_data['rang'] == 'qora'},
+        )
+
+    def test_cached_facets_invalidated_on_product_save(self):
+        before = dict(get_category_facets(self.parent.id))
+        product = Product.objects.get(pk=self.products[1].pk)
+        product.extra_data = {'rang': 'yashil'}
+        with self.captureOnCommitCallbacks(execute=True):
+            product.save()
+        after = dict(get_category_facets(self.parent.id))
+        self.assertNotIn('yashil', dict(before['rang']))
+        self.assertEqual(dict(after['rang'])['yashil'], 1)
+
+
+# ===== Checkout =====
+class PlaceOrderTests(ShopDataMixin, TestCase):
+
+    def test_success_decrements_stock_and_writes_lines(self):
+        cart = {str(self.products[0].id): 2, str(self.products[1].id): 1}
+        order = place_order(self.customer, cart, ADDRESS)
+
+        stock = dict(Product.objects.filter(pk__in=[p.id for p in self.products[:2]]).values_list('id', 'stock'))
+        self.assertEqual(stock, {self.products[0].id: 48, self.products[1].id: 49})
+        lines = {line.product_id: (line.quantity, line.price) for line in order.lines.all()}
+        self.assertEqual(lines, {
+            self.products[0].id: (2, self.products[0].get_discounted_price()),
+            self.products[1].id: (1, self.products[1].get_discounted_price()),
+        })
+        self.assertEqual(order.total_price, self.products[0].get_discounted_price() * 2 + self.products[1].get_discounted_price())
+
+    def test_insufficient_stock_rolls_back_everything(self):
+        Product.objects.filter(pk=self.products[1].pk).update(stock=1)
+        orders_before = Order.objects.count()
+        cart = {str(self.products[0].id): 2, str(self.products[1].id): 3}
+
+        with self.assertRaises(InsufficientStock) as raised:
+            place_order(self.customer, cart, ADDRESS)
+        self.assertEqual(raised.exception.product_name, self.products[1].name)
+        self.assertEqual(raised.exception.available, 1)
+        self.assertEqual(Product.objects.get(pk=self.products[0].pk).stock, 50)
+        self.assertEqual(Order.objects.count(), orders_before)
+
+    def test_shortage_reports_stock_before_update(self):
+        # Birinchi qator yangilanadi (3 -> 1 < 2): rollback siz aynan u aybdor chiqardi
+        Product.objects.filter(pk=self.products[0].pk).update(stock=3)
+        Product.objects.filter(pk=self.products[1].pk).update(stock=1)
+        cart = {str(self.products[0].id): 2, str(self.products[1].id): 3}
+
+        with self.assertRaises(InsufficientStock) as raised:
+            place_order(self.customer, cart, ADDRESS)
+        self.assertEqual(raised.exception.product_name, self.products[1].name)
+        self.assertEqual(raised.exception.available, 1)
+        self.assertEqual(Product.objects.get(pk=self.products[0].pk).stock, 3)
+
+    def test_missing_product_is_insufficient(self):
+        with self.assertRaises(InsufficientStock):
+            place_order(self.customer, {'999999': 1}, ADDRESS)
+
+    def test_empty_cart(self):
+        with self.assertRaises(EmptyCart):
+            place_order(self.customer, {str(self.product.id): 0, 'abc': 1}, ADDRESS)
+
+    def test_view_shows_stock_error(self):
+        Product.objects.filter(pk=self.product.pk).update(stock=0)
+        self.client.force_login(self.customer)
+        session = self.client.session
+        session['cart'] = {str(self.product.id): 1}
+        session['checkout_address'] = ADDRESS
+        session.save()
+
+        response = self.client.post(reverse('shop:checkout_confirm'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(self.product.name, response.context['error'])
+
+    def test_view_redirects_empty_cart(self):
+        self.client.force_login(self.customer)
+        session = self.client.session
+        session['cart'] = {str(self.product.id): 0}
+        session['checkout_address'] = ADDRESS
+        session.save()
+
+        response = self.client.post(reverse('shop:checkout_confirm'))
+        self.assertRedirects(response, reverse('shop:cart_view'))
+
+
+# ===== Slug lar =====
+class SlugTests(ShopDataMixin, TestCase):
+
+    def test_slug_base_transliterates(self):
+        self.assertEqual(slug_base('Телефон Ўзбек'), 'telefon-ozbek')
+        self.assertEqual(slug_base('!!!'), 'product')
+
+    def test_allocate_slugs_skips_taken_and_duplicates(self):
+        slugs = allocate_slugs(Product.objects.all(), ['Telefon 0', 'Telefon 0', 'Телефон', 'Yangi'], reserved={'yangi'})
+        self.assertEqual(slugs, ['telefon-0-2', 'telefon-0-3', 'telefon', 'yangi-2'])
+
+    def test_allocate_slugs_does_not_match_longer_prefix(self):
+        # "telefon-1" bor, lekin "telefon" base i uchun faqat ^telefon(-N)?$ band hisoblanadi
+        self.assertEqual(allocate_slugs(Product.objects.all(), ['Telefon']), ['telefon'])
+
+    def test_product_save_allocates_unique_slug(self):
+        product = Product.objects.create(name='Telefon 0', category=self.category, price=Decimal('1.00'))
+        self.assertEqual(product.slug, 'telefon-0-2')
+
+
+# ===== Rasm derivativlari =====
+@override_settings(IMAGE_DERIVATIVE_WIDTHS=(100, 200))
+class ImageDerivativeTests(TestCase):
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def save_image(self, size, exif=None, name='products/rasm.jpg'):
+        buffer = BytesIO()
+        Image.new('RGB', size, 'red').save(buffer, format='JPEG', exif=exif or Image.Exif())
+        return default_storage.save(name, ContentFile(buffer.getvalue()))
+
+    def variants(self, name):
+        return set(ImageDerivative.objects.filter(source=name).values_list('width', 'height', 'format'))
+
+    def test_generates_each_width_and_format_once(self):
+        name = self.save_image((400, 200))
+        self.assertEqual(generate_derivatives(name), 4)
+        self.assertEqual(self.variants(name), {
+            (100, 50, 'webp'), (100, 50, 'jpeg'), (200, 100, 'webp'), (200, 100, 'jpeg'),
+        })
+        for file in ImageDerivative.objects.values_list('file', flat=True):
+            self.assertTrue(default_storage.exists(file))
+        self.assertEqual(generate_derivatives(name), 0)
+
+    def test_small_original_is_not_upscaled(self):
+        name = self.save_image((150, 90))
+        self.assertEqual(generate_derivatives(name), 4)
+        self.assertEqual({width for width, _, _ in self.variants(name)}, {100, 150})
+        self.assertEqual(generate_derivatives(name), 0)
+
+    def test_exif_rotation(self):
+        exif = Image.Exif()
+        exif[0x0112] = 6  # 90° — eni va bo‘yi almashadi
+        name = self.save_image((300, 150), exif=exif)
+        generate_derivatives(name)
+        self.assertEqual({(w, h) for w, h, _ in self.variants(name)}, {(100, 200), (150, 300)})
+
+    def test_unreadable_file(self):
+        name = default_storage.save('products/buzuq.jpg', ContentFile(b'rasm emas'))
+        self.assertEqual(generate_derivatives(name), 0)
+        self.assertFalse(ImageDerivative.objects.exists())
+
+    def test_responsive_image_tag(self):
+        name = self.save_image((400, 200))
+        file = Product(image=name).image
+        template = Template('{% load image_extras %}{% responsive_image file alt="Rasm" width=150 %}')
+
+        self.assertIn('<img src="%s"' % file.url, template.render(Context({'file': file})))
+
+        generate_derivatives(name)
+        html = template.render(Context({'file': file}))
+        self.assertIn('<source type="image/webp" srcset="', html)
+        self.assertIn(' 100w, ', html)
+        jpeg_200 = ImageDerivative.objects.get(source=name, width=200, format='jpeg')
+        self.assertIn(f'<img src="{default_storage.url(jpeg_200.file)}"', html)
+
+
+# ===== Product sahifasi (ETag / 304) =====
+class ProductPageConditionalTests(ShopDataMixin, QueryBudgetMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        # Test bitta tranzaksiyada — NOW() o‘zgarmaydi; touch_products farqi ko‘rinishi uchun eski sana
+        Product.objects.filter(pk=self.product.pk).update(updated_at=timezone.now() - timedelta(days=1))
+        self.url = reverse('shop:product_detail', args=[self.product.slug])
+
+    def test_anonymous_etag_and_last_modified(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('max-age=0', response['Cache-Control'])
+        self.assertNotIn('private', response['Cache-Control'])
+
+        with self.assertMaxQueries(2):
+            not_modified = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified.content, b'')
+        self.assertEqual(not_modified['ETag'], response['ETag'])
+
+        by_date = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(by_date.status_code, 304)
+
+    def test_review_changes_etag_and_fragment(self):
+        etag = self.client.get(self.url)['ETag']
+        ProductReview.objects.create(user=self.staff, product=self.product, comment='Yangi sharh matni', stars_given=5)
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertContains(response, 'Yangi sharh matni')
+
+    def test_cart_changes_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        session = self.client.session
+        session['cart'] = {str(self.product.id): 1}
+        session.save()
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_logged_in_page_is_private_and_per_user(self):
+        self.client.force_login(self.customer)
+        response = self.client.get(self.url)
+        self.assertIn('private', response['Cache-Control'])
+        self.assertFalse(response.has_header('Last-Modified'))
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+        self.client.force_login(self.customers[1])
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+
+    def test_pending_messages_are_not_304(self):
+        self.client.force_login(self.customer)
+        etag = self.client.get(self.url)['ETag']
+        # Noto‘g‘ri reyting — redirect, xato xabari keyingi GET da ko‘rsatilishi kerak
+        self.assertRedirects(self.client.post(self.url, {'comment': 'x', 'stars': '9'}), self.url, fetch_redirect_response=False)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['ETag'], etag)
+
+
+# ===== OrderItem backfill migratsiyasi (0016/0017) =====
+class OrderItemBackfillMigrationTests(TransactionTestCase):
+    """Eski ``Order.items`` / ``Order.snapshots`` dan ``OrderItem`` ga ko‘chirish."""
+
+    def migrate(self, target):
+        executor = MigrationExecutor(connection)
+        executor.migrate([target])
+        return executor.loader.project_state([target]).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+        super().tearDown()
+
+    def lines(self, apps, order):
+        OrderItem = apps.get_model('shop', 'OrderItem')
+        return sorted(
+            OrderItem.objects.filter(order_id=order.id).values_list('product_id', 'name', 'price', 'quantity'),
+            key=lambda line: line[1],
+        )
+
+    def test_backfill(self):
+        apps = self.migrate(('shop', '0015_order_item'))
+        Order = apps.get_model('shop', 'Order')
+        OrderItem = apps.get_model('shop', 'OrderItem')
+        Snapshot = apps.get_model('shop', 'OrderItemSnapshot')
+        Product = apps.get_model('shop', 'Product')
+        category = apps.get_model('shop', 'Category').objects.create(name='Telefonlar')
+        user = apps.get_model('user', 'CustomUser').objects.create(username='xaridor')
+        a = Product.objects.create(name='A', slug='a', category=category, price=Decimal('100'), discount_price=Decimal('80'))
+        b = Product.objects.create(name='B', slug='b', category=category, price=Decimal('50'), discount_price=0)
+
+        def order(**kwargs):
+            return Order.objects.create(user=user, total_price=0, **kwargs)
+
+        # Snapshot li: buyurtma paytidagi nom/narx; product i o‘chganlar product_id siz
+        with_snapshots = order(items={str(a.id): 2})
+        with_snapshots.snapshots.set([
+            Snapshot.objects.create(product_id=a.id, name='A (eski nom)', image='', price=Decimal('70'), quantity=2),
+            Snapshot.objects.create(product_id=999999, name='O‘chgan', image='', price=Decimal('10'), quantity=1),
+        ])
+        # Snapshotsiz eski buyurtma: joriy (chegirmali) narx; o‘chgan product qatori "#id", narxsiz
+        legacy = order(items={str(a.id): 1, str(b.id): 3, '999999': 5})
+        # Qatorlari bor buyurtma tegilmaydi (qayta ishga tushirish)
+        done = order(items={str(a.id): 4})
+        OrderItem.objects.create(order=done, product=a, name='Tayyor', price=Decimal('1'), quantity=1)
+
+        apps = self.migrate(('shop', '0016_backfill_order_items'))
+        self.assertEqual(self.lines(apps, with_snapshots), [
+            (a.id, 'A (eski nom)', Decimal('70.00'), 2), (None, 'O‘chgan', Decimal('10.00'), 1),
+        ])
+        self.assertEqual(self.lines(apps, legacy), [
+            (None, '#999999', Decimal('0.00'), 5), (a.id, 'A', Decimal('80.00'), 1), (b.id, 'B', Decimal('50.00'), 3),
+        ])
+        self.assertEqual(self.lines(apps, done), [(a.id, 'Tayyor', Decimal('1.00'), 1)])
+
+        # 0016 va 0017 orasida eski kod yozgan buyurtma — 0017 ustunlarni o‘chirishdan oldin ko‘chiradi
+        late = apps.get_model('shop', 'Order').objects.create(user_id=user.id, total_price=0, items={str(b.id): 2})
+        apps = self.migrate(('shop', '0017_remove_order_items_snapshots'))
+        self.assertEqual(self.lines(apps, late), [(b.id, 'B', Decimal('50.00'), 2)])
+        self.assertEqual(apps.get_model('shop', 'OrderItem').objects.count(), 7)
@@ -6,6 +6,7 @@ app_name = 'shop'
 urlpatterns = [
     # product
     path('product/<slug:slug>/', views.product_detail, name='product_detail'),
+    path('product/<slug:slug>/reviews/', views.product_reviews, name='product_reviews'),
 
     # review
     path('review/edit/<int:review_id>/', views.edit_review, name='edit_review'),
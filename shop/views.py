@@ -1,8 +1,22 @@
+from decimal import Decimal
+
+from django.http import JsonResponse
 from django.shortcuts import render, get_object_or_404, redirect
-from django.db.models import Q
+from django.template.loader import render_to_string
+from django.urls import reverse
 
 from .forms import CheckoutAddressForm
-from .models import Product, Category, Order, OrderItemSnapshot, ProductReview
+from .models import Product, Order, ProductReview
+from .cart import Cart
+from .category_tree import get_category_tree
+from .checkout import EmptyCart, InsufficientStock, cart_quantities, place_order
+from .facets import ATTR_PARAM_PREFIX, attribute_filters, filter_by_attributes, get_category_facets
+from .images import attach_derivatives
+from .orders import resolve_order_items
+from .page_cache import PRODUCT_FRAGMENT_TTL, conditional_product_response, set_conditional_headers
+from .pagination import keyset_paginate
+from .search import search_products
+from .store_settings import get_store_settings
 from django.contrib.auth.decorators import login_required
 from django.contrib.admin.views.decorators import staff_member_required
 from django.views.decorators.http import require_POST
@@ -10,35 +24,107 @@ from django.contrib import messages
 from django.core.paginator import Paginator
 
 
+# Storefront tartibi; oxirgi '-id' keyset pagination uchun unikal tie-breaker
+STOREFRONT_ORDERING = ('-average_rating', '-review_count', '-created_at', '-id')
+# ?sort= qiymatlari -> keyset ordering (narx — product_price_idx bo‘yicha)
+PRICE_ORDERINGS = {
+    'price_asc': ('effective_price', 'id'),
+    'price_desc': ('-effective_price', '-id'),
+}
+# Product sahifasidagi review lar: review_product_created_idx (product, -created_at, -id) bo‘yicha
+REVIEW_ORDERING = ('-created_at', '-id')
+REVIEWS_PER_PAGE = 10
+
 
 def home(request):
     query = request.GET.get('q', '')
     category_id = request.GET.get('category')
+    facets = []
 
     products = Product.objects.filter(is_active=True)
-    if query:
-        products = products.filter(
-            Q(name__icontains=query) |
-            Q(description__icontains=query) |
-            Q(extra_data__icontains=query)
-        )
     if category_id:
-        products = products.filter(category_id=category_id)
+        # Ota kategoriya tanlansa, uning barcha avlodlaridagi productlar ham chiqadi
+        try:
+            category_ids = get_category_tree().descendant_ids(int(category_id))
+        except ValueError:
+            category_ids = ()
+        products = products.filter(category_id__in=category_ids)
+        if category_ids:
+            facets = get_category_facets(int(category_id))
+
+    attr_filters = attribute_filters(request.GET)
+    if attr_filters:
+        products = filter_by_attributes(products, attr_filters)
+
+    min_price = _price_param(request.GET.get('min_price'))
+    max_price = _price_param(request.GET.get('max_price'))
+    if min_price is not None:
+        products = products.filter(effective_price__gte=min_price)
+    if max_price is not None:
+        products = products.filter(effective_price__lte=max_price)
+
+    ordering = STOREFRONT_ORDERING
+    if query:
+        products, ordering = search_products(products, query)
+    sort = request.GET.get('sort', '')
+    if sort in PRICE_ORDERINGS:
+        # Qidiruvda ham: filtr qidiruvniki, tartib — narx bo‘yicha
+        ordering = PRICE_ORDERINGS[sort]
+
+    per_page = get_store_settings().items_per_page or 12
+
+    page = keyset_paginate(
+        products,
+        ordering,
+        per_page,
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+    )
 
-    products = products.order_by('-average_rating', '-review_count', '-created_at')
-    categories = Category.objects.filter(parent__isnull=True)
+    attach_derivatives(product.image for product in page.object_list)
 
     return render(request, 'home.html', {
-        'products': products,
-        'categories': categories,
-        'query': query
+        'products': page.object_list,
+        'page': page,
+        'query': query,
+        'sort': sort,
+        **_facet_context(facets, attr_filters),
     })
 
 
+def _facet_context(facets, attr_filters):
+    """
+    ``facet_groups`` — checkbox lar: ``(param, kalit, [(qiymat, soni, tanlangan), ...])``;
+    ``hidden_attrs`` — facet larda ko‘rinmaydigan tanlangan filtrlar (forma qayta yuborilganda yo‘qolmasin).
+    """
+    facet_groups = []
+    shown = set()
+    for key, values in facets:
+        selected = set(attr_filters.get(key, ()))
+        facet_groups.append((
+            f'{ATTR_PARAM_PREFIX}{key}', key,
+            [(value, count, value in selected) for value, count in values],
+        ))
+        shown.update((key, value) for value, _ in values)
+    hidden_attrs = [
+        (f'{ATTR_PARAM_PREFIX}{key}', value)
+        for key, values in attr_filters.items() for value in values if (key, value) not in shown
+    ]
+    return {'facet_groups': facet_groups, 'hidden_attrs': hidden_attrs}
+
+
+def _price_param(value):
+    """GET dagi narx chegarasi: noto‘g‘ri yoki manfiy qiymat e'tiborsiz qoldiriladi."""
+    try:
+        price = Decimal(value)
+    except (TypeError, ArithmeticError):
+        return None
+    return price if price.is_finite() and price >= 0 else None
+
+
 
 def product_detail(request, slug):
     product = get_object_or_404(Product, slug=slug)
-    reviews = product.reviews.all().order_by('-created_at')
 
     # POST review
     if request.method == 'POST':
@@ -68,6 +154,11 @@ def product_detail(request, slug):
         else:
             messages.error(request, "Iltimos, comment va ratingni to‘ldiring.")
 
+    # Sahifa o‘zgarmagan bo‘lsa (ETag/Last-Modified) — 304, render ham, qolgan so‘rovlar ham yo‘q
+    not_modified = conditional_product_response(request, product)
+    if not_modified is not None:
+        return set_conditional_headers(request, not_modified, product)
+
     # extra_datani parse qilamiz (string bo‘lsa)
     if isinstance(product.extra_data, dict):
         extra_data = product.extra_data
@@ -78,13 +169,46 @@ def product_detail(request, slug):
         except Exception:
             extra_data = {}
 
+    def gallery():
+        # Template dagi {% cache %} fragmenti topilmaganda (cache miss) gina chaqiriladi
+        images = list(product.images.all())
+        attach_derivatives([product.image, *(img.image for img in images)])
+        return images
+
+    def review_page():
+        # Faqat birinchi sahifa; qolganlari "Yana" tugmasi bilan product_reviews dan keladi
+        return _review_page(product)
+
     context = {
         'product': product,
-        'reviews': reviews,
-        'extra_data': extra_data
+        'gallery': gallery,
+        'review_page': review_page,  # fragment ichida chaqiriladi
+        'extra_data': extra_data,
+        'fragment_ttl': PRODUCT_FRAGMENT_TTL,
     }
-    return render(request, 'shop/product_detail.html', context)
+    response = render(request, 'shop/product_detail.html', context)
+    return set_conditional_headers(request, response, product)
+
+
+
+def _review_page(product, after=None):
+    reviews = product.reviews.select_related('user').only(
+        'id', 'product_id', 'comment', 'stars_given', 'created_at', 'user_id', 'user__username',
+    )
+    page = keyset_paginate(reviews, REVIEW_ORDERING, REVIEWS_PER_PAGE, after=after)
+    page.more_url = (
+        f"{reverse('shop:product_reviews', args=[product.slug])}?after={page.next_cursor}"
+        if page.has_next else ''
+    )
+    return page
+
 
+def product_reviews(request, slug):
+    """Product review larining keyingi sahifasi (AJAX "Yana ko‘rsatish"): HTML bo‘lak + keyingi URL."""
+    product = get_object_or_404(Product.objects.only('id', 'slug'), slug=slug)
+    page = _review_page(product, after=request.GET.get('after'))
+    html = render_to_string('shop/review_items.html', {'reviews': page.object_list}, request=request)
+    return JsonResponse({'html': html, 'next': page.more_url or None})
 
 
 @login_required
@@ -129,33 +253,22 @@ def delete_review(request, review_id):
 #############  CART #############
 
 def cart_view(request):
-    cart = request.session.get('cart', {})
-    products = Product.objects.filter(id__in=cart.keys())
-
-    total = sum(
-        float(p.get_discounted_price()) * cart[str(p.id)]
-        for p in products
-    )
+    summary = Cart(request).summary
 
     return render(request, 'shop/cart.html', {
-        'products': products,
-        'cart': cart,
-        'total': total
+        'summary': summary,
+        'lines': summary.lines,
+        'total': summary.subtotal
     })
 
 
 def add_to_cart(request, product_id):
-    cart = request.session.get('cart', {})
-    cart[str(product_id)] = cart.get(str(product_id), 0) + 1
-    request.session['cart'] = cart
+    Cart(request).add(product_id)
     return redirect('shop:cart_view')
 
 
 def remove_from_cart(request, product_id):
-    cart = request.session.get('cart', {})
-    if str(product_id) in cart:
-        del cart[str(product_id)]
-        request.session['cart'] = cart
+    Cart(request).remove(product_id)
     return redirect('shop:cart_view')
 
 
@@ -164,7 +277,7 @@ def remove_from_cart(request, product_id):
 
 @login_required
 def checkout_address(request):
-    cart = request.session.get('cart', {})
+    cart = Cart(request)
     if not cart:
         return redirect('shop:cart_view')
 
@@ -181,14 +294,7 @@ def checkout_address(request):
     return render(request, 'shop/checkout_address.html', {"form": form})
 
 
-from django.db import transaction
-from django.shortcuts import redirect, render
-from django.contrib.auth.decorators import login_required
-from shop.models import Product, Order, OrderItemSnapshot
-
-
 @login_required
-@transaction.atomic  # ❗ xavfsiz sotib olish uchun
 def checkout_confirm(request):
     cart = request.session.get('cart', {})
     address = request.session.get('checkout_address', {})
@@ -196,66 +302,44 @@ def checkout_confirm(request):
     if not cart or not address:
         return redirect('shop:checkout_address')
 
-    # ❗ SELECT FOR UPDATE → productni locklaydi (zapasni to‘g‘ri kamaytiradi)
-    products = Product.objects.select_for_update().filter(id__in=cart.keys())
-
-    # ❗ Har product bo‘yicha yetarli stock bormi, tekshiramiz
-    for p in products:
-        qty = cart[str(p.id)]
-        if p.stock < qty:
-            return render(request, "shop/checkout_confirm.html", {
-                "products": products,
-                "cart": cart,
-                "address": address,
-                "total": 0,
-                "error": f"{p.name} yetarli emas! Omborda: {p.stock} ta",
-            })
-
-    # ❗ Total price
+    error = None
+    if request.method == "POST":
+        # ❗ Zaxira bitta shartli UPDATE bilan kamaytiriladi (shop.checkout.place_order)
+        try:
+            order = place_order(request.user, cart, address)
+        except EmptyCart as exc:
+            # Sessiyadagi savatda faqat 0 yoki noto‘g‘ri qatorlar qolgan
+            messages.warning(request, str(exc))
+            return redirect('shop:cart_view')
+        except InsufficientStock as exc:
+            error = str(exc)
+        else:
+            # Savatni tozalash
+            Cart(request).clear()
+            request.session['checkout_address'] = {}
+            return redirect('shop:checkout_success', order_id=order.id)
+
+    # Ko‘rib chiqish sahifasi — lock siz, faqat o‘qish
+    quantities = cart_quantities(cart)
+    products = Product.objects.filter(id__in=quantities)
+
+    if error is None:
+        for p in products:
+            if p.stock < quantities[p.id]:
+                error = f"{p.name} yetarli emas! Omborda: {p.stock} ta"
+                break
+
     total = sum(
-        p.get_discounted_price() * cart[str(p.id)]
+        p.get_discounted_price() * quantities[p.id]
         for p in products
     )
 
-    if request.method == "POST":
-        # 1️⃣ Order yaratamiz
-        order = Order.objects.create(
-            user=request.user,
-            items=cart,
-            total_price=total,
-            full_name=address['full_name'],
-            phone=address['phone'],
-            address=address['address'],
-            note=address.get('note', '')
-        )
-
-        # 2️⃣ Stockni kamaytirish (asosiy joy)
-        for p in products:
-            qty = cart[str(p.id)]
-            p.stock -= qty          # kamaytirish
-            p.save()                # ❗ saqlash shart
-
-            # 3️⃣ Snapshot yaratish
-            snap = OrderItemSnapshot.objects.create(
-                product_id=p.id,
-                name=p.name,
-                image=p.image.url if p.image else "",
-                price=p.get_discounted_price(),
-                quantity=qty
-            )
-            order.snapshots.add(snap)
-
-        # 4️⃣ Savatni tozalash
-        request.session['cart'] = {}
-        request.session['checkout_address'] = {}
-
-        return redirect('shop:checkout_success', order_id=order.id)
-
     return render(request, 'shop/checkout_confirm.html', {
         "products": products,
         "cart": cart,
         "address": address,
-        "total": total,
+        "total": 0 if error else total,
+        "error": error,
     })
 
 
@@ -269,30 +353,15 @@ def my_orders(request):
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
 
-    orders_data = []
-    for order in page_obj:
-        items_info = []
-        for product_id_str, quantity in order.items.items():
-            try:
-                product = Product.objects.get(id=int(product_id_str))
-                items_info.append({
-                    "deleted": False,
-                    "product": product,
-                    "quantity": quantity
-                })
-            except Product.DoesNotExist:
-                items_info.append({
-                    "deleted": True,
-                    "product": None,
-                    "quantity": quantity,
-                    "product_id": product_id_str
-                })
-
-        orders_data.append({
+    order_lines = resolve_order_items(page_obj)
+    orders_data = [
+        {
             "order": order,
-            "items": items_info,
-            "total_items": sum(i["quantity"] for i in items_info)
-        })
+            "items": order_lines[order.id],
+            "total_items": sum(line.quantity for line in order_lines[order.id])
+        }
+        for order in page_obj
+    ]
 
     return render(request, 'shop/my_orders.html', {
         "orders_data": orders_data,
@@ -304,26 +373,10 @@ def my_orders(request):
 
 @login_required
 def checkout_success(request, order_id):
-    order = get_object_or_404(Order, id=order_id, user=request.user)
+    order = get_object_or_404(Order.objects.select_related('user'), id=order_id, user=request.user)
 
-    items_info = []
-    for product_id_str, quantity in order.items.items():
-        try:
-            product = Product.objects.get(id=int(product_id_str))
-            items_info.append({
-                "deleted": False,
-                "product": product,
-                "quantity": quantity
-            })
-        except Product.DoesNotExist:
-            items_info.append({
-                "deleted": True,
-                "product": None,
-                "quantity": quantity,
-                "product_id": product_id_str
-            })
-
-    total_items = sum(i["quantity"] for i in items_info)
+    items_info = resolve_order_items([order])[order.id]
+    total_items = sum(line.quantity for line in items_info)
 
     return render(request, "shop/checkout_success.html", {
         "order": order,
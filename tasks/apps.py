@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+
+
+class TasksConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'tasks'
+
+    def ready(self):
+        # Har bir app dagi tasks.py (``@task`` lar) — worker registry ni to‘ldirish uchun
+        from django.utils.module_loading import autodiscover_modules
+        autodiscover_modules('tasks')
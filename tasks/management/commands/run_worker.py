@@ -0,0 +1,57 @@
+import signal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from tasks.queue import claim_tasks, purge_finished, requeue_stale, run_task, worker_id
+
+
+class Command(BaseCommand):
+    help = "Fon vazifalari worker i (DB navbat). Bir nechta process da parallel ishga tushirish mumkin"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=4, help="Thread lar soni")
+        parser.add_argument('--poll-interval', type=float, default=1.0, help="Navbat bo‘sh bo‘lsa kutish (sekund)")
+        parser.add_argument('--once', action='store_true', help="Navbatni bo‘shatib chiqish (cron/test uchun)")
+        parser.add_argument('--keep-days', type=int, default=7, help="Bajarilgan vazifalar shuncha kun saqlanadi")
+
+    def handle(self, *args, **options):
+        concurrency = options['concurrency']
+        name = worker_id()
+        stop = threading.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, lambda *_: stop.set())
+
+        self.stdout.write(f"Worker {name}: {concurrency} thread")
+        processed = 0
+        last_maintenance = 0.0
+
+        def execute(t):
+            close_old_connections()
+            try:
+                return run_task(t)
+            finally:
+                close_old_connections()
+
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='task-worker') as pool:
+            while not stop.is_set():
+                if time.monotonic() - last_maintenance > 60:
+                    requeue_stale()
+                    purge_finished(timedelta(days=options['keep_days']))
+                    last_maintenance = time.monotonic()
+
+                batch = claim_tasks(concurrency, name)
+                if not batch:
+                    if options['once']:
+                        break
+                    stop.wait(options['poll_interval'])
+                    continue
+                # Butun batch tugaguncha kutamiz — to‘xtatilganda (SIGTERM) yarim qolgan vazifa bo‘lmaydi
+                processed += len(batch)
+                list(pool.map(execute, batch))
+
+        self.stdout.write(self.style.SUCCESS(f"Worker to‘xtadi, {processed} ta vazifa bajarildi."))
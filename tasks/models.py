@@ -0,0 +1,40 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Task(models.Model):
+    """
+    Navbatdagi fon vazifasi (broker siz, PostgreSQL da). Worker lar ``SELECT ... FOR UPDATE
+    SKIP LOCKED`` bilan bir-birini kutmasdan olishadi — ``run_worker`` ni bir nechta process da ham
+    ishga tushirish mumkin.
+    """
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [(QUEUED, 'Queued'), (RUNNING, 'Running'), (DONE, 'Done'), (FAILED, 'Failed')]
+
+    name = models.CharField(max_length=200)
+    args = models.JSONField(default=list)
+    kwargs = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    locked_by = models.CharField(max_length=100, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Worker so‘rovi: faqat navbatdagilar (bajarilganlar indeksga tushmaydi)
+            models.Index(fields=['run_at', 'id'], name='task_queued_idx', condition=models.Q(status='queued')),
+            models.Index(fields=['locked_at'], name='task_running_idx', condition=models.Q(status='running')),
+            models.Index(fields=['status', 'finished_at'], name='task_status_finished_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
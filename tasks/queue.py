@@ -0,0 +1,145 @@
+import json
+import logging
+import os
+import socket
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Task
+
+logger = logging.getLogger('tasks')
+
+# name -> TaskFunction
+registry = {}
+
+# Shuncha vaqtdan beri "running" dagi vazifa worker bilan birga o‘lgan hisoblanadi va qayta navbatga qo‘yiladi
+LOCK_TIMEOUT = timedelta(minutes=10)
+
+
+class TaskFunction:
+    """
+    ``@task`` bilan o‘ralgan funksiya. Oddiy chaqirish — shu yerda bajarish;
+    ``.delay(...)`` — joriy tranzaksiya commit bo‘lgandan keyin navbatga qo‘yish.
+    Argumentlar JSON da saqlanadi (Decimal/datetime — string bo‘lib keladi).
+    """
+
+    def __init__(self, func, name, max_attempts, retry_delay):
+        self.func = func
+        self.name = name
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.__doc__ = func.__doc__
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def delay(self, *args, **kwargs):
+        # Round-trip orqali Decimal/datetime ni worker ko‘radigan ko‘rinishga keltiramiz (eager da ham bir xil)
+        payload = json.loads(json.dumps([args, kwargs], cls=DjangoJSONEncoder))
+        if getattr(settings, 'TASKS_EAGER', False):
+            transaction.on_commit(lambda: _run_eager(self, *payload))
+        else:
+            transaction.on_commit(lambda: self.enqueue(*payload))
+
+    def enqueue(self, args=(), kwargs=None, run_at=None):
+        return Task.objects.create(
+            name=self.name,
+            args=list(args),
+            kwargs=kwargs or {},
+            max_attempts=self.max_attempts,
+            run_at=run_at or timezone.now(),
+        )
+
+
+def task(name=None, max_attempts=3, retry_delay=30):
+    """
+    Fon vazifasini ro‘yxatdan o‘tkazadi. ``retry_delay`` (sekund) har urinishda ikki barobar oshadi.
+    Vazifa tranzaksiya ichida bajariladi — xato bo‘lsa DB o‘zgarishlari bekor, qayta urinishda takrorlanmaydi.
+    """
+
+    def decorator(func):
+        task_name = name or f'{func.__module__}.{func.__qualname__}'
+        wrapper = TaskFunction(func, task_name, max_attempts, retry_delay)
+        registry[task_name] = wrapper
+        return wrapper
+
+    return decorator
+
+
+def _run_eager(task_function, args, kwargs):
+    try:
+        with transaction.atomic():
+            task_function(*args, **kwargs)
+    except Exception:
+        logger.exception("Vazifa xatosi (eager): %s", task_function.name)
+
+
+# ===== Worker =====
+def worker_id():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def claim_tasks(limit, locked_by):
+    """Navbatdagi vazifalarni ``FOR UPDATE SKIP LOCKED`` bilan olib, ``running`` ga o‘tkazadi."""
+    now = timezone.now()
+    with transaction.atomic():
+        tasks = list(
+            Task.objects.select_for_update(skip_locked=True)
+            .filter(status=Task.QUEUED, run_at__lte=now)
+            .order_by('run_at', 'id')[:limit]
+        )
+        if tasks:
+            # attempts shu yerda oshadi: vazifa worker ni o‘ldirsa ham cheksiz qaytarilmaydi
+            Task.objects.filter(id__in=[t.id for t in tasks]).update(
+                status=Task.RUNNING, locked_at=now, locked_by=locked_by, attempts=F('attempts') + 1,
+            )
+    for t in tasks:
+        t.status, t.locked_at, t.locked_by, t.attempts = Task.RUNNING, now, locked_by, t.attempts + 1
+    return tasks
+
+
+def run_task(t):
+    """Bitta vazifani bajaradi va natijasini yozadi (done / qayta navbat / failed)."""
+    task_function = registry.get(t.name)
+    try:
+        if task_function is None:
+            raise LookupError(f"Ro‘yxatdan o‘tmagan vazifa: {t.name}")
+        with transaction.atomic():
+            task_function(*t.args, **t.kwargs)
+            Task.objects.filter(pk=t.pk).update(
+                status=Task.DONE, finished_at=timezone.now(), last_error='',
+            )
+        return True
+    except Exception:
+        error = traceback.format_exc()
+        if t.attempts < t.max_attempts and task_function is not None:
+            delay = task_function.retry_delay * 2 ** (t.attempts - 1)
+            logger.warning("Vazifa xatosi, %ss dan keyin qayta: %s #%s", delay, t.name, t.pk)
+            Task.objects.filter(pk=t.pk).update(
+                status=Task.QUEUED, run_at=timezone.now() + timedelta(seconds=delay), last_error=error,
+            )
+        else:
+            logger.error("Vazifa bajarilmadi: %s #%s\n%s", t.name, t.pk, error)
+            Task.objects.filter(pk=t.pk).update(
+                status=Task.FAILED, finished_at=timezone.now(), last_error=error,
+            )
+        return False
+
+
+def requeue_stale(timeout=LOCK_TIMEOUT):
+    """Worker o‘lib qolgan (uzoq "running") vazifalarni navbatga qaytaradi yoki urinishlar tugagan bo‘lsa failed."""
+    stale = Task.objects.filter(status=Task.RUNNING, locked_at__lt=timezone.now() - timeout)
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status=Task.FAILED, finished_at=timezone.now(), last_error='Worker vazifa davomida to‘xtadi',
+    )
+    return failed + stale.update(status=Task.QUEUED, locked_at=None, locked_by='')
+
+
+def purge_finished(older_than):
+    return Task.objects.filter(status=Task.DONE, finished_at__lt=timezone.now() - older_than).delete()[0]
@@ -0,0 +1,87 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from shop.models import Category
+from .models import Task
+from .queue import claim_tasks, registry, requeue_stale, run_task, task
+
+calls = []
+
+
+@task(name='tasks.tests.flaky', max_attempts=2, retry_delay=10)
+def flaky(name, fail=True):
+    """Kategoriya yaratadi va ``fail`` bo‘lsa xato beradi — o‘zgarish bekor bo‘lishi kerak."""
+    calls.append(name)
+    Category.objects.create(name=name)
+    if fail:
+        raise RuntimeError('kutilgan xato')
+
+
+@override_settings(TASKS_EAGER=False)
+class TaskQueueTests(TestCase):
+
+    def setUp(self):
+        calls.clear()
+
+    def claim_one(self):
+        claimed = claim_tasks(10, 'test-worker')
+        self.assertEqual(len(claimed), 1)
+        return claimed[0]
+
+    def test_success_marks_done(self):
+        flaky.enqueue(['ok'], {'fail': False})
+        self.assertTrue(run_task(self.claim_one()))
+
+        t = Task.objects.get()
+        self.assertEqual((t.status, t.attempts, t.last_error), (Task.DONE, 1, ''))
+        self.assertTrue(Category.objects.filter(name='ok').exists())
+
+    def test_failure_rolls_back_and_requeues_with_backoff(self):
+        flaky.enqueue(['xato'])
+        before = timezone.now()
+        self.assertFalse(run_task(self.claim_one()))
+
+        t = Task.objects.get()
+        self.assertEqual((t.status, t.attempts), (Task.QUEUED, 1))
+        self.assertIn('kutilgan xato', t.last_error)
+        self.assertGreaterEqual(t.run_at, before + timedelta(seconds=10))
+        self.assertFalse(Category.objects.filter(name='xato').exists())
+        # Kechiktirilgan vazifa hali olinmaydi
+        self.assertEqual(claim_tasks(10, 'test-worker'), [])
+
+    def test_last_attempt_marks_failed(self):
+        flaky.enqueue(['xato'])
+        run_task(self.claim_one())
+        Task.objects.update(run_at=timezone.now() - timedelta(seconds=1))
+        self.assertFalse(run_task(self.claim_one()))
+
+        t = Task.objects.get()
+        self.assertEqual((t.status, t.attempts), (Task.FAILED, 2))
+        self.assertIsNotNone(t.finished_at)
+        self.assertEqual(calls, ['xato', 'xato'])
+
+    def test_unknown_task_fails_without_retry(self):
+        Task.objects.create(name='tasks.tests.yoq')
+        self.assertFalse(run_task(self.claim_one()))
+        self.assertEqual(Task.objects.get().status, Task.FAILED)
+
+    def test_delay_enqueues_on_commit_with_json_args(self):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            flaky.delay('narx', fail=Decimal('1.50'))
+            self.assertFalse(Task.objects.exists())
+        for callback in callbacks:
+            callback()
+
+        t = Task.objects.get()
+        self.assertEqual((t.name, t.args, t.kwargs, t.max_attempts), ('tasks.tests.flaky', ['narx'], {'fail': '1.50'}, 2))
+        self.assertIs(registry[t.name], flaky)
+
+    def test_requeue_stale(self):
+        flaky.enqueue(['a'])
+        claimed = self.claim_one()
+        Task.objects.filter(pk=claimed.pk).update(locked_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(requeue_stale(), 1)
+        self.assertEqual(Task.objects.get().status, Task.QUEUED)
@@ -1,8 +1,10 @@
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.core.validators import FileExtensionValidator
 from phonenumber_field.modelfields import PhoneNumberField
 
 from django.db import models
+from django.db.models.functions import Collate, Upper
 
 # Create your models here.
 
@@ -11,6 +13,21 @@ class CustomUser(AbstractUser):
     profile_picture = models.ImageField(upload_to='users/', default='no_image_user.png', null=True, blank=True, validators=[FileExtensionValidator(allowed_extensions=['jpg', 'png', 'jpeg', 'heic', 'heif'])])
     phone_number = PhoneNumberField(blank=True, null=True, unique=False)
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Admin users ro‘yxati: keyset pagination (-date_joined, -id)
+            models.Index(fields=['-date_joined', '-id'], name='user_date_joined_idx'),
+            # Admin qidiruvlari (icontains -> UPPER(col) LIKE) uchun trigram indekslar
+            GinIndex(OpClass(Upper('username'), name='gin_trgm_ops'), name='user_username_trgm_idx'),
+            # Admin autocomplete: UPPER(username) COLLATE "C" LIKE 'X%' ORDER BY shu ifoda (btree, LIMIT bilan arzon)
+            models.Index(Collate(Upper('username'), 'C'), 'id', name='user_username_prefix_idx'),
+            GinIndex(OpClass(Upper('email'), name='gin_trgm_ops'), name='user_email_trgm_idx'),
+            GinIndex(OpClass(Upper('first_name'), name='gin_trgm_ops'), name='user_first_name_trgm_idx'),
+            GinIndex(OpClass(Upper('last_name'), name='gin_trgm_ops'), name='user_last_name_trgm_idx'),
+            # E.164 ("+99890...") prefiks qidiruvi: LIKE 'prefix%' ni collation dan qat'i nazar indeks bilan
+            models.Index(fields=['phone_number'], name='user_phone_prefix_idx', opclasses=['varchar_pattern_ops']),
+        ]
+
     def __str__(self):
         # Odatda email yoki full name qaytariladi
         if self.first_name or self.last_name: